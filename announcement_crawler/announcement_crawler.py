@@ -5,8 +5,9 @@ import time
 from bs4 import BeautifulSoup
 from crawler import Crawler
 from urllib.parse import urljoin
-from announcement_crawler.json_manager import JsonManager
 from announcement_crawler.announcement_parser import AnnouncementParser
+from announcement_crawler.notice_poller import NoticePoller
+from announcement_crawler.notice_store import NoticeStore
 from fetcher import Fetcher
 import requests
 import os
@@ -31,6 +32,10 @@ class AnnouncementCrawler(Crawler):
         self.parser = AnnouncementParser(self.base_url, logger)
         self.fetcher = Fetcher(self.user_agents, self.logger)
         self.state_file = os.path.join('crawler_state', 'announcement_state.json')
+        # 새 글 확인은 본문 페이지 대신 목록 페이지 하나만 조건부 GET으로 확인
+        self.poller = NoticePoller(logger, user_agents=self.user_agents)
+        # article_no 색인이 있는 연도별 공지 파일 (재시작 후 같은 글을 다시 저장해도 중복 줄이 생기지 않음)
+        self.store = NoticeStore(logger)
         
         # 마지막 크롤링 상태 로드
         if self.load_last_state():
@@ -59,6 +64,8 @@ class AnnouncementCrawler(Crawler):
         }
         with open(self.state_file, 'w') as file:
             json.dump(state, file)
+        self.last_article_no = article_no
+        self.last_page_url = url
         self.logger.info(f"Saved last article: {article_no} (URL: {url})")
 
     def start_crawling_with_interval(self):
@@ -67,15 +74,17 @@ class AnnouncementCrawler(Crawler):
         except Exception as e:
             self.logger.error(f"Crawling failed: {e}")
 
-    def crawl_notices(self, start_url):
+    def crawl_notices(self, start_url, wait=True):
+        """start_url부터 다음 글 링크를 따라 저장. wait이면 마지막 글 이후 새 글 대기 모드로 진입"""
         url = start_url
         with requests.Session() as session:
             while url:
                 self.logger.info(f"Crawling notice at: {url}")
                 content = self.fetcher.fetch_page_content(session, url)
                 if not content:
+                    # 가져오지 못하면 대기 모드로 들어가지 않고 종료 (대기 모드에서 호출된 경우 다음 확인 때 다시 시도)
                     self.logger.warning(f"Failed to fetch content from: {url}")
-                    break
+                    return
 
                 soup = BeautifulSoup(content, 'html.parser')
                 notice_date = soup.select_one(".date").get_text(strip=True)
@@ -85,8 +94,8 @@ class AnnouncementCrawler(Crawler):
                 # JSON 데이터 생성
                 json_data = self.parser.parse_notice(soup, url)
                 article_no = self.get_article_no_from_url(url)
-                file_path = os.path.join('notices', f'notices_{notice_year}.jsonl')
-                JsonManager.save_to_jsonl(json_data, file_path)
+                if not self.store.upsert(json_data, notice_year):
+                    self.logger.info(f"Notice {article_no} is already saved with the same content")
 
                 # 마지막으로 크롤링한 공지 저장
                 self.save_last_state(url, article_no)
@@ -94,27 +103,43 @@ class AnnouncementCrawler(Crawler):
 
                 url = self.get_next_notice_url(soup)
 
-                if not url:
-                    self.start_waiting_for_new_posts()
-                    break  # 대기 모드로 진입 후 크롤링 루프 종료
+        if wait:
+            self.start_waiting_for_new_posts()
 
     def start_waiting_for_new_posts(self):
         """이전 상태에서 이어서 새로운 공지를 기다리는 모드"""
+        handled_article_no = 0  # 새 글로 감지했지만 다음 글 링크로 이어지지 않은 목록의 article_no
         with requests.Session() as session:
             while True:
                 self.logger.info("Waiting for a new post...")
-                time.sleep(60)  # 1분 대기
+                last_article_no = self.last_article_no
+                if last_article_no is not None:
+                    last_article_no = max(int(last_article_no), handled_article_no)
+                new_articles = self.poller.wait_for_new_post(session, last_article_no)
+                oldest_article_no, oldest_url = new_articles[0]
+                # 목록에 마지막으로 저장한 글도 보일 때만 그 사이에 빠진 글이 없으므로 목록의 링크를 사용
+                # (재시작이나 긴 간격 동안 목록 한 페이지보다 많은 글이 올라왔으면 마지막 글부터 다음 글 링크를 따라감)
+                overlaps = self.last_article_no is not None and self.poller.lists(int(self.last_article_no))
+                if oldest_url and overlaps:
+                    # 목록에서 찾은 가장 오래된 새 글부터 다음 글 링크를 따라 최신 글까지 저장
+                    self.logger.info(f"New post found! Resuming crawl from article_no {oldest_article_no}...")
+                    self.crawl_notices(oldest_url, wait=False)
+                    continue
+                top_article_no = new_articles[-1][0]
+                # 목록의 링크를 쓸 수 없으면 마지막 글의 본문 페이지에서 다음 글 링크를 찾음
                 check_url = self.last_page_url if self.last_page_url else self.start_url
                 content = self.fetcher.fetch_page_content(session, check_url)
-                if content:
-                    soup = BeautifulSoup(content, 'html.parser')
-                    url = self.get_next_notice_url(soup)
-                    if url and self.is_new_post(url, self.last_article_no):
-                        self.logger.info("New post found! Resuming crawl...")
-                        self.crawl_notices(url)
-                        break
-                else:
+                if not content:
                     self.logger.warning(f"Failed to fetch content from: {check_url}")
+                    continue
+                soup = BeautifulSoup(content, 'html.parser')
+                url = self.get_next_notice_url(soup)
+                if url and self.is_new_post(url, self.last_article_no):
+                    self.logger.info("New post found! Resuming crawl...")
+                    self.crawl_notices(url, wait=False)
+                else:
+                    self.logger.warning(f"List page shows article_no {top_article_no}, but no next link from: {check_url}")
+                    handled_article_no = top_article_no
 
     def get_next_notice_url(self, soup):
         next_notice_link = soup.select_one("#jwxe_main_content > div.jwxe_board > div > ul > li:nth-child(1) > a")
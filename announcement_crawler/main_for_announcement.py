@@ -1,9 +1,12 @@
 # main_for_announcement.py
 
+import argparse
 import logging
 from announcement_crawler.announcement_crawler import AnnouncementCrawler
 from announcement_crawler.announcement_parser import AnnouncementParser
 from announcement_crawler.json_manager import JsonManager
+from announcement_crawler.notice_backfill import NoticeBackfill
+from announcement_crawler.notice_store import NoticeStore
 def setup_logger():
     logger = logging.getLogger("AnnouncementCrawler")
     logger.setLevel(logging.INFO)
@@ -14,7 +17,27 @@ def setup_logger():
     return logger
 
 def main():
+    parser = argparse.ArgumentParser(description="연세대학교 공지사항 크롤러")
+    parser.add_argument('--backfill', action='store_true', help='목록 페이지에서 게시글을 모아 본문을 동시에 가져오는 백필 모드')
+    parser.add_argument('--workers', type=int, default=8, help='백필 모드의 동시 요청 스레드 수')
+    parser.add_argument('--rate', type=float, default=4.0, help='백필 모드의 초당 요청 수 (모든 스레드 합계)')
+    parser.add_argument('--burst', type=int, default=4, help='백필 모드의 연속 요청 허용 수')
+    parser.add_argument('--max_pages', type=int, default=None, help='백필 모드에서 확인할 최대 목록 페이지 수 (없으면 마지막 페이지까지)')
+    parser.add_argument('--compact', action='store_true', help='연도별 공지 파일에서 이전 버전 줄과 읽을 수 없는 줄을 제거하고 종료')
+    args = parser.parse_args()
+
     logger = setup_logger()
+    if args.compact:
+        store = NoticeStore(logger)
+        for year in store.years():
+            store.compact(year)
+        store.close()
+        return
+    if args.backfill:
+        backfill = NoticeBackfill(logger, workers=args.workers, rate=args.rate, burst=args.burst, max_pages=args.max_pages)
+        backfill.run()
+        return
+
     start_url = "https://www.yonsei.ac.kr/sc/support/notice.jsp?mode=view&article_no=178628&board_wrapper=%2Fsc%2Fsupport%2Fnotice.jsp&pager.offset=1400&board_no=15"
     crawler = AnnouncementCrawler(start_url, logger)
     crawler.start_crawling_with_interval()
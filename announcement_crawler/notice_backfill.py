@@ -0,0 +1,202 @@
+# notice_backfill.py
+
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urljoin, urlparse, parse_qs
+import requests
+from bs4 import BeautifulSoup
+from fetcher import Fetcher
+from politeness import TokenBucket
+from announcement_crawler.announcement_parser import AnnouncementParser
+from announcement_crawler.notice_store import NoticeStore
+
+LIST_URL = "https://www.yonsei.ac.kr/sc/support/notice.jsp?mode=list&board_no=15"
+VIEW_LINK_PATTERN = re.compile(r'mode=view.*article_no=\d+|article_no=\d+.*mode=view')
+
+def article_no_of(url):
+    values = parse_qs(urlparse(url).query).get('article_no')
+    try:
+        return int(values[0]) if values else None
+    except ValueError:
+        return None
+
+
+class NoticeBackfill:
+    """
+    공지사항 게시판의 목록 페이지(pager.offset)에서 게시글 URL을 모은 뒤, 본문 페이지를 여러 스레드로 가져와
+    notices/notices_<연도>.jsonl에 기록하는 백필.
+    - 요청은 모든 스레드가 공유하는 토큰 버킷(초당 rate개, 최대 burst개)으로 제한합니다.
+    - 기록은 article_no 오름차순으로만 하므로 연도별 파일 안의 순서는 다음 글 링크를 따라갈 때와 같습니다.
+    - 다시 실행하면 공지 색인(NoticeStore)에 없는 글만 가져옵니다. 색인은 기록과 함께 갱신되므로 따로 진행 상태를 남기지 않습니다.
+    """
+
+    def __init__(self, logger, list_url=LIST_URL, notices_dir='notices',
+                 last_state_file=os.path.join('crawler_state', 'announcement_state.json'),
+                 workers=8, rate=4.0, burst=4, page_size=10, max_pages=None, user_agents=None):
+        self.logger = logger
+        self.list_url = list_url
+        self.notices_dir = notices_dir
+        self.last_state_file = last_state_file  # 대기 모드(AnnouncementCrawler)가 이어서 확인할 마지막 글
+        self.workers = workers
+        self.page_size = page_size  # 목록 페이지의 pager.offset 간격
+        self.max_pages = max_pages  # 확인할 최대 목록 페이지 수 (없으면 글이 없는 페이지까지)
+        self.fetcher = Fetcher(user_agents or ["Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:85.0) Gecko/20100101 Firefox/85.0"],
+                               logger, politeness_delay=None)
+        self.parser = AnnouncementParser("https://www.yonsei.ac.kr/sc/support/notice.jsp", logger)
+        self.bucket = TokenBucket(rate, burst)
+        self.bucket_lock = threading.Lock()
+        self.local = threading.local()  # 스레드별 requests.Session
+        self.store = None
+        self.completed = set()
+
+    def acquire(self):
+        """토큰이 생길 때까지 대기 (모든 스레드 합계가 초당 rate개를 넘지 않음)"""
+        while True:
+            with self.bucket_lock:
+                now = time.monotonic()
+                delay = self.bucket.delay(now)
+                if delay == 0.0:
+                    self.bucket.consume(now)
+                    return
+            time.sleep(delay)
+
+    def fetch(self, url):
+        session = getattr(self.local, 'session', None)
+        if session is None:
+            session = self.local.session = requests.Session()
+        self.acquire()
+        return self.fetcher.fetch_page_content(session, url)
+
+    def load_completed(self):
+        self.store = NoticeStore(self.logger, self.notices_dir)
+        self.completed = set(self.store.article_nos())
+        self.logger.info(f"Loaded {len(self.completed)} completed article numbers from the notice index")
+
+    def list_page_url(self, page):
+        return f"{self.list_url}&pager.offset={page * self.page_size}"
+
+    def parse_list(self, content, page_url):
+        """목록 페이지의 게시글 {article_no: 본문 URL}"""
+        soup = BeautifulSoup(content, 'html.parser')
+        articles = {}
+        for link in soup.find_all('a', href=True):
+            href = link['href']
+            if 'javascript' in href or not VIEW_LINK_PATTERN.search(href):
+                continue
+            url = urljoin(page_url, href)
+            article_no = article_no_of(url)
+            if article_no is not None:
+                articles.setdefault(article_no, url)
+        return articles
+
+    def enumerate_articles(self):
+        """
+        목록 페이지를 workers개씩 동시에 가져와 게시글 URL을 모음.
+        새 글이 없는 페이지(마지막 페이지 이후, 상단 고정 글만 있는 페이지)가 나오면 멈춥니다.
+        """
+        articles = {}
+        page = 0
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='BackfillList') as executor:
+            while self.max_pages is None or page < self.max_pages:
+                count = self.workers if self.max_pages is None else min(self.workers, self.max_pages - page)
+                urls = [self.list_page_url(p) for p in range(page, page + count)]
+                page += count
+                for url, content in zip(urls, executor.map(self.fetch, urls)):
+                    if not content:
+                        self.logger.warning(f"Failed to fetch list page: {url}")
+                        continue
+                    found = self.parse_list(content, url)
+                    new = found.keys() - articles.keys()
+                    if not new:
+                        self.logger.info(f"No new articles on {url}, stopping enumeration")
+                        return articles
+                    articles.update(found)
+                self.logger.info(f"Enumerated {len(articles)} articles from {page} list pages")
+        return articles
+
+    def fetch_notice(self, url):
+        """본문 페이지를 가져와 (연도, 레코드) 또는 None (삭제된 글, 형식이 다른 페이지)"""
+        content = self.fetch(url)
+        if not content:
+            self.logger.warning(f"Failed to fetch content from: {url}")
+            return None
+        try:
+            soup = BeautifulSoup(content, 'html.parser')
+            notice_year = time.strptime(soup.select_one(".date").get_text(strip=True), "%Y.%m.%d").tm_year
+            return notice_year, self.parser.parse_notice(soup, url)
+        except (AttributeError, ValueError) as e:
+            self.logger.warning(f"Failed to parse notice {url}: {e}")
+            return None
+
+    def write(self, notice_year, record):
+        self.store.upsert(record, notice_year)
+
+    def run(self):
+        self.load_completed()
+        try:
+            articles = self.enumerate_articles()
+            todo = sorted((article_no, url) for article_no, url in articles.items() if article_no not in self.completed)
+            self.logger.info(f"Backfilling {len(todo)} of {len(articles)} articles with {self.workers} workers")
+            written, failed, newest = self.fetch_in_order(todo)
+            self.logger.info(f"Backfill finished: {written} written, {failed} failed (retried on next run)")
+            if newest:
+                self.update_last_state(*newest)
+        finally:
+            self.store.close()
+
+    def fetch_in_order(self, todo):
+        """
+        본문 페이지는 동시에 가져오되 결과는 article_no 순서대로 기록.
+        앞선 글이 끝나기 전에 끝난 글은 최대 workers * 4개까지 메모리에서 기다립니다.
+        """
+        written = failed = 0
+        newest = None
+        window = self.workers * 4
+        remaining = iter(todo)
+        pending = deque()
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='BackfillView') as executor:
+            def submit_next():
+                item = next(remaining, None)
+                if item is not None:
+                    pending.append((*item, executor.submit(self.fetch_notice, item[1])))
+
+            for _ in range(window):
+                submit_next()
+            while pending:
+                article_no, url, future = pending.popleft()
+                submit_next()
+                try:
+                    result = future.result()
+                except Exception as e:
+                    # 예상하지 못한 오류도 이 글만 실패로 세고 나머지 글은 계속 기록
+                    self.logger.warning(f"Failed to backfill {url}: {e}")
+                    result = None
+                if result is None:
+                    failed += 1
+                    continue
+                self.write(*result)
+                self.completed.add(article_no)
+                written += 1
+                newest = (url, article_no)
+                if written % 100 == 0:
+                    rate = written / max(time.monotonic() - started, 1e-9)
+                    self.logger.info(f"Backfilled {written}/{len(todo)} articles ({rate:.1f} articles/sec), last article_no: {article_no}")
+        return written, failed, newest
+
+    def update_last_state(self, url, article_no):
+        """대기 모드가 백필한 글 이후부터 새 글을 확인하도록 마지막 글 상태를 갱신 (더 최신 글이 기록되어 있으면 유지)"""
+        last_article_no = None
+        if os.path.exists(self.last_state_file):
+            with open(self.last_state_file, 'r') as file:
+                last_article_no = json.load(file).get("last_article_no")
+        if last_article_no is not None and int(last_article_no) >= article_no:
+            return
+        with open(self.last_state_file, 'w') as file:
+            json.dump({"last_article_no": str(article_no), "last_page_url": url}, file)
+        self.logger.info(f"Saved last article: {article_no} (URL: {url})")
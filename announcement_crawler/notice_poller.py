@@ -0,0 +1,193 @@
+# notice_poller.py
+
+import html
+import json
+import os
+import random
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from urllib.parse import urljoin
+from fetcher import Fetcher
+from http_cache import HttpCache
+from announcement_crawler.notice_backfill import LIST_URL, VIEW_LINK_PATTERN
+
+KST = timezone(timedelta(hours=9))  # 한국은 일광 절약 시간이 없으므로 고정 오프셋
+ARTICLE_NO_PATTERN = re.compile(rb'article_no=(\d+)')
+ARTICLE_LINK_PATTERN = re.compile(rb'href=["\']([^"\']*article_no=(\d+)[^"\']*)["\']')
+
+
+def top_article_no(content):
+    """목록 페이지에서 가장 큰 article_no (DOM을 만들지 않고 바이트에서 바로 찾음, 상단 고정 글은 더 작으므로 무시됨)"""
+    numbers = [int(match) for match in ARTICLE_NO_PATTERN.findall(content)]
+    return max(numbers) if numbers else None
+
+
+def article_links(content, list_url):
+    """목록 페이지의 게시글 {article_no: 본문 URL} (href 속성만 정규식으로 찾음)"""
+    links = {}
+    for href, number in ARTICLE_LINK_PATTERN.findall(content):
+        href = html.unescape(href.decode('latin-1'))  # &amp; 등 HTML 엔티티를 실제 URL로
+        if 'javascript' not in href and VIEW_LINK_PATTERN.search(href):
+            links.setdefault(int(number), urljoin(list_url, href))
+    return links
+
+
+class PollSchedule:
+    """
+    다음 확인까지의 간격 (초).
+    - 시간대별 기본 간격: 평일 업무 시간(office_hours)은 office_interval, 새벽(night_hours)은 night_interval, 나머지는 evening_interval
+    - 게시 이력: 요일/시간대(168칸)별로 새 글을 발견한 횟수가 평균보다 많으면 간격을 줄이고 적으면 늘림 (최대 2배)
+    - 최근 새 글: 새 글을 발견한 직후에는 min_interval로 확인하고, 변화가 없을 때마다 backoff배씩 기본 간격까지 늘림
+    """
+
+    def __init__(self, office_interval=30, evening_interval=180, night_interval=900, min_interval=15,
+                 office_hours=(9, 18), night_hours=(0, 7), backoff=1.5, jitter=0.1):
+        self.office_interval = office_interval
+        self.evening_interval = evening_interval
+        self.night_interval = night_interval
+        self.min_interval = min_interval
+        self.office_hours = office_hours
+        self.night_hours = night_hours
+        self.backoff = backoff
+        self.jitter = jitter  # 여러 인스턴스가 같은 순간에 요청하지 않도록 ±비율만큼 흔듦
+        self.slot_counts = [0] * (7 * 24)
+
+    @staticmethod
+    def slot(now):
+        return now.weekday() * 24 + now.hour
+
+    def base_interval(self, now):
+        if self.night_hours[0] <= now.hour < self.night_hours[1]:
+            return self.night_interval
+        if now.weekday() < 5 and self.office_hours[0] <= now.hour < self.office_hours[1]:
+            return self.office_interval
+        return self.evening_interval
+
+    def learned_interval(self, now):
+        """게시 이력으로 보정한 기본 간격"""
+        base = self.base_interval(now)
+        total = sum(self.slot_counts)
+        if not total:
+            return base
+        mean = total / len(self.slot_counts)
+        weight = (self.slot_counts[self.slot(now)] + 1) / (mean + 1)
+        return min(base * 2, max(self.min_interval, base / weight))
+
+    def record_post(self, now):
+        self.slot_counts[self.slot(now)] += 1
+
+    def next_interval(self, now, unchanged):
+        """unchanged: 마지막 새 글 이후 연속으로 변화가 없었던 확인 횟수 (새 글을 본 적이 없으면 None)"""
+        interval = self.learned_interval(now)
+        if unchanged is not None:
+            interval = min(interval, self.min_interval * self.backoff ** unchanged)
+        return max(self.min_interval, interval) * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def to_state(self):
+        return {"slot_counts": self.slot_counts}
+
+    def load_state(self, state):
+        counts = state.get("slot_counts")
+        if counts and len(counts) == len(self.slot_counts):
+            self.slot_counts = counts
+
+
+class NoticePoller:
+    """
+    새 공지 확인기. 게시판 목록 페이지 하나만 조건부 GET(ETag/Last-Modified)으로 가져와,
+    304이면 이전 결과를 그대로 쓰고, 200이면 정규식으로 가장 큰 article_no와 게시글 본문 URL만 찾습니다.
+    요일/시간대별 게시 이력과 확인 상태는 state_file에 저장되어 재시작 후에도 간격 조정에 사용됩니다.
+    """
+
+    def __init__(self, logger, list_url=LIST_URL, cache_file=os.path.join('crawler_state', 'announcement_poll_cache.sqlite3'),
+                 state_file=os.path.join('crawler_state', 'announcement_poll.json'), schedule=None, user_agents=None):
+        self.logger = logger
+        self.list_url = list_url
+        self.state_file = state_file
+        self.schedule = schedule or PollSchedule()
+        os.makedirs(os.path.dirname(cache_file) or '.', exist_ok=True)
+        self.cache = HttpCache(cache_file, logger, commit_every=1)
+        self.fetcher = Fetcher(user_agents, logger, politeness_delay=None, cache=self.cache)
+        self.top = None  # 마지막으로 확인한 목록 페이지의 가장 큰 article_no
+        self.articles = {}  # 마지막으로 확인한 목록 페이지의 {article_no: 본문 URL}
+        self.unchanged = None  # 마지막 새 글 이후 연속으로 변화가 없었던 확인 횟수
+        self.polls = 0
+        self.not_modified = 0
+        self.received_bytes = 0
+        self.load_state()
+
+    def load_state(self):
+        if os.path.exists(self.state_file):
+            with open(self.state_file, 'r') as file:
+                state = json.load(file)
+            self.top = state.get("top_article_no")
+            self.articles = {int(article_no): url for article_no, url in state.get("articles", {}).items()}
+            self.schedule.load_state(state)
+
+    def save_state(self):
+        state = self.schedule.to_state()
+        state["top_article_no"] = self.top
+        state["articles"] = self.articles
+        temp_file = self.state_file + '.tmp'
+        with open(temp_file, 'w') as file:
+            json.dump(state, file)
+        os.replace(temp_file, self.state_file)
+
+    def check(self, session):
+        """목록 페이지의 가장 큰 article_no (가져오지 못하면 None)"""
+        result = self.fetcher.fetch_page(session, self.list_url, retries=2, max_total_timeout=30)
+        self.polls += 1
+        if result is None:
+            return None
+        if result.not_modified and self.top is not None:
+            self.not_modified += 1
+            return self.top
+        self.received_bytes += len(result.content)
+        self.articles = article_links(result.content, self.list_url)
+        return top_article_no(result.content)
+
+    def new_articles(self, baseline):
+        """마지막 목록 페이지에서 baseline보다 큰 (article_no, 본문 URL)을 오래된 순으로 (URL을 찾지 못한 가장 큰 글은 URL이 None)"""
+        articles = sorted((article_no, url) for article_no, url in self.articles.items() if article_no > baseline)
+        if self.top is not None and self.top > baseline and self.top not in self.articles:
+            articles.append((self.top, None))
+        return articles
+
+    def lists(self, article_no):
+        """마지막으로 확인한 목록 페이지에 article_no 글의 링크가 있는지"""
+        return article_no in self.articles
+
+    def wait_for_new_post(self, session, last_article_no, stop_event=None):
+        """
+        last_article_no보다 큰 글이 목록에 나타날 때까지 간격을 조정하며 확인하고, 새 글들의 (article_no, 본문 URL)을
+        오래된 순으로 반환. last_article_no가 없으면 첫 확인 결과를 기준으로 삼습니다. stop_event가 설정되면 None
+        """
+        baseline = int(last_article_no) if last_article_no is not None else None
+        while True:
+            now = datetime.now(KST)
+            interval = self.schedule.next_interval(now, self.unchanged)
+            self.logger.debug(f"Next list check in {interval:.0f}s")
+            if stop_event is not None:
+                if stop_event.wait(interval):
+                    return None
+            else:
+                time.sleep(interval)
+
+            top = self.check(session)
+            if top is None:
+                self.logger.warning(f"Failed to check list page: {self.list_url}")
+                continue
+            self.top = top
+            if baseline is None:
+                baseline = top
+            if top > baseline:
+                self.schedule.record_post(datetime.now(KST))
+                self.unchanged = 0
+                self.save_state()
+                self.logger.info(f"New post detected on list page: article_no {top} "
+                                 f"(polls: {self.polls}, 304: {self.not_modified}, received: {self.received_bytes / 1024:.0f}KB)")
+                return self.new_articles(baseline)
+            if self.unchanged is not None:
+                self.unchanged += 1
+            self.save_state()
@@ -0,0 +1,262 @@
+# notice_store.py
+
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+from datetime import date
+from urllib.parse import urlparse, parse_qs
+
+DATE_PATTERN = re.compile(r"date: (\d{4})\.(\d{2})\.(\d{2})")
+FILE_PATTERN = re.compile(r'^notices_(\d{4})\.jsonl$')
+
+
+def article_no_of(record):
+    values = parse_qs(urlparse(record.get("url", "")).query).get('article_no')
+    try:
+        return int(values[0]) if values else None
+    except ValueError:
+        return None
+
+def notice_date_of(record):
+    """merged_text 머리말의 게시일 ('YYYY-MM-DD'). 없으면 None"""
+    match = DATE_PATTERN.search(record.get("merged_text", ""))
+    return '-'.join(match.groups()) if match else None
+
+def content_hash(record):
+    return hashlib.sha256(json.dumps(record, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+def decode_objects(line):
+    """
+    한 줄에서 JSON 객체들을 (시작, 끝 문자 위치, 객체)로 반환.
+    줄바꿈 없이 이어 붙은 레코드도 나누어 읽고, 읽을 수 없는 나머지는 None 객체 하나로 반환
+    """
+    decoder = json.JSONDecoder()
+    index = 0
+    while index < len(line):
+        while index < len(line) and line[index].isspace():
+            index += 1
+        if index >= len(line):
+            return
+        try:
+            record, end = decoder.raw_decode(line, index)
+        except json.JSONDecodeError:
+            yield index, len(line), None
+            return
+        yield index, end, record
+        index = end
+
+
+class NoticeStore:
+    """
+    notices/notices_<연도>.jsonl 파일 위의 공지 저장소.
+    article_no → (파일, 바이트 위치, 길이, 내용 해시, 게시일) 색인을 SQLite 파일에 유지합니다.
+    - upsert: 같은 내용이면 아무것도 쓰지 않고, 내용이 바뀌었으면 연도별 파일 끝에 새 줄을 추가한 뒤 색인이 새 줄을 가리키게 함
+      (이전 줄은 compact 전까지 파일에 남음)
+    - 연도별 파일은 기존과 같은 JSONL이므로 다른 도구(JsonManager, 벤치마크)도 그대로 읽고 쓸 수 있습니다.
+      열 때 파일별로 색인한 크기 이후에 추가된 줄을 읽어 색인을 따라잡고, 파일이 줄어들었으면 그 파일을 다시 색인합니다.
+    - 한 article_no가 여러 줄에 있으면 나중 줄이 최신 내용입니다.
+    """
+
+    def __init__(self, logger, notices_dir='notices', index_file=os.path.join('crawler_state', 'notice_index.sqlite3')):
+        self.logger = logger
+        self.notices_dir = notices_dir
+        self.lock = threading.Lock()
+        os.makedirs(notices_dir, exist_ok=True)
+        os.makedirs(os.path.dirname(index_file) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(index_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS notices ("
+            " article_no INTEGER PRIMARY KEY,"
+            " file TEXT,"
+            " offset INTEGER,"
+            " length INTEGER,"
+            " hash TEXT,"
+            " notice_date TEXT)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS notices_date ON notices (notice_date)")
+        # 파일별로 색인에 반영한 바이트 수
+        self.conn.execute("CREATE TABLE IF NOT EXISTS files (name TEXT PRIMARY KEY, indexed_bytes INTEGER)")
+        self.conn.commit()
+        self.refresh()
+
+    def refresh(self):
+        """색인 이후 연도별 파일에 추가된(또는 바뀐) 내용을 색인에 반영"""
+        with self.lock:
+            indexed = dict(self.conn.execute("SELECT name, indexed_bytes FROM files"))
+            for name in sorted(os.listdir(self.notices_dir)):
+                if not FILE_PATTERN.match(name):
+                    continue
+                size = os.path.getsize(os.path.join(self.notices_dir, name))
+                start = indexed.get(name, 0)
+                if size < start:
+                    self.logger.warning(f"{name} shrank since it was indexed, reindexing the file")
+                    self.conn.execute("DELETE FROM notices WHERE file = ?", (name,))
+                    start = 0
+                if size > start:
+                    self.index_file(name, start)
+            self.conn.commit()
+
+    def index_file(self, name, start):
+        """name의 start 바이트부터 끝까지 색인 (줄바꿈 없는 마지막 줄을 끝까지 읽을 수 없으면 기록 중인 것으로 보고 남겨 둠)"""
+        indexed = duplicates = broken = 0
+        position = start
+        with open(os.path.join(self.notices_dir, name), 'rb') as f:
+            f.seek(start)
+            for raw in f:
+                line = raw.decode('utf-8', errors='surrogateescape')  # 깨진 바이트도 위치 계산이 맞도록 그대로 보존
+                objects = list(decode_objects(line))
+                if not raw.endswith(b'\n') and any(record is None for _, _, record in objects):
+                    break
+                for begin, end, record in objects:
+                    offset = position + len(line[:begin].encode('utf-8', errors='surrogateescape'))
+                    length = len(line[begin:end].encode('utf-8', errors='surrogateescape'))
+                    article_no = article_no_of(record) if isinstance(record, dict) else None
+                    if article_no is None:
+                        broken += 1
+                        self.logger.warning(f"Unreadable notice record in {name} at byte {offset}")
+                        continue
+                    if self.conn.execute("SELECT 1 FROM notices WHERE article_no = ?", (article_no,)).fetchone():
+                        duplicates += 1
+                    self.put(article_no, name, offset, length, record)
+                    indexed += 1
+                position += len(raw)
+        self.conn.execute("INSERT OR REPLACE INTO files (name, indexed_bytes) VALUES (?, ?)", (name, position))
+        self.logger.info(f"Indexed {indexed} notice records from {name} ({duplicates} superseded, {broken} unreadable)")
+
+    def put(self, article_no, name, offset, length, record):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO notices (article_no, file, offset, length, hash, notice_date) VALUES (?, ?, ?, ?, ?, ?)",
+            (article_no, name, offset, length, content_hash(record), notice_date_of(record))
+        )
+
+    def __contains__(self, article_no):
+        with self.lock:
+            return self.conn.execute("SELECT 1 FROM notices WHERE article_no = ?", (int(article_no),)).fetchone() is not None
+
+    def __len__(self):
+        with self.lock:
+            return self.conn.execute("SELECT COUNT(*) FROM notices").fetchone()[0]
+
+    def article_nos(self):
+        with self.lock:
+            return [row[0] for row in self.conn.execute("SELECT article_no FROM notices ORDER BY article_no")]
+
+    def years(self):
+        with self.lock:
+            return sorted(int(FILE_PATTERN.match(row[0]).group(1)) for row in self.conn.execute("SELECT name FROM files"))
+
+    def upsert(self, record, year=None):
+        """
+        레코드 저장. 새 글이거나 내용이 바뀌었으면 True, 같은 내용이 이미 있으면 False.
+        연도는 merged_text의 게시일에서 정하며, 게시일이 없으면 year를 사용
+        """
+        article_no = article_no_of(record)
+        if article_no is None:
+            raise ValueError(f"Notice URL has no article_no: {record.get('url')}")
+        notice_date = notice_date_of(record)
+        year = int(notice_date[:4]) if notice_date else year
+        if year is None:
+            raise ValueError(f"Notice has no date and no year was given: {record.get('url')}")
+        digest = content_hash(record)
+        data = json.dumps(record, ensure_ascii=False).encode('utf-8')
+        name = f'notices_{year}.jsonl'
+        with self.lock:
+            row = self.conn.execute("SELECT hash FROM notices WHERE article_no = ?", (article_no,)).fetchone()
+            if row and row[0] == digest:
+                return False
+            path = os.path.join(self.notices_dir, name)
+            indexed = self.conn.execute("SELECT indexed_bytes FROM files WHERE name = ?", (name,)).fetchone()
+            if os.path.exists(path) and os.path.getsize(path) > (indexed[0] if indexed else 0):
+                # 마지막 refresh 이후 다른 도구가 추가한 줄을 먼저 색인
+                self.index_file(name, indexed[0] if indexed else 0)
+            with open(path, 'ab') as f:
+                offset = f.tell()
+                if offset and not self.ends_with_newline(path, offset):
+                    # 중단된 기록의 조각 뒤에 이어 쓰지 않도록 줄을 끝냄 (조각은 색인하지 않음)
+                    f.write(b'\n')
+                    offset += 1
+                f.write(data + b'\n')
+            self.conn.execute("DELETE FROM notices WHERE article_no = ?", (article_no,))
+            self.put(article_no, name, offset, len(data), record)
+            self.conn.execute("INSERT OR REPLACE INTO files (name, indexed_bytes) VALUES (?, ?)", (name, offset + len(data) + 1))
+            self.conn.commit()
+        return True
+
+    @staticmethod
+    def ends_with_newline(path, size):
+        with open(path, 'rb') as f:
+            f.seek(size - 1)
+            return f.read(1) == b'\n'
+
+    def get(self, article_no):
+        """article_no의 최신 레코드. 없으면 None"""
+        with self.lock:
+            row = self.conn.execute("SELECT file, offset, length FROM notices WHERE article_no = ?", (int(article_no),)).fetchone()
+        if row is None:
+            return None
+        name, offset, length = row
+        with open(os.path.join(self.notices_dir, name), 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.read(length))
+
+    def iterate(self, year=None, start=None, end=None):
+        """
+        (article_no, 레코드)를 게시일, article_no 순으로 하나씩 반환.
+        year는 연도별 파일, start/end는 게시일 범위 (date 또는 'YYYY-MM-DD', 양 끝 포함)
+        """
+        query = "SELECT article_no, file, offset, length FROM notices WHERE 1 = 1"
+        params = []
+        if year is not None:
+            query += " AND file = ?"
+            params.append(f'notices_{year}.jsonl')
+        if start is not None:
+            query += " AND notice_date >= ?"
+            params.append(start.isoformat() if isinstance(start, date) else start)
+        if end is not None:
+            query += " AND notice_date <= ?"
+            params.append(end.isoformat() if isinstance(end, date) else end)
+        with self.lock:
+            rows = self.conn.execute(query + " ORDER BY notice_date, article_no", params).fetchall()
+        files = {}
+        try:
+            for article_no, name, offset, length in rows:
+                f = files.get(name)
+                if f is None:
+                    f = files[name] = open(os.path.join(self.notices_dir, name), 'rb')
+                f.seek(offset)
+                yield article_no, json.loads(f.read(length))
+        finally:
+            for f in files.values():
+                f.close()
+
+    def compact(self, year):
+        """연도별 파일을 색인이 가리키는 최신 레코드만 article_no 순으로 다시 써서 이전 줄과 읽을 수 없는 줄을 제거"""
+        name = f'notices_{year}.jsonl'
+        path = os.path.join(self.notices_dir, name)
+        temp_path = path + '.tmp'
+        with self.lock:
+            rows = self.conn.execute("SELECT article_no, offset, length FROM notices WHERE file = ? ORDER BY article_no",
+                                     (name,)).fetchall()
+            moved = []
+            with open(path, 'rb') as source, open(temp_path, 'wb') as target:
+                for article_no, offset, length in rows:
+                    source.seek(offset)
+                    moved.append((target.tell(), article_no))
+                    target.write(source.read(length) + b'\n')
+                size = target.tell()
+            removed = os.path.getsize(path) - size
+            os.replace(temp_path, path)
+            self.conn.executemany("UPDATE notices SET offset = ? WHERE article_no = ?", moved)
+            self.conn.execute("INSERT OR REPLACE INTO files (name, indexed_bytes) VALUES (?, ?)", (name, size))
+            self.conn.commit()
+        self.logger.info(f"Compacted {name}: {len(rows)} records, {removed} bytes removed")
+
+    def close(self):
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
@@ -0,0 +1,349 @@
+# archive.py
+
+import base64
+import glob
+import gzip
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from collections import namedtuple
+from datetime import datetime, timezone
+from http import HTTPStatus
+from bounded_queue import ByteBoundedQueue
+
+# 응답 본문은 디코딩된 상태로 저장하므로 전송 관련 헤더는 기록하지 않음
+SKIPPED_HEADERS = {'content-encoding', 'transfer-encoding', 'content-length'}
+REVISIT_PROFILE = 'http://netpreserve.org/warc/1.1/revisit/identical-payload-digest'
+NOT_MODIFIED_PROFILE = 'http://netpreserve.org/warc/1.1/revisit/server-not-modified'
+INDEX_FILE = 'index.sqlite3'
+
+_STOP = object()  # 쓰기 스레드 종료 표시
+
+# load()/iter_pages() 결과: headers는 (이름, 값) 목록
+ArchivedPage = namedtuple('ArchivedPage', ['url', 'status', 'headers', 'content', 'fetched_at'])
+
+def pending_size(item):
+    """쓰기 큐 항목의 크기 (응답 본문 바이트 수, 제어 항목은 0)"""
+    return len(item[3]) if isinstance(item, tuple) else 0
+
+def payload_digest(content):
+    """WARC-Payload-Digest 형식의 본문 해시 (sha1, base32)"""
+    return 'sha1:' + base64.b32encode(hashlib.sha1(content).digest()).decode('ascii')
+
+def warc_date(timestamp):
+    return datetime.fromtimestamp(timestamp, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+def http_block(status, headers, content=b''):
+    """WARC 레코드 본문으로 쓸 HTTP 응답 (상태 줄 + 헤더 + 본문)"""
+    try:
+        reason = HTTPStatus(status).phrase
+    except ValueError:
+        reason = ''
+    lines = [f"HTTP/1.1 {status} {reason}"]
+    lines += [f"{name}: {value}" for name, value in headers if name.lower() not in SKIPPED_HEADERS]
+    if content:
+        lines.append(f"Content-Length: {len(content)}")
+    return ('\r\n'.join(lines) + '\r\n\r\n').encode('utf-8', 'replace') + content
+
+def warc_record(warc_type, url, timestamp, block, digest, extra_headers=()):
+    headers = [
+        ('WARC-Type', warc_type),
+        ('WARC-Record-ID', f"<urn:uuid:{uuid.uuid4()}>"),
+        ('WARC-Date', warc_date(timestamp)),
+        ('WARC-Target-URI', url),
+        ('WARC-Payload-Digest', digest),
+        *extra_headers,
+        ('Content-Type', 'application/http;msgtype=response'),
+        ('Content-Length', str(len(block))),
+    ]
+    head = 'WARC/1.1\r\n' + ''.join(f"{name}: {value}\r\n" for name, value in headers) + '\r\n'
+    return head.encode('utf-8') + block + b'\r\n\r\n'
+
+def parse_record(data):
+    """gzip 멤버 하나를 풀어 (WARC 헤더 사전, HTTP 상태 코드, HTTP 헤더 목록, 본문) 반환"""
+    record = gzip.decompress(data)
+    head, _, rest = record.partition(b'\r\n\r\n')
+    warc_headers = dict(line.split(': ', 1) for line in head.decode('utf-8').split('\r\n')[1:])
+    block = rest[:int(warc_headers['Content-Length'])]
+    http_head, _, content = block.partition(b'\r\n\r\n')
+    http_lines = http_head.decode('utf-8', 'replace').split('\r\n')
+    status = int(http_lines[0].split(' ', 2)[1])
+    headers = [tuple(line.split(': ', 1)) for line in http_lines[1:] if ': ' in line]
+    return warc_headers, status, headers, content
+
+def open_index(archive_dir):
+    conn = sqlite3.connect(os.path.join(archive_dir, INDEX_FILE), check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    # payloads: 본문 해시별로 본문을 담은 첫 response 레코드의 위치
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS payloads ("
+        " digest TEXT PRIMARY KEY,"
+        " segment TEXT,"
+        " offset INTEGER,"
+        " length INTEGER)"
+    )
+    # urls: URL별 마지막 응답 레코드(response 또는 revisit)의 위치와 본문 해시
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS urls ("
+        " url TEXT PRIMARY KEY,"
+        " digest TEXT,"
+        " segment TEXT,"
+        " offset INTEGER,"
+        " length INTEGER,"
+        " status INTEGER,"
+        " content_type TEXT,"
+        " fetched_at REAL)"
+    )
+    # settings: 재파싱이 크롤링과 같은 규칙을 쓰도록 마지막 크롤링의 설정 (JSON 값)
+    conn.execute("CREATE TABLE IF NOT EXISTS settings (name TEXT PRIMARY KEY, value TEXT)")
+    conn.commit()
+    return conn
+
+
+class WarcArchive:
+    """
+    가져온 응답의 원본 바이트를 WARC 형식 세그먼트 파일(archive-00000.warc.gz, ...)에 보관합니다.
+    레코드마다 별도의 gzip 멤버로 압축하므로 오프셋만 알면 파일을 훑지 않고 한 레코드를 읽을 수 있습니다.
+    이미 보관한 본문(sha1 해시가 같은 본문)은 헤더만 담은 revisit 레코드로 기록합니다.
+    조건부 GET의 304 응답은 server-not-modified revisit 레코드로 기록하며, 캐시된 본문이 아직 보관되지 않았으면
+    캐시된 본문을 담은 200 response 레코드로 기록합니다.
+    위치는 index.sqlite3에 URL별/본문 해시별로 저장하며, 디스크 쓰기는 전용 쓰기 스레드에서 수행합니다.
+    쓰기 큐는 아직 기록하지 않은 본문의 총 크기가 max_pending_bytes를 넘으면 store()를 대기시키고,
+    block=False로 호출하면(asyncio 워커) 기다리지 않고 버린 뒤 dropped로 셉니다.
+    settings(시작 URL, 근접 중복 기준, 출력 압축 등)는 색인에 기록되어 재파싱의 기본값으로 사용됩니다.
+    """
+
+    def __init__(self, archive_dir, logger, segment_size=1024 * 1024 * 1024, compresslevel=6, commit_every=200,
+                 max_pending_bytes=64 * 1024 * 1024, settings=None):
+        self.archive_dir = archive_dir
+        self.logger = logger
+        self.segment_size = segment_size
+        self.compresslevel = compresslevel
+        self.commit_every = commit_every
+        os.makedirs(archive_dir, exist_ok=True)
+        self.conn = open_index(archive_dir)
+        if settings:
+            self.conn.executemany("INSERT OR REPLACE INTO settings (name, value) VALUES (?, ?)",
+                                  [(name, json.dumps(value)) for name, value in settings.items()])
+            self.conn.commit()
+        self.pending_writes = 0
+
+        # 마지막 세그먼트가 가득 차지 않았으면 이어서 기록
+        segments = sorted(glob.glob(os.path.join(archive_dir, 'archive-*.warc.gz')))
+        self.segment_no = int(re.search(r'archive-(\d+)', segments[-1]).group(1)) if segments else 0
+        self.segment = None
+        self.open_segment()
+
+        self.queue = ByteBoundedQueue(max_pending_bytes, item_size=pending_size)
+        self.writer_stopped = threading.Event()  # 쓰기 스레드가 끝나면 설정 (큐가 가득 차도 더 기다리지 않음)
+        # 쓰기 스레드 통계 (stats()로 조회)
+        self.responses = 0
+        self.revisits = 0
+        self.not_modified = 0
+        self.dropped = 0
+        self.raw_bytes = 0
+        self.stored_bytes = 0
+        self.stats_lock = threading.Lock()
+        self.closed = False
+        self.thread = threading.Thread(target=self.writer, name="ArchiveWriter", daemon=True)
+        self.thread.start()
+
+    def segment_name(self):
+        return f"archive-{self.segment_no:05d}.warc.gz"
+
+    def open_segment(self):
+        if self.segment:
+            self.segment.close()
+        self.segment = open(os.path.join(self.archive_dir, self.segment_name()), 'ab')
+        if self.segment.tell() >= self.segment_size:
+            self.segment.close()
+            self.segment_no += 1
+            self.segment = open(os.path.join(self.archive_dir, self.segment_name()), 'ab')
+            self.logger.info(f"새 아카이브 세그먼트: {self.segment_name()}")
+
+    def store(self, url, result, block=True):
+        """
+        FetchResult를 보관 큐에 넣음 (디스크 I/O를 기다리지 않음).
+        큐가 가득 차면 block이면 쓰기 스레드가 따라잡을 때까지 대기하고, 아니면 버림
+        """
+        if self.closed or self.writer_stopped.is_set():
+            return
+        item = (url, result.status, list(result.headers.items()), result.content, time.time(), result.not_modified)
+        if block:
+            self.queue.put(item, self.writer_stopped)
+        elif not self.queue.try_put(item):
+            with self.stats_lock:
+                self.dropped += 1
+            self.logger.warning(f"아카이브 쓰기 큐가 가득 차서 보관하지 않음: {url}")
+
+    def write(self, url, status, headers, content, fetched_at, not_modified=False):
+        digest = payload_digest(content)
+        original = self.conn.execute("SELECT segment, offset, length FROM payloads WHERE digest = ?", (digest,)).fetchone()
+        if not_modified and original:
+            # 304: 본문 없는 304 응답을 server-not-modified revisit으로 기록 (본문은 같은 해시의 response 레코드)
+            record = warc_record('revisit', url, fetched_at, http_block(status, headers), digest,
+                                 [('WARC-Profile', NOT_MODIFIED_PROFILE), ('WARC-Refers-To-Target-URI', url)])
+        elif original:
+            # 같은 본문이 이미 있으면 헤더만 기록 (revisit)
+            block = http_block(status, headers)
+            record = warc_record('revisit', url, fetched_at, block, digest,
+                                 [('WARC-Profile', REVISIT_PROFILE)])
+        else:
+            # 304인데 캐시된 본문이 아직 보관되지 않았으면 그 본문을 원래의 200 응답으로 기록
+            if not_modified:
+                status = 200
+            record = warc_record('response', url, fetched_at, http_block(status, headers, content), digest)
+        if not_modified:
+            # 색인의 상태 코드는 읽을 때 돌려주는 본문(원래의 200 응답)에 맞춤
+            status = 200
+        data = gzip.compress(record, self.compresslevel)
+        offset = self.segment.tell()
+        self.segment.write(data)
+        self.segment.flush()
+        segment = self.segment_name()
+        if not original:
+            self.conn.execute("INSERT OR REPLACE INTO payloads (digest, segment, offset, length) VALUES (?, ?, ?, ?)",
+                              (digest, segment, offset, len(data)))
+        content_type = next((value for name, value in headers if name.lower() == 'content-type'), '')
+        self.conn.execute(
+            "INSERT OR REPLACE INTO urls (url, digest, segment, offset, length, status, content_type, fetched_at)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (url, digest, segment, offset, len(data), status, content_type, fetched_at)
+        )
+        self.pending_writes += 1
+        if self.pending_writes >= self.commit_every:
+            self.commit()
+        with self.stats_lock:
+            if not_modified:
+                self.not_modified += 1
+            if original:
+                self.revisits += 1
+            else:
+                self.responses += 1
+            self.raw_bytes += len(content)
+            self.stored_bytes += len(data)
+        if self.segment.tell() >= self.segment_size:
+            self.open_segment()
+
+    def commit(self):
+        self.conn.commit()
+        self.pending_writes = 0
+
+    def writer(self):
+        try:
+            self.write_loop()
+        finally:
+            self.writer_stopped.set()
+
+    def write_loop(self):
+        while True:
+            item = self.queue.get(timeout=None)
+            if isinstance(item, tuple):
+                try:
+                    self.write(*item)
+                except Exception as e:
+                    self.logger.error(f"아카이브 저장 실패 ({item[0]}): {e}")
+            elif isinstance(item, threading.Event):
+                try:
+                    self.commit()
+                except Exception as e:
+                    self.logger.error(f"아카이브 색인 커밋 실패: {e}")
+                finally:
+                    item.set()
+            elif item is _STOP:
+                self.commit()
+                self.segment.close()
+                self.conn.close()
+                return
+
+    def flush(self, timeout=None):
+        """지금까지 넣은 응답을 기록하고 색인을 커밋할 때까지 대기"""
+        if self.closed or self.writer_stopped.is_set():
+            return True
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+
+    def stats(self):
+        with self.stats_lock:
+            return {
+                "pending": len(self.queue),
+                "pending_bytes": self.queue.nbytes,
+                "responses": self.responses,
+                "revisits": self.revisits,
+                "not_modified": self.not_modified,
+                "dropped": self.dropped,
+                "raw_bytes": self.raw_bytes,
+                "stored_bytes": self.stored_bytes,
+            }
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        self.queue.put(_STOP)
+        self.thread.join()
+
+
+class ArchiveReader:
+    """WarcArchive가 만든 아카이브를 색인으로 임의 접근하는 읽기 전용 객체 (프로세스마다 하나씩 생성)"""
+
+    def __init__(self, archive_dir):
+        self.archive_dir = archive_dir
+        if not os.path.exists(os.path.join(archive_dir, INDEX_FILE)):
+            raise FileNotFoundError(f"아카이브 색인이 없습니다: {os.path.join(archive_dir, INDEX_FILE)}")
+        self.conn = sqlite3.connect(f"file:{os.path.join(archive_dir, INDEX_FILE)}?mode=ro", uri=True)
+        self.files = {}
+
+    def read_record(self, segment, offset, length):
+        f = self.files.get(segment)
+        if f is None:
+            f = self.files[segment] = open(os.path.join(self.archive_dir, segment), 'rb')
+        f.seek(offset)
+        return parse_record(f.read(length))
+
+    def page(self, url, digest, segment, offset, length, status, fetched_at):
+        _, _, headers, content = self.read_record(segment, offset, length)
+        # revisit 레코드는 본문이 없으므로 같은 해시의 response 레코드에서 읽음
+        row = self.conn.execute("SELECT segment, offset, length FROM payloads WHERE digest = ?", (digest,)).fetchone()
+        if row and (row[0], row[1]) != (segment, offset):
+            content = self.read_record(*row)[3]
+        return ArchivedPage(url, status, headers, content, fetched_at)
+
+    def load(self, url):
+        """URL의 마지막 응답. 없으면 None"""
+        row = self.conn.execute(
+            "SELECT url, digest, segment, offset, length, status, fetched_at FROM urls WHERE url = ?", (url,)
+        ).fetchone()
+        return self.page(*row) if row else None
+
+    def urls(self):
+        """보관된 URL 목록 (세그먼트 위치 순, 순차 읽기에 유리)"""
+        return [row[0] for row in self.conn.execute("SELECT url FROM urls ORDER BY segment, offset")]
+
+    def iter_pages(self, urls=None):
+        for url in (self.urls() if urls is None else urls):
+            page = self.load(url)
+            if page is not None:
+                yield page
+
+    def __len__(self):
+        return self.conn.execute("SELECT COUNT(*) FROM urls").fetchone()[0]
+
+    def settings(self):
+        """아카이브를 만든 크롤링의 설정 (settings 기록 전에 만든 아카이브면 빈 사전)"""
+        try:
+            return {name: json.loads(value) for name, value in self.conn.execute("SELECT name, value FROM settings")}
+        except sqlite3.OperationalError:
+            return {}
+
+    def close(self):
+        for f in self.files.values():
+            f.close()
+        self.conn.close()
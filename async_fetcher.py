@@ -0,0 +1,112 @@
+# async_fetcher.py
+
+import asyncio
+import random
+import time
+import aiohttp
+from requests.structures import CaseInsensitiveDict
+from fetcher import Fetcher, FetchResult
+
+class AsyncFetcher(Fetcher):
+    """
+    Fetcher와 동일한 재시도/타임아웃/Content-Type 규칙을 asyncio 위에서 수행하는 Fetcher.
+    하나의 이벤트 루프에서 수백 개의 요청을 동시에 처리할 수 있습니다.
+    HttpCache의 SQLite 조회/기록과 zlib 압축은 이벤트 루프를 막지 않도록 기본 스레드 풀에서 실행합니다.
+    """
+
+    async def in_thread(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(None, func, *args)
+
+    def create_session(self, concurrency):
+        # 동시 연결 수를 concurrency로 제한하고, verify=False와 동일하게 인증서 검증을 끔
+        connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=concurrency, ssl=False)
+        return aiohttp.ClientSession(connector=connector)
+
+    async def fetch_page_content(self, session, url, **kwargs):
+        result = await self.fetch_page(session, url, **kwargs)
+        return result.content if result else None
+
+    async def fetch_page(self, session, url, retries=10, backoff_factor=2, max_backoff=100, initial_timeout=30, max_total_timeout=200):
+        headers = await self.in_thread(self.build_headers, url) if self.cache else self.build_headers(url)
+        attempt = 0
+        backoff = backoff_factor  # 초기 대기 시간 (초)
+        timeout = aiohttp.ClientTimeout(total=initial_timeout)  # 타임아웃 시간
+        total_time_spent = 0  # 총 소요 시간
+
+        while attempt < retries and total_time_spent < max_total_timeout:
+            start_time = time.time()
+            try:
+                async with session.get(url, headers=headers, allow_redirects=True, timeout=timeout) as response:
+                    if response.status == 200:
+                        content_type = response.headers.get('Content-Type', '').lower()
+                        if 'text/html' in content_type:
+                            content = await response.read()
+                        else:
+                            content = None
+                    else:
+                        content = None
+                    status_code = response.status
+                    response_headers = CaseInsensitiveDict(response.headers)
+                elapsed_time = time.time() - start_time
+                total_time_spent += elapsed_time
+                self.record_response(url, status_code, content)
+                if status_code == 200:
+                    if content is not None:
+                        if self.cache:
+                            await self.in_thread(self.cache.store, url, response_headers, content)
+                        if self.politeness_delay:
+                            await asyncio.sleep(random.uniform(*self.politeness_delay))  # 짧은 지연 시간 추가 (스레드를 점유하지 않음)
+                        return FetchResult(content, 200, response_headers, False)
+                    else:
+                        self.logger.warning(f"비HTML 컨텐츠 ({content_type}) for URL: {url}. 스킵합니다.")
+                        self.record_error(url, 'non_html')
+                        return None
+                elif status_code == 304:
+                    # 변경되지 않은 페이지: 캐시된 본문 재사용 (실패로 취급하지 않음)
+                    result = await self.in_thread(self.not_modified_result, url, response_headers) if self.cache else None
+                    if result:
+                        self.logger.debug(f"변경 없음 (304): {url}")
+                        return result
+                    # 캐시에 본문이 없으면 조건부 헤더 없이 다시 요청
+                    self.logger.warning(f"304 응답이지만 캐시된 본문이 없음: {url}. 전체 요청으로 재시도합니다.")
+                    headers.pop('If-None-Match', None)
+                    headers.pop('If-Modified-Since', None)
+                    attempt += 1
+                elif 500 <= status_code < 600:
+                    # 서버 오류 시 재시도
+                    attempt += 1
+                    self.logger.warning(f"서버 오류 {status_code} for URL: {url}. 재시도 중... (Attempt {attempt}/{retries})")
+                    if attempt >= retries:
+                        break
+                    await asyncio.sleep(backoff)
+                    backoff = min(backoff * 2, max_backoff)  # 지수 백오프 적용
+                else:
+                    # 클라이언트 오류: 로깅 후 재시도하지 않음 (재시도 끝에 포기한 gave_up과 구분하여 client_error로 기록)
+                    self.logger.error(f"클라이언트 오류 {status_code} for URL: {url}. 재시도하지 않음.")
+                    self.record_error(url, 'client_error')
+                    return None
+            except asyncio.TimeoutError as e:
+                # 타임아웃 예외 처리
+                attempt += 1
+                self.record_error(url, 'timeout')
+                elapsed_time = time.time() - start_time
+                total_time_spent += elapsed_time
+                self.logger.warning(f"타임아웃 발생 (Attempt {attempt}/{retries}): {url} - {e}")
+                if attempt >= retries or total_time_spent >= max_total_timeout:
+                    break
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, max_backoff)
+            except aiohttp.ClientError as e:
+                # 기타 예외 처리
+                attempt += 1
+                self.record_error(url, 'request_error')
+                elapsed_time = time.time() - start_time
+                total_time_spent += elapsed_time
+                self.logger.warning(f"URL 요청 실패 (Attempt {attempt}/{retries}): {url} - {e}")
+                if attempt >= retries or total_time_spent >= max_total_timeout:
+                    break
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, max_backoff)
+        self.record_error(url, 'gave_up')
+        self.logger.error(f"{retries}번의 시도 또는 최대 대기 시간 {max_total_timeout}초 후에도 가져오지 못함: {url}")
+        return None
@@ -0,0 +1,155 @@
+# bench_admission.py
+# 링크 수백 개가 있는 페이지의 링크 수용 처리량 측정.
+# 이전 is_excluded 구현(접두사 목록 순회 + parse_qs + 무제한 캐시)과 ExclusionMatcher의 판정이 같은지 확인하고,
+# 제외 판정만의 시간과 링크별(add_url_to_queue)/페이지별(admit_links) 수용의 링크/초를 출력합니다.
+#
+#   python -m benchmarks.bench_admission --pages 200 --links_per_page 300
+
+import argparse
+import json
+import logging
+import os
+import random
+import tempfile
+import time
+from urllib.parse import urlparse, parse_qs
+from exclusion import ExclusionMatcher, DEFAULT_EXCLUSIONS_FILE
+from utils import normalize_url, normalize_with_identifier
+
+HOSTS = ['www.yonsei.ac.kr', 'yicrc.yonsei.ac.kr', 'yicdorm.yonsei.ac.kr', 'library.yonsei.ac.kr', 'oia.yonsei.ac.kr', 'dorm.yonsei.ac.kr']
+PATHS = ['/sc/support/notice.jsp', '/sc/support/scholarship.jsp', '/sc/intro/pressrel.jsp', '/board.asp', '/news.asp',
+         '/wj/intro/index.jsp', '/en_sc/index.jsp', '/ocx/main.asp', '/sc/campus/yonseibean.jsp', '/sc/academic/calendar.jsp',
+         '/main/downloadfile.asp', '/intro/photo.asp', '/en', '/login', '/sc/support/lost_found.jsp', '/search/detail']
+
+class LegacyExclusion:
+    """변경 전 Crawler.is_excluded와 excluded_cache (참고 구현)"""
+
+    def __init__(self, config_file):
+        with open(config_file, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        self.excluded_urls = config['url_prefixes']
+        self.excluded_paths = config['path_prefixes']
+        self.excluded_cache = set()
+
+    def is_excluded(self, url):
+        parsed = urlparse(url)
+        for excluded_url in self.excluded_urls:
+            if url.startswith(excluded_url):
+                return True
+        for path in self.excluded_paths:
+            if parsed.path.startswith(path):
+                return True
+        query_params = parse_qs(parsed.query)
+        if 'mid' in query_params and query_params['mid'][0].startswith('n'):
+            return True
+        return False
+
+    def check(self, url):
+        if url in self.excluded_cache or self.is_excluded(url):
+            self.excluded_cache.add(url)
+            return True
+        return False
+
+def random_link(rng):
+    host = rng.choice(HOSTS)
+    path = rng.choice(PATHS)
+    kind = rng.random()
+    if kind < 0.4:
+        query = f"mode=view&article_no={rng.randrange(100000)}&board_no={rng.randrange(50)}"
+    elif kind < 0.6:
+        query = f"mid={rng.choice(['m05_02', 'm05_07', 'n01', 'n12_3', 'm02'])}&act=list&page={rng.randrange(30)}"
+    elif kind < 0.75:
+        query = f"act=view&bid={rng.randrange(10)}&idx={rng.randrange(5000)}"
+    else:
+        query = ''
+    return f"https://{host}{path}" + (f"?{query}" if query else '')
+
+def generate_links(page_no, links_per_page, menu_ratio=0.7):
+    """
+    연세대학교 사이트와 비슷한 링크 목록 (게시글, 목록 페이지, 제외 대상 게시판 섞음).
+    links_per_page * menu_ratio개는 모든 페이지에 공통인 메뉴 링크입니다.
+    """
+    menu_rng = random.Random(-1)
+    menu_size = int(links_per_page * menu_ratio)
+    menu = [random_link(menu_rng) for _ in range(menu_size)]
+    rng = random.Random(page_no)
+    return menu + [random_link(rng) for _ in range(links_per_page - menu_size)]
+
+def measure_admission(pages, batched):
+    """새 Crawler에 모든 페이지의 링크를 수용하는 데 걸린 시간과 큐에 추가된 URL 수"""
+    from crawler import Crawler
+    normalize_with_identifier.cache_clear()
+    logger = logging.getLogger('CrawlerLogger.bench')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        os.chdir(workdir)
+        try:
+            os.makedirs('crawler_state', exist_ok=True)
+            crawler = Crawler('https://www.yonsei.ac.kr/sc/index.jsp', 3, 1, 1, 60, ['bench'],
+                              'original.jsonl', os.path.join('crawler_state', 'state.json'), logger)
+            start = time.perf_counter()
+            for links in pages:
+                if batched:
+                    crawler.admit_links(links, 1)
+                else:
+                    for url in links:
+                        crawler.add_url_to_queue(url, 1)
+            return time.perf_counter() - start, len(crawler.fetch_queue)
+        finally:
+            os.chdir(cwd)
+
+def main():
+    parser = argparse.ArgumentParser(description='링크 수용 처리량 벤치마크')
+    parser.add_argument('--pages', type=int, default=200, help='페이지 수')
+    parser.add_argument('--links_per_page', type=int, default=300, help='페이지당 링크 수')
+    parser.add_argument('--menu_ratio', type=float, default=0.7, help='모든 페이지에 공통인 메뉴 링크의 비율')
+    args = parser.parse_args()
+
+    pages = [generate_links(page_no, args.links_per_page, args.menu_ratio) for page_no in range(args.pages)]
+    urls = [normalize_url(link) for links in pages for link in links]
+
+    # 1. 판정 결과 비교
+    legacy = LegacyExclusion(DEFAULT_EXCLUSIONS_FILE)
+    matcher = ExclusionMatcher.from_config()
+    mismatches = [url for url in set(urls) if legacy.is_excluded(url) != matcher.is_excluded(url)]
+
+    # 2. 제외 판정만의 시간 (캐시 포함, 처음부터)
+    legacy = LegacyExclusion(DEFAULT_EXCLUSIONS_FILE)
+    start = time.perf_counter()
+    excluded = sum(1 for url in urls if legacy.check(url))
+    legacy_seconds = time.perf_counter() - start
+
+    matcher = ExclusionMatcher.from_config()
+    start = time.perf_counter()
+    sum(1 for url in urls if matcher.is_excluded(url))
+    matcher_seconds = time.perf_counter() - start
+
+    # 3. 링크 수용 전체: 링크마다 add_url_to_queue vs 페이지마다 admit_links (임시 디렉터리에서 실행)
+    per_link_seconds, queued = measure_admission(pages, batched=False)
+    batched_seconds, batched_queued = measure_admission(pages, batched=True)
+    if batched_queued != queued:
+        print(f"큐에 추가된 URL 수 불일치: 링크별 {queued}개, 일괄 {batched_queued}개")
+        mismatches.append(None)
+
+    print(json.dumps({
+        'pages': args.pages,
+        'links': len(urls),
+        'excluded': excluded,
+        'mismatches': len(mismatches),
+        'legacy_exclusion_us_per_link': round(legacy_seconds / len(urls) * 1e6, 2),
+        'matcher_exclusion_us_per_link': round(matcher_seconds / len(urls) * 1e6, 2),
+        'matcher_cache_entries': len(matcher.cache),
+        'per_link_admission_links_per_sec': round(len(urls) / per_link_seconds),
+        'batched_admission_links_per_sec': round(len(urls) / batched_seconds),
+        'batched_admission_pages_per_sec': round(args.pages / batched_seconds, 1),
+        'queued': queued,
+    }, ensure_ascii=False))
+    if mismatches:
+        for url in mismatches[:10]:
+            print(f"불일치: {url}")
+        raise SystemExit(1)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+# bench_cluster.py
+# 로컬 사이트(benchmarks/yonsei_site.py)를 노드 수를 바꿔 가며 클러스터 모드(cluster.py)로 처음부터 끝까지 크롤링하여
+# 노드 수별 소요 시간, pages/sec, 노드 간 전달 링크 수와 노드별 페이지 분포를 JSON 한 줄씩 출력합니다.
+# 응답 지연이 크고 노드마다 Fetch 스레드가 적을수록 (가져오기가 병목일수록) 노드 수에 따라 처리량이 늘어납니다.
+# 로컬 사이트는 호스트가 하나이므로 식별자 해시 분할만 비교하며, --transport로 링크 전달 방식(폴더/프로세스 간 큐)을 바꿉니다.
+#
+#   python -m benchmarks.bench_cluster --nodes 1 2 3 --latency 0.2 --fetch_threads 1 --transport queue
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from benchmarks.bench_crawl import serve, git_revision
+from benchmarks.yonsei_site import YonseiSite
+from cluster import launch_local_cluster, read_json
+
+def count_lines(path):
+    if not os.path.exists(path):
+        return 0
+    with open(path, 'r', encoding='utf-8') as f:
+        return sum(1 for _ in f)
+
+def run_cluster(args, base_url, nodes):
+    logger = logging.getLogger('CrawlerLogger.bench_cluster')
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    options = {
+        "start_url": f"{base_url}/sc/index.jsp", "max_depth": None, "fetch_threads": args.fetch_threads,
+        "parse_threads": args.parse_threads, "save_interval": args.save_interval, "user_agents": ['bench'],
+        "host_rate": args.host_rate, "host_burst": args.host_burst, "idle_timeout": args.idle_timeout,
+        "profile_control_file": None,
+    }
+    with tempfile.TemporaryDirectory() as cluster_dir:
+        start = time.perf_counter()
+        ok = launch_local_cluster(nodes, cluster_dir, options, logger, console=False, transport=args.transport)
+        elapsed = time.perf_counter() - start
+        per_node = []
+        forwarded = 0
+        for node_id in range(nodes):
+            node_dir = os.path.join(cluster_dir, f"node-{node_id}")
+            per_node.append(count_lines(os.path.join(node_dir, 'original_data', 'original_data.jsonl')))
+            status = read_json(os.path.join(node_dir, 'status.json')) or {}
+            forwarded += status.get('forwarded_links', 0)
+    return ok, elapsed, per_node, forwarded
+
+def main():
+    parser = argparse.ArgumentParser(description='노드 수별 클러스터 크롤링 벤치마크')
+    parser.add_argument('--nodes', type=int, nargs='+', default=[1, 2, 3], help='비교할 노드 수')
+    parser.add_argument('--articles_per_board', type=int, default=100, help='게시판(3개)마다의 게시글 수')
+    parser.add_argument('--static_pages', type=int, default=20, help='테이블이 있는 안내 페이지 수')
+    parser.add_argument('--nav_links', type=int, default=40, help='모든 페이지에 반복되는 메뉴 링크 수')
+    parser.add_argument('--latency', type=float, default=0.2, help='요청마다의 평균 응답 지연 (초)')
+    parser.add_argument('--error_rate', type=float, default=0.0, help='503으로 응답하는 요청 비율')
+    parser.add_argument('--fetch_threads', type=int, default=1, help='노드마다의 Fetch 스레드 수')
+    parser.add_argument('--parse_threads', type=int, default=1, help='노드마다의 파싱 스레드 수')
+    parser.add_argument('--host_rate', type=float, default=1000.0, help='전체 호스트별 초당 요청 수 (노드 수로 나눠 적용)')
+    parser.add_argument('--host_burst', type=int, default=100)
+    parser.add_argument('--save_interval', type=int, default=2, help='상태 저장 주기 (초)')
+    parser.add_argument('--idle_timeout', type=int, default=3)
+    parser.add_argument('--transport', type=str, default='spool', choices=['spool', 'queue'], help='노드 간 링크 전달 방식')
+    parser.add_argument('--output', type=str, default=None, help='결과를 추가할 JSONL 파일')
+    args = parser.parse_args()
+
+    site_options = {'articles_per_board': args.articles_per_board, 'static_pages': args.static_pages,
+                    'nav_links': args.nav_links}
+    context = multiprocessing.get_context('spawn')
+    conn, child_conn = context.Pipe()
+    stop_event = context.Event()
+    server = context.Process(target=serve, args=(site_options, args.latency, args.error_rate, child_conn, stop_event))
+    server.start()
+    base_url = conn.recv()
+
+    try:
+        for nodes in args.nodes:
+            ok, elapsed, per_node, forwarded = run_cluster(args, base_url, nodes)
+            saved = sum(per_node)
+            result = {
+                "benchmark": "bench_cluster",
+                "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+                "git": git_revision(),
+                "config": vars(args),
+                "nodes": nodes,
+                "ok": ok,
+                "pages_expected": YonseiSite(**site_options).page_count(),
+                "pages_saved": saved,
+                "saved_per_node": per_node,
+                "forwarded_links": forwarded,
+                "seconds": round(elapsed, 3),
+                "pages_per_sec": round(saved / elapsed, 2) if elapsed > 0 else 0.0,
+            }
+            line = json.dumps(result, ensure_ascii=False)
+            print(line, flush=True)
+            if args.output:
+                with open(args.output, 'a', encoding='utf-8') as f:
+                    f.write(line + '\n')
+    finally:
+        stop_event.set()
+        conn.recv()
+        server.join()
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,193 @@
+# bench_crawl.py
+# 실제 Crawler를 연세대학교 사이트와 비슷한 로컬 HTTPS 사이트(benchmarks/yonsei_site.py)에 처음부터 끝까지 실행하여
+# pages/sec, 단계별 지연 시간(p50/p99), 최대 RSS, 체크포인트(상태 저장) 비용을 JSON 한 줄로 출력합니다.
+# --output을 지정하면 같은 줄을 (실행 시각, git 커밋과 함께) JSONL 파일에 추가하므로 변경 전후를 추적할 수 있습니다.
+# 서버는 별도 프로세스에서 실행하므로 RSS는 크롤러만의 값입니다.
+#
+#   python -m benchmarks.bench_crawl --articles_per_board 300 --latency 0.05 --error_rate 0.01 --output bench_results.jsonl
+
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import resource
+import subprocess
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from benchmarks.yonsei_site import YonseiSite, YonseiSiteServer
+from frontier import UrlScorer
+
+def serve(site_options, latency, error_rate, conn, stop_event):
+    """서버 프로세스: 주소를 보내고 종료 신호를 기다린 뒤 응답 수를 돌려보냄"""
+    server = YonseiSiteServer(YonseiSite(**site_options), latency, error_rate).start()
+    conn.send(server.base_url)
+    stop_event.wait()
+    counts = dict(server.counts)
+    server.stop()
+    conn.send(counts)
+
+def percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class StageTimer:
+    """Crawler 객체의 메서드를 감싸 단계별 호출 시간을 모음"""
+
+    def __init__(self):
+        self.samples = defaultdict(list)
+        self.lock = threading.Lock()
+        self.last_page_done = None
+
+    def wrap(self, stage, func):
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                end = time.perf_counter()
+                with self.lock:
+                    self.samples[stage].append(end - start)
+                    if stage == 'parse':
+                        self.last_page_done = end
+        return timed
+
+    def instrument(self, crawler):
+        crawler.fetcher.fetch_page = self.wrap('fetch', crawler.fetcher.fetch_page)
+        crawler.process_page = self.wrap('parse', crawler.process_page)
+        crawler.parser.extract_and_merge_text = self.wrap('extract_text', crawler.parser.extract_and_merge_text)
+        crawler.parser.extract_tables = self.wrap('extract_tables', crawler.parser.extract_tables)
+        crawler.parser.extract_links = self.wrap('extract_links', crawler.parser.extract_links)
+        crawler.admit_links = self.wrap('admission', crawler.admit_links)
+        crawler.saver.save_original_data = self.wrap('save', crawler.saver.save_original_data)
+        crawler.state_manager.save_state = self.wrap('checkpoint', crawler.state_manager.save_state)
+
+    def report(self):
+        stages = {}
+        for stage, values in self.samples.items():
+            values = sorted(values)
+            stages[stage] = {
+                "count": len(values),
+                "p50_ms": round(percentile(values, 0.5) * 1000, 3),
+                "p99_ms": round(percentile(values, 0.99) * 1000, 3),
+                "max_ms": round(values[-1] * 1000, 3),
+                "total_s": round(sum(values), 3),
+            }
+        return stages
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout.strip() or None
+    except OSError:
+        return None
+
+def run_crawl(args, base_url, timer):
+    from crawler import Crawler
+    logger = logging.getLogger('CrawlerLogger.bench_crawl')
+    logger.setLevel(logging.INFO)  # 실제 실행과 같은 양의 로그 레코드를 만들되 출력하지 않음
+    logger.addHandler(logging.NullHandler())
+    logger.propagate = False
+    os.makedirs('crawler_state', exist_ok=True)
+    state_file = os.path.join('crawler_state', 'crawler_state.json')
+    crawler = Crawler(f"{base_url}/sc/index.jsp", None, args.fetch_threads, args.parse_threads, args.save_interval,
+                      ['bench'], 'original_data.jsonl', state_file, logger,
+                      host_rate=args.host_rate, host_burst=args.host_burst, parse_mode=args.parse_mode,
+                      membership=args.membership, idle_timeout=args.idle_timeout,
+                      frontier=args.frontier, max_runtime=args.max_runtime)
+    timer.instrument(crawler)
+    start = time.perf_counter()
+    crawler.run()
+    end = timer.last_page_done or time.perf_counter()
+    state_bytes = sum(os.path.getsize(os.path.join('crawler_state', name)) for name in os.listdir('crawler_state')
+                      if name.startswith('crawler_state.json'))
+    # 저장된 페이지의 URL 유형별 수 (시간 제한 실행에서 우선순위 효과 비교용)
+    scorer = crawler.frontier_scorer or UrlScorer.from_config()
+    saved_by_class = defaultdict(int)
+    with open('original_data.jsonl', encoding='utf-8') as f:
+        for line in f:
+            saved_by_class[scorer.classify(json.loads(line)['url'])[0]] += 1
+    metrics = crawler.metrics.snapshot()
+    metrics['saved_by_class'] = dict(saved_by_class)
+    return end - start, sum(saved_by_class.values()), len(crawler.parsed_set), state_bytes, metrics
+
+def main():
+    parser = argparse.ArgumentParser(description='로컬 사이트 전체 크롤링 벤치마크')
+    parser.add_argument('--articles_per_board', type=int, default=300, help='게시판(3개)마다의 게시글 수')
+    parser.add_argument('--static_pages', type=int, default=60, help='테이블이 있는 안내 페이지 수 (절반은 EUC-KR)')
+    parser.add_argument('--nav_links', type=int, default=150, help='모든 페이지에 반복되는 메뉴 링크 수')
+    parser.add_argument('--latency', type=float, default=0.05, help='요청마다의 평균 응답 지연 (초)')
+    parser.add_argument('--error_rate', type=float, default=0.01, help='503으로 응답하는 요청 비율 (Fetcher가 2초 뒤 재시도)')
+    parser.add_argument('--fetch_threads', type=int, default=4)
+    parser.add_argument('--parse_threads', type=int, default=2)
+    parser.add_argument('--parse_mode', type=str, default='thread', choices=['thread', 'process'])
+    parser.add_argument('--membership', type=str, default='exact', choices=['exact', 'compact', 'bloom'])
+    parser.add_argument('--host_rate', type=float, default=1000.0, help='호스트별 초당 요청 수 (로컬 서버이므로 기본값은 사실상 무제한)')
+    parser.add_argument('--host_burst', type=int, default=100)
+    parser.add_argument('--save_interval', type=int, default=2, help='상태 저장 주기 (초)')
+    parser.add_argument('--idle_timeout', type=int, default=3, help='큐가 비어 있으면 종료할 때까지의 시간 (초)')
+    parser.add_argument('--frontier', type=str, default='priority', choices=['priority', 'fifo'])
+    parser.add_argument('--max_runtime', type=int, default=None, help='크롤링 시간 제한 (초). 제한 안에 수집한 유형별 페이지 수를 비교할 때 사용')
+    parser.add_argument('--output', type=str, default=None, help='결과를 추가할 JSONL 파일')
+    args = parser.parse_args()
+
+    site_options = {'articles_per_board': args.articles_per_board, 'static_pages': args.static_pages,
+                    'nav_links': args.nav_links}
+    context = multiprocessing.get_context('spawn')
+    conn, child_conn = context.Pipe()
+    stop_event = context.Event()
+    server = context.Process(target=serve, args=(site_options, args.latency, args.error_rate, child_conn, stop_event))
+    server.start()
+    base_url = conn.recv()
+
+    timer = StageTimer()
+    cwd = os.getcwd()
+    try:
+        with tempfile.TemporaryDirectory() as workdir:
+            os.chdir(workdir)
+            try:
+                elapsed, saved, parsed, state_bytes, metrics = run_crawl(args, base_url, timer)
+            finally:
+                os.chdir(cwd)
+    finally:
+        stop_event.set()
+        counts = conn.recv()
+        server.join()
+
+    stages = timer.report()
+    checkpoint = stages.get('checkpoint', {})
+    result = {
+        "benchmark": "bench_crawl",
+        "timestamp": time.strftime('%Y-%m-%dT%H:%M:%S'),
+        "git": git_revision(),
+        "config": vars(args),
+        "pages_expected": YonseiSite(**site_options).page_count(),
+        "pages_parsed": parsed,
+        "pages_saved": saved,
+        "saved_by_class": metrics['saved_by_class'],
+        "server": counts,
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(parsed / elapsed, 2) if elapsed > 0 else 0.0,
+        "peak_rss_mb": round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1),
+        "checkpoint": {
+            "count": checkpoint.get('count', 0),
+            "p50_ms": checkpoint.get('p50_ms', 0.0),
+            "max_ms": checkpoint.get('max_ms', 0.0),
+            "state_bytes": state_bytes,
+        },
+        "stages": stages,
+        # 크롤러 지표의 페이지/링크 처리 결과와 응답 코드별 수
+        "counters": metrics["counters"],
+    }
+    line = json.dumps(result, ensure_ascii=False)
+    print(line)
+    if args.output:
+        with open(args.output, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+if __name__ == '__main__':
+    main()
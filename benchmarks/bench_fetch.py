@@ -0,0 +1,95 @@
+# bench_fetch.py
+# 스레드 Fetch 엔진과 async Fetch 엔진의 처리량(pages/sec)을 로컬 서버에서 비교합니다.
+#
+#   python -m benchmarks.bench_fetch --pages 500 --latency 0.2 --fetch_threads 3 --async_concurrency 200
+
+import argparse
+import asyncio
+import json
+import logging
+import threading
+import time
+from collections import deque
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from fetcher import Fetcher
+from benchmarks.local_server import LocalSiteServer
+
+def bench_threaded(urls, fetch_threads, logger):
+    fetcher = Fetcher(logger=logger)
+    queue = deque(urls)
+    lock = threading.Lock()
+    fetched = [0]
+
+    def worker():
+        with requests.Session() as session:
+            adapter = HTTPAdapter(max_retries=Retry(total=0), pool_maxsize=fetch_threads)
+            session.mount("http://", adapter)
+            while True:
+                with lock:
+                    if not queue:
+                        return
+                    url = queue.popleft()
+                if fetcher.fetch_page_content(session, url):
+                    with lock:
+                        fetched[0] += 1
+
+    start = time.time()
+    threads = [threading.Thread(target=worker) for _ in range(fetch_threads)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return fetched[0], time.time() - start
+
+def bench_async(urls, concurrency, logger):
+    from async_fetcher import AsyncFetcher
+    fetcher = AsyncFetcher(logger=logger)
+    queue = deque(urls)
+    fetched = [0]
+
+    async def worker(session):
+        while queue:
+            url = queue.popleft()
+            if await fetcher.fetch_page_content(session, url):
+                fetched[0] += 1
+
+    async def run():
+        async with fetcher.create_session(concurrency) as session:
+            await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+
+    start = time.time()
+    asyncio.run(run())
+    return fetched[0], time.time() - start
+
+def main():
+    parser = argparse.ArgumentParser(description="Fetch 엔진 벤치마크")
+    parser.add_argument('--pages', type=int, default=500, help='가져올 페이지 수')
+    parser.add_argument('--latency', type=float, default=0.2, help='로컬 서버의 응답 지연 (초)')
+    parser.add_argument('--fetch_threads', type=int, default=3, help='스레드 모드의 Fetch 스레드 수')
+    parser.add_argument('--async_concurrency', type=int, default=200, help='async 모드의 동시 요청 수')
+    args = parser.parse_args()
+
+    logger = logging.getLogger('BenchmarkLogger')
+    logger.addHandler(logging.NullHandler())
+
+    server = LocalSiteServer(total_pages=args.pages, latency=args.latency).start()
+    try:
+        urls = [f"{server.base_url}/page/{i}" for i in range(args.pages)]
+        results = {}
+        for mode, run in (('thread', lambda: bench_threaded(urls, args.fetch_threads, logger)),
+                          ('async', lambda: bench_async(urls, args.async_concurrency, logger))):
+            fetched, elapsed = run()
+            results[mode] = {
+                "pages": fetched,
+                "seconds": round(elapsed, 3),
+                "pages_per_sec": round(fetched / elapsed, 2) if elapsed else 0.0,
+            }
+        results["config"] = vars(args)
+        print(json.dumps(results, ensure_ascii=False, indent=2))
+    finally:
+        server.stop()
+
+if __name__ == "__main__":
+    main()
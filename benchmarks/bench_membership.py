@@ -0,0 +1,82 @@
+# bench_membership.py
+# 방문 집합 방식(exact / compact / bloom)별 URL당 메모리와 상태 파일 크기 측정.
+# 측정마다 별도 프로세스를 띄워 RSS 증가량을 재므로 다른 측정의 메모리가 섞이지 않습니다.
+#
+#   python -m benchmarks.bench_membership --sizes 1000000 10000000
+
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from membership import make_membership_set
+
+BOARDS = ['notice', 'scholarship', 'event', 'news', 'dorm', 'library', 'academic', 'career']
+
+def generate_urls(count, offset=0):
+    """연세대학교 게시판 URL과 비슷한 길이/형태의 URL 생성"""
+    for i in range(offset, offset + count):
+        board = BOARDS[i % len(BOARDS)]
+        yield f"https://www.yonsei.ac.kr/sc/support/{board}.jsp?mode=view&article_no={i}&board_no={i % 97}&pager.offset={(i // 10) % 500 * 10}"
+
+def rss_bytes():
+    with open('/proc/self/statm') as f:
+        return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+def state_bytes(mode, container, count):
+    if mode == 'exact':
+        # StateManager 스냅샷의 JSON 문자열 목록 크기
+        return sum(len(json.dumps(item)) + 2 for item in container)
+    return len(container.to_bytes())
+
+def measure(mode, count, error_rate, result_queue):
+    base = rss_bytes()
+    container = make_membership_set(mode, error_rate)
+    start = time.perf_counter()
+    for url in generate_urls(count):
+        container.add(url)
+    insert_seconds = time.perf_counter() - start
+    # 크롤러는 save_interval마다 저널 기록으로 추가 목록을 비우므로 그 이후의 메모리를 측정
+    container.drain_added()
+    memory = rss_bytes() - base
+
+    probes = 100000
+    start = time.perf_counter()
+    hits = sum(1 for url in generate_urls(probes) if url in container)
+    lookup_seconds = time.perf_counter() - start
+    false_positives = sum(1 for url in generate_urls(probes, offset=count) if url in container)
+
+    result_queue.put({
+        'mode': mode,
+        'entries': count,
+        'stored': len(container),
+        'memory_bytes_per_url': round(memory / count, 1),
+        'state_bytes_per_url': round(state_bytes(mode, container, count) / count, 1),
+        'insert_us': round(insert_seconds / count * 1e6, 2),
+        'lookup_us': round(lookup_seconds / probes * 1e6, 2),
+        'hit_rate': hits / probes,
+        'false_positive_rate': false_positives / probes,
+    })
+
+def main():
+    parser = argparse.ArgumentParser(description='방문 집합 방식별 URL당 메모리 측정')
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000000, 10000000], help='측정할 원소 수')
+    parser.add_argument('--modes', type=str, nargs='+', default=['exact', 'compact', 'bloom'], help='측정할 방식')
+    parser.add_argument('--bloom_error_rate', type=float, default=0.001, help='bloom 모드의 목표 오탐률')
+    args = parser.parse_args()
+
+    context = multiprocessing.get_context('fork')
+    results = []
+    for count in args.sizes:
+        for mode in args.modes:
+            result_queue = context.Queue()
+            process = context.Process(target=measure, args=(mode, count, args.bloom_error_rate, result_queue))
+            process.start()
+            result = result_queue.get()
+            process.join()
+            print(json.dumps(result, ensure_ascii=False), flush=True)
+            results.append(result)
+    return results
+
+if __name__ == '__main__':
+    main()
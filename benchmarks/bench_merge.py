@@ -0,0 +1,147 @@
+# bench_merge.py
+# trafilatura/boilerpy3 병합(Parser.sliding_window_search_optimized)의 회귀 검사와 마이크로 벤치마크.
+# 이전 KMP 구현(윈도우마다 실패 함수를 다시 만들고 boilerpy 문자열 전체를 재검색)과 결과가 같은지 확인하고,
+# notices/*.jsonl 페이지에서 두 구현의 시간을 비교합니다.
+#
+#   python -m benchmarks.bench_merge
+
+import argparse
+import glob
+import json
+import logging
+import os
+import random
+import time
+from parser import Parser
+
+REGRESSION_CORPUS = os.path.join(os.path.dirname(__file__), 'data', 'merge_regression.jsonl')
+
+def kmp_failure_function(pattern):
+    m = len(pattern)
+    pi = [0] * m
+    j = 0
+    for i in range(1, m):
+        while (j > 0 and pattern[i] != pattern[j]):
+            j = pi[j - 1]
+        if pattern[i] == pattern[j]:
+            j += 1
+            pi[i] = j
+    return pi
+
+def kmp_search(text, pattern):
+    n, m = len(text), len(pattern)
+    pi = kmp_failure_function(pattern)
+    j = 0
+    for i in range(n):
+        while (j > 0 and text[i] != pattern[j]):
+            j = pi[j - 1]
+        if text[i] == pattern[j]:
+            if j == m - 1:
+                return i - m + 1
+            j += 1
+    return -1
+
+def reference_merge(trafilatura_text, boilerpy_text, window_size=5):
+    """이전 구현 (기준 결과)"""
+    trafilatura_words = trafilatura_text.split()
+    boilerpy_words = boilerpy_text.split()
+    boilerpy_text_str = " ".join(boilerpy_words)
+    for i in range(len(trafilatura_words) - window_size + 1):
+        pattern = " ".join(trafilatura_words[i:i + window_size])
+        pattern_pos = kmp_search(boilerpy_text_str, pattern)
+        if pattern_pos != -1:
+            extra_text = boilerpy_text_str[:pattern_pos].strip()
+            trafilatura_words.insert(i, extra_text)
+            break
+    return " ".join(trafilatura_words)
+
+def load_notice_texts():
+    texts = []
+    decoder = json.JSONDecoder()
+    for path in sorted(glob.glob(os.path.join('notices', 'notices_*.jsonl'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                # 줄바꿈 없이 이어 붙은 레코드가 있으므로 한 줄에서 여러 객체를 읽음
+                line = line.strip()
+                pos = 0
+                while pos < len(line):
+                    record, pos = decoder.raw_decode(line, pos)
+                    text = record.get('merged_text', '')
+                    if len(text.split()) >= 10:
+                        texts.append(text)
+    return texts
+
+def build_pairs(texts, seed=0):
+    """
+    공지 본문으로 (trafilatura, boilerpy) 쌍을 만듦.
+    - head: boilerpy에만 있는 머리말 + 본문 (앞부분에서 바로 일치)
+    - late: trafilatura 앞부분에 boilerpy에 없는 문장이 길게 붙은 경우 (일치까지 많은 윈도우 검사)
+    - miss: 서로 다른 공지 (일치하는 윈도우 없음)
+    - partial: 단어 일부만 겹치는 경우 (단어 중간 일치)
+    """
+    rng = random.Random(seed)
+    pairs = []
+    for n, text in enumerate(texts):
+        words = text.split()
+        other = texts[(n + 1) % len(texts)]
+        header = "연세대학교 공지사항 홈 > 학사 > 공지 " * rng.randint(1, 5)
+        kind = n % 4
+        if kind == 0:
+            pairs.append(('head', text, header + text))
+        elif kind == 1:
+            noise = " ".join(rng.choice(other.split()) + str(k) for k in range(len(words) // 2))
+            pairs.append(('late', noise + " " + text, header + text))
+        elif kind == 2:
+            pairs.append(('miss', text, header + other))
+        else:
+            cut = words[:]
+            cut[0] = "접두" + cut[0]
+            pairs.append(('partial', text, header + " ".join(cut)))
+    return pairs
+
+def check_regression_corpus(parser):
+    failures = 0
+    with open(REGRESSION_CORPUS, 'r', encoding='utf-8') as f:
+        cases = [json.loads(line) for line in f if line.strip()]
+    for case in cases:
+        result = parser.sliding_window_search_optimized(case['trafilatura'], case['boilerpy'], case.get('window_size', 5))
+        if result != case['expected']:
+            failures += 1
+            print(f"회귀 실패: {case['name']}\n  기대값: {case['expected']!r}\n  결과값: {result!r}")
+    return len(cases), failures
+
+def main():
+    parser = argparse.ArgumentParser(description="텍스트 병합 회귀 검사 및 벤치마크")
+    parser.add_argument('--limit', type=int, default=None, help='사용할 공지 수 (기본값: 전체)')
+    parser.add_argument('--skip_reference', action='store_true', help='이전 구현 시간 측정 생략 (느림)')
+    args = parser.parse_args()
+
+    logger = logging.getLogger('BenchmarkLogger')
+    logger.addHandler(logging.NullHandler())
+    page_parser = Parser('yonsei.ac.kr', logger)
+
+    case_count, case_failures = check_regression_corpus(page_parser)
+
+    texts = load_notice_texts()[:args.limit]
+    pairs = build_pairs(texts)
+
+    results = {"regression_cases": case_count, "regression_failures": case_failures, "pages": len(pairs)}
+    start = time.perf_counter()
+    merged = [page_parser.sliding_window_search_optimized(t, b) for _, t, b in pairs]
+    results["indexed_seconds"] = round(time.perf_counter() - start, 3)
+
+    if not args.skip_reference:
+        start = time.perf_counter()
+        expected = [reference_merge(t, b) for _, t, b in pairs]
+        results["reference_seconds"] = round(time.perf_counter() - start, 3)
+        mismatches = [kind for (kind, _, _), a, b in zip(pairs, merged, expected) if a != b]
+        results["mismatches"] = len(mismatches)
+        if results["indexed_seconds"]:
+            results["speedup"] = round(results["reference_seconds"] / results["indexed_seconds"], 1)
+
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+    if case_failures or results.get("mismatches"):
+        raise SystemExit(1)
+
+if __name__ == "__main__":
+    main()
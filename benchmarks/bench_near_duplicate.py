@@ -0,0 +1,75 @@
+# bench_near_duplicate.py
+# MinHash LSH 근접 중복 검사의 유사도 기준별 검출률과 페이지당 검사 시간 측정.
+# notices/*.jsonl 공지 본문을 원본으로 쓰고, 게시일과 조회수만 바꾼 사본을 근접 중복으로 사용합니다.
+# originals_flagged는 서로 다른 공지 중 근접 중복으로 판정된 수입니다 (대부분 같은 공지의 재게시).
+#
+#   python -m benchmarks.bench_near_duplicate --thresholds 0.7 0.8 0.9
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import time
+from utils import normalize_text
+from near_duplicate import MinHashIndex
+from benchmarks.bench_merge import load_notice_texts
+
+DATE_RE = re.compile(r'date: \d{4}\.\d{2}\.\d{2}')
+
+def make_variant(text, rng):
+    """게시일과 조회수만 바뀐 사본 (같은 공지가 다른 URL로 다시 수집된 경우)"""
+    date = f"date: {rng.randint(2019, 2024)}.{rng.randint(1, 12):02d}.{rng.randint(1, 28):02d}"
+    text = DATE_RE.sub(date, text, count=1)
+    return f"{text} 조회수 {rng.randint(1, 99999)}"
+
+def run(threshold, originals, variants):
+    index = MinHashIndex(threshold)
+    seen = set()
+    false_flags = 0
+    detected = 0
+    checks = 0
+    start = time.perf_counter()
+    for kind, texts in (('original', originals), ('variant', variants)):
+        for text in texts:
+            normalized = normalize_text(text)
+            text_hash = hashlib.sha256(normalized.encode('utf-8')).hexdigest()
+            if text_hash in seen:
+                continue
+            checks += 1
+            signature = index.signature(normalized)
+            if signature is not None and index.find(signature) is not None:
+                if kind == 'original':
+                    false_flags += 1
+                else:
+                    detected += 1
+                continue
+            seen.add(text_hash)
+            if signature is not None:
+                index.add(signature)
+    elapsed = time.perf_counter() - start
+    return {
+        'threshold': threshold,
+        'bands': index.bands,
+        'rows': index.rows,
+        'originals': len(originals),
+        'originals_flagged': false_flags,
+        'variants_detected': round(detected / len(variants), 4),
+        'check_us': round(elapsed / checks * 1e6, 1),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description='MinHash LSH 근접 중복 검사 벤치마크')
+    parser.add_argument('--thresholds', type=float, nargs='+', default=[0.7, 0.8, 0.9], help='측정할 자카드 유사도 기준')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    # 정확히 같은 공지는 SHA-256 경로에서 걸러지므로 서로 다른 본문만 원본으로 사용
+    originals = list(dict.fromkeys(load_notice_texts()))
+    variants = [make_variant(text, rng) for text in originals]
+    for threshold in args.thresholds:
+        print(json.dumps(run(threshold, originals, variants), ensure_ascii=False), flush=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+# bench_parse.py
+# 페이지당 파싱 시간을 이전 방식(페이지를 최대 4번 파싱)과 PageDocument 방식(한 번 파싱)으로 비교합니다.
+#
+#   python -m benchmarks.bench_parse --pages 200
+
+import argparse
+import json
+import logging
+import time
+import chardet
+import trafilatura
+from bs4 import BeautifulSoup
+from boilerpy3 import extractors as boilerpy_extractors
+from parser import Parser
+from document import PageDocument
+from benchmarks.local_server import generate_page
+
+def legacy_parse_page(parser, content, url):
+    """PageDocument 도입 이전의 파싱 경로 (chardet 전체 검사 + html5lib + html.parser 2회)"""
+    encoding = chardet.detect(content)['encoding'] or 'utf-8'
+    text = content.decode(encoding, errors='replace')
+    trafilatura_content = parser.clean_text(trafilatura.extract(text))
+    cleaned_html = BeautifulSoup(text, 'html5lib').prettify()
+    boilerpy_content = parser.clean_text(boilerpy_extractors.ArticleExtractor().get_content(cleaned_html))
+    if boilerpy_content:
+        merged_text = parser.sliding_window_search_optimized(trafilatura_content, boilerpy_content)
+    else:
+        merged_text = trafilatura_content
+    soup = BeautifulSoup(content, 'html.parser')
+    images = parser.extract_image_links(soup, url)
+    files = parser.extract_file_links(soup, url)
+    tables = parser.extract_tables(soup, url)
+    # 이전 extract_links는 원본 바이트를 html.parser로 한 번 더 파싱함
+    link_document = PageDocument(content, url)
+    link_document._soup = BeautifulSoup(content, 'html.parser')
+    links = parser.extract_links(link_document, url)
+    return {"merged_text": merged_text, "images": images, "files": files, "tables": tables, "links": links}
+
+def measure(parse, pages):
+    timings = []
+    for url, content in pages:
+        start = time.perf_counter()
+        parse(content, url)
+        timings.append(time.perf_counter() - start)
+    timings.sort()
+    total = sum(timings)
+    return {
+        "pages": len(timings),
+        "mean_ms": round(total / len(timings) * 1000, 3),
+        "p50_ms": round(timings[len(timings) // 2] * 1000, 3),
+        "p99_ms": round(timings[min(len(timings) - 1, int(len(timings) * 0.99))] * 1000, 3),
+        "pages_per_sec": round(len(timings) / total, 2),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="페이지 파싱 벤치마크")
+    parser.add_argument('--pages', type=int, default=200, help='파싱할 페이지 수')
+    parser.add_argument('--links_per_page', type=int, default=300, help='페이지당 메뉴 링크 수')
+    parser.add_argument('--tables', type=int, default=3, help='페이지당 테이블 수')
+    args = parser.parse_args()
+
+    logger = logging.getLogger('BenchmarkLogger')
+    logger.addHandler(logging.NullHandler())
+    page_parser = Parser('yonsei.ac.kr', logger)
+
+    pages = [
+        (f"https://www.yonsei.ac.kr/page/{i}", generate_page(i, args.pages, args.links_per_page, args.tables))
+        for i in range(args.pages)
+    ]
+    results = {
+        "before": measure(lambda content, url: legacy_parse_page(page_parser, content, url), pages),
+        "after": measure(page_parser.parse_page, pages),
+        "config": vars(args),
+    }
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+if __name__ == "__main__":
+    main()
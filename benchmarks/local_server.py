@@ -0,0 +1,96 @@
+# local_server.py
+
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+def generate_table(rng, rows=6, cols=4):
+    """rowspan/colspan이 섞인 테이블 HTML 생성"""
+    html = ["<table>"]
+    for r in range(rows):
+        cells = []
+        for c in range(cols):
+            if r == 0 and c == 0:
+                cells.append('<th rowspan="2">구분</th>')
+            elif r == 1 and c == 0:
+                continue
+            elif r == 0 and c == 1:
+                cells.append('<th colspan="2">일정</th>')
+            elif r == 0 and c == 2:
+                continue
+            else:
+                cells.append(f"<td>항목 {r}-{c} {rng.randint(1, 999)}</td>")
+        html.append("<tr>" + "".join(cells) + "</tr>")
+    html.append("</table>")
+    return "".join(html)
+
+
+def generate_page(page_no, total_pages, links_per_page=20, tables=1):
+    """벤치마크용 HTML 페이지 생성 (같은 page_no는 항상 같은 내용)"""
+    rng = random.Random(page_no)
+    links = "\n".join(
+        f'<li><a href="/page/{rng.randrange(total_pages)}">링크 {i}</a></li>'
+        for i in range(links_per_page)
+    )
+    paragraphs = "\n".join(
+        f"<p>연세대학교 벤치마크 페이지 {page_no}의 본문 문단 {i}입니다. " + "내용 " * rng.randint(20, 60) + "</p>"
+        for i in range(rng.randint(3, 10))
+    )
+    return (
+        "<!DOCTYPE html><html><head><meta charset=\"utf-8\">"
+        f"<title>페이지 {page_no}</title></head><body>"
+        f"<ul class=\"menu\">{links}</ul>"
+        f"<div class=\"content\"><h1>페이지 {page_no}</h1>{paragraphs}"
+        + "".join(generate_table(rng) for _ in range(tables)) +
+        "</div>"
+        "</body></html>"
+    ).encode('utf-8')
+
+
+class LocalSiteHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency)
+        parts = self.path.strip('/').split('/')
+        if len(parts) != 2 or parts[0] != 'page' or not parts[1].isdigit():
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        body = generate_page(int(parts[1]), server.total_pages)
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # 요청 로그 출력 생략
+
+
+class LocalSiteServer(ThreadingHTTPServer):
+    """실제 사이트 대신 사용하는 로컬 HTTP 서버 (요청마다 latency초 지연)"""
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, total_pages=1000, latency=0.0, host='127.0.0.1', port=0):
+        super().__init__((host, port), LocalSiteHandler)
+        self.total_pages = total_pages
+        self.latency = latency
+        self.thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, name="LocalSiteServer", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,246 @@
+# yonsei_site.py
+# 연세대학교 사이트와 비슷한 구조의 합성 사이트를 HTTPS로 제공하는 로컬 서버.
+# - JSP 게시판(?mode=list&pager.offset=, ?mode=view&article_no=)과 ASP 게시판(?act=list&page=, ?act=view&idx=, EUC-KR)
+# - 모든 페이지에 반복되는 큰 메뉴(정적 페이지, 게시판, 최신 글, 제외 대상 링크)
+# - rowspan/colspan 테이블이 있는 안내 페이지 (UTF-8, 그리고 Content-Type에 charset 없이 <meta>로만 EUC-KR을 알리는 페이지)
+# - 요청마다 지연(latency)과 일정 비율의 503 응답
+# normalize_url이 스킴을 https로 통일하므로 임시 자체 서명 인증서로 TLS를 제공합니다 (openssl 필요).
+
+import os
+import random
+import shutil
+import ssl
+import subprocess
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+from benchmarks.local_server import generate_table
+
+WORDS = ('연세대학교 학생 장학금 신청 기간 안내 수강 신청 변경 학사 일정 기숙사 입사 모집 공고 등록금 납부 졸업 논문 '
+         '제출 심사 결과 발표 프로그램 참가자 선발 설명회 개최 국제 교류 교환학생 파견 지원 서류 접수 방법 문의 연락처 '
+         '도서관 이용 시간 변경 시설 점검 공사 전산 시스템 중단 예정 채용 조교 근로 장학생 면접 일정 합격자 명단 '
+         '특강 세미나 학술 대회 봉사 활동 동아리 축제 행사 취소 연기 코로나 방역 지침 수업 운영 비대면 대면 전환 '
+         '성적 확인 이의 신청 휴학 복학 절차 학생증 발급 주차 셔틀버스 운행 시간표 식당 메뉴 안전 교육 이수 필수').split()
+
+BOARDS = [
+    # (경로, 형식, 인코딩, 글 번호 시작값)
+    ('/sc/support/notice.jsp', 'jsp', 'utf-8', 100000),
+    ('/sc/support/academic.jsp', 'jsp', 'utf-8', 200000),
+    ('/dorm/board.asp', 'asp', 'euc-kr', 1),
+]
+EXCLUDED_LINKS = ['/en_sc/index.jsp', '/wj/index.jsp', '/ocx/main.jsp', '/cn_wj/index.jsp']
+PAGE_SIZE = 10
+
+def sentence(rng, words):
+    return ' '.join(rng.choice(WORDS) for _ in range(words))
+
+def make_certificate(directory):
+    """임시 자체 서명 인증서와 키 파일 경로"""
+    openssl = shutil.which('openssl')
+    if openssl is None:
+        raise RuntimeError("HTTPS 벤치마크 서버에는 openssl 명령이 필요합니다")
+    cert, key = os.path.join(directory, 'cert.pem'), os.path.join(directory, 'key.pem')
+    subprocess.run([openssl, 'req', '-x509', '-newkey', 'rsa:2048', '-nodes', '-subj', '/CN=127.0.0.1',
+                    '-days', '1', '-keyout', key, '-out', cert], check=True, capture_output=True)
+    return cert, key
+
+
+class YonseiSite:
+    """URL 경로와 쿼리로 페이지를 생성 (같은 URL은 항상 같은 내용). 없는 페이지는 None"""
+
+    def __init__(self, articles_per_board=300, static_pages=60, nav_links=150, tables=2):
+        self.articles_per_board = articles_per_board
+        self.static_pages = static_pages
+        self.nav_links = nav_links
+        self.tables = tables
+        self.nav = self.build_nav()
+
+    def static_paths(self):
+        # 절반은 UTF-8 JSP, 절반은 <meta>로만 인코딩을 알리는 EUC-KR ASP
+        return [f"/sc/intro/info{i}.jsp" if i % 2 == 0 else f"/dorm/guide{i}.asp" for i in range(self.static_pages)]
+
+    def list_url(self, board, page):
+        path, kind, _, _ = board
+        return f"{path}?mode=list&pager.offset={page * PAGE_SIZE}" if kind == 'jsp' else f"{path}?act=list&bid=1&page={page + 1}"
+
+    def view_url(self, board, article_no):
+        path, kind, _, _ = board
+        return f"{path}?mode=view&article_no={article_no}" if kind == 'jsp' else f"{path}?act=view&bid=1&idx={article_no}"
+
+    def build_nav(self):
+        """모든 페이지에 반복되는 메뉴 (정적 페이지, 게시판 첫 목록, 제외 대상, 최신 글로 nav_links개를 채움)"""
+        links = [(path, f"안내 {i}") for i, path in enumerate(self.static_paths())]
+        links += [(self.list_url(board, 0), f"게시판 {b}") for b, board in enumerate(BOARDS)]
+        links += [(path, "English") for path in EXCLUDED_LINKS]
+        recent = 0
+        while len(links) < self.nav_links and recent < self.articles_per_board:
+            for board in BOARDS:
+                links.append((self.view_url(board, board[3] + self.articles_per_board - 1 - recent), "최신 글"))
+            recent += 1
+        items = ''.join(f'<li><a href="{href}">{label}</a></li>' for href, label in links[:max(self.nav_links, 0)])
+        return f'<div id="gnb"><ul class="menu">{items}</ul></div>'
+
+    def html(self, title, body, charset):
+        return (f'<!DOCTYPE html><html><head><meta charset="{charset}"><title>{title}</title></head><body>'
+                f'{self.nav}<div class="content"><h1>{title}</h1>{body}</div>'
+                '<div class="footer">연세대학교 서울특별시 서대문구 연세로 50</div></body></html>')
+
+    def render(self, path, query):
+        """(본문 바이트, 인코딩, Content-Type에 charset을 넣을지 여부) 또는 None"""
+        if path in ('/', '/sc/index.jsp'):
+            return self.html('연세대학교', '<p>' + sentence(random.Random(0), 40) + '</p>', 'utf-8').encode('utf-8'), 'utf-8', True
+        for i, static_path in enumerate(self.static_paths()):
+            if path == static_path:
+                return self.render_static(i, path)
+        for board in BOARDS:
+            if path == board[0]:
+                return self.render_board(board, query)
+        return None
+
+    def render_static(self, i, path):
+        rng = random.Random(path)
+        body = ''.join(f'<p>{sentence(rng, rng.randint(30, 80))}</p>' for _ in range(rng.randint(2, 6)))
+        body += ''.join(generate_table(rng, rows=rng.randint(4, 10), cols=rng.randint(3, 6)) for _ in range(self.tables))
+        charset = 'utf-8' if path.endswith('.jsp') else 'euc-kr'
+        page = self.html(f'안내 페이지 {i}', body, charset)
+        return page.encode(charset, 'xmlcharrefreplace'), charset, charset == 'utf-8'
+
+    def render_board(self, board, query):
+        path, kind, charset, base = board
+        view = query.get('mode') == 'view' if kind == 'jsp' else query.get('act') == 'view'
+        if view:
+            article_no = int(query.get('article_no' if kind == 'jsp' else 'idx', -1))
+            if not base <= article_no < base + self.articles_per_board:
+                return None
+            body = self.render_article(board, article_no)
+            title = f'공지 {article_no}'
+        else:
+            if kind == 'jsp':
+                page = int(query.get('pager.offset', 0)) // PAGE_SIZE
+            else:
+                page = int(query.get('page', 1)) - 1
+            pages = (self.articles_per_board + PAGE_SIZE - 1) // PAGE_SIZE
+            if not 0 <= page < pages:
+                return None
+            body = self.render_list(board, page, pages)
+            title = f'게시판 목록 {page + 1}'
+        return self.html(title, body, charset).encode(charset, 'xmlcharrefreplace'), charset, True
+
+    def render_list(self, board, page, pages):
+        base, newest = board[3], board[3] + self.articles_per_board - 1
+        rows = []
+        for article_no in range(newest - page * PAGE_SIZE, max(newest - (page + 1) * PAGE_SIZE, base - 1), -1):
+            rng = random.Random(article_no)
+            rows.append(f'<tr><td>{article_no}</td><td><a href="{self.view_url(board, article_no)}">{sentence(rng, 6)}</a></td>'
+                        f'<td>2024.{rng.randint(1, 12):02d}.{rng.randint(1, 28):02d}</td><td>{rng.randint(1, 9999)}</td></tr>')
+        pager = ''.join(f'<a href="{self.list_url(board, p)}">{p + 1}</a>'
+                        for p in range(max(0, page - 5), min(pages, page + 6)))
+        return f'<table class="board"><tr><th>번호</th><th>제목</th><th>작성일</th><th>조회수</th></tr>{"".join(rows)}</table><div class="pager">{pager}</div>'
+
+    def render_article(self, board, article_no):
+        rng = random.Random(article_no)
+        body = f'<div class="date">date: 2024.{rng.randint(1, 12):02d}.{rng.randint(1, 28):02d}</div>'
+        body += ''.join(f'<p>{sentence(rng, rng.randint(20, 60))}</p>' for _ in range(rng.randint(2, 8)))
+        if rng.random() < 0.3:
+            body += generate_table(rng, rows=rng.randint(3, 8), cols=rng.randint(3, 5))
+        if rng.random() < 0.5:
+            body += f'<a href="/upload/{article_no}.pdf">첨부파일 {article_no}.pdf</a>'
+        if rng.random() < 0.3:
+            body += f'<img src="/upload/{article_no}.jpg" alt="사진">'
+        # 이전 글 / 다음 글
+        neighbours = [n for n in (article_no - 1, article_no + 1) if board[3] <= n < board[3] + self.articles_per_board]
+        body += ''.join(f'<a href="{self.view_url(board, n)}">이웃 글</a>' for n in neighbours)
+        body += f'<a href="{self.list_url(board, 0)}">목록</a>'
+        return body
+
+    def page_count(self):
+        """크롤러가 도달할 수 있는 HTML 페이지 수 (홈 + 정적 페이지 + 게시판 목록 + 게시글)"""
+        lists = (self.articles_per_board + PAGE_SIZE - 1) // PAGE_SIZE
+        return 1 + self.static_pages + len(BOARDS) * (lists + self.articles_per_board)
+
+
+class YonseiSiteHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        server = self.server
+        if server.latency:
+            time.sleep(server.latency * server.random_uniform(0.5, 1.5))
+        if server.random_uniform(0, 1) < server.error_rate:
+            server.count('errors')
+            self.send_error(503)
+            return
+        parsed = urlparse(self.path)
+        if parsed.path.startswith('/upload/'):
+            # 첨부파일/이미지: HTML이 아니므로 Fetcher가 받은 뒤 건너뜀
+            server.count('files')
+            body = b'%PDF-1.4 benchmark' if parsed.path.endswith('.pdf') else b'\xff\xd8\xff benchmark'
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/pdf' if parsed.path.endswith('.pdf') else 'image/jpeg')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        query = {k: v[0] for k, v in parse_qs(parsed.query).items()}
+        try:
+            page = server.site.render(parsed.path, query)
+        except ValueError:
+            page = None
+        if page is None:
+            server.count('not_found')
+            self.send_error(404)
+            return
+        body, charset, charset_header = page
+        server.count('pages')
+        self.send_response(200)
+        self.send_header('Content-Type', f'text/html; charset={charset}' if charset_header else 'text/html')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # 요청 로그 출력 생략
+
+
+class YonseiSiteServer(ThreadingHTTPServer):
+    """YonseiSite를 HTTPS로 제공하는 로컬 서버 (요청마다 latency초 전후의 지연, error_rate 비율로 503)"""
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, site, latency=0.0, error_rate=0.0, seed=0, host='127.0.0.1', port=0):
+        super().__init__((host, port), YonseiSiteHandler)
+        self.site = site
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.counts = {'pages': 0, 'files': 0, 'errors': 0, 'not_found': 0}
+        self.cert_dir = tempfile.mkdtemp()
+        context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+        context.load_cert_chain(*make_certificate(self.cert_dir))
+        # TLS 핸드셰이크는 요청 처리 스레드에서 수행 (accept 루프가 막히지 않도록)
+        self.socket = context.wrap_socket(self.socket, server_side=True, do_handshake_on_connect=False)
+        self.thread = None
+
+    def random_uniform(self, a, b):
+        with self.lock:
+            return self.rng.uniform(a, b)
+
+    def count(self, key):
+        with self.lock:
+            self.counts[key] += 1
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"https://{host}:{port}"
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, name="YonseiSiteServer", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        shutil.rmtree(self.cert_dir, ignore_errors=True)
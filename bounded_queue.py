@@ -0,0 +1,120 @@
+# bounded_queue.py
+
+import threading
+import time
+from collections import deque
+
+class ByteBoundedQueue:
+    """
+    Fetch 단계와 Parse 단계 사이의 대기열. 담긴 페이지 본문의 총 바이트 수로 크기를 제한합니다.
+    - put(): 한도를 넘으면 공간이 생길 때까지 대기 (파싱이 밀리면 Fetch 스레드가 멈춤)
+    - get(): 항목이 들어올 때까지 Condition으로 대기 (sleep 폴링 없음)
+    큐가 비어 있으면 한도보다 큰 페이지도 받아들이므로 큰 페이지 때문에 멈추지 않습니다.
+    항목은 (url, content, depth, meta) 튜플이며, tracker가 있으면 추가/제거를 상태 저널용으로 기록합니다.
+    다른 형식의 항목을 담을 때는 item_size로 항목의 바이트 수를 계산하는 함수를 지정합니다 (크기가 0인 항목은 기다리지 않음).
+    """
+
+    def __init__(self, max_bytes, items=(), tracker=None, item_size=None):
+        if item_size is not None:
+            self.item_size = item_size
+        self.max_bytes = max_bytes
+        self.items = deque()
+        self.nbytes = 0
+        self.tracker = None
+        self.lock = threading.Lock()
+        self.not_empty = threading.Condition(self.lock)
+        self.not_full = threading.Condition(self.lock)
+        # 단계별 크기 조정을 위한 누적 대기 시간 (초)과 횟수
+        self.put_wait_seconds = 0.0
+        self.put_waits = 0
+        self.get_wait_seconds = 0.0
+        self.max_depth = 0
+        with self.lock:
+            for item in items:
+                self._append_locked(item)
+        self.tracker = tracker
+
+    @staticmethod
+    def item_size(item):
+        return len(item[1])
+
+    def _append_locked(self, item):
+        self.items.append(item)
+        self.nbytes += self.item_size(item)
+        self.max_depth = max(self.max_depth, len(self.items))
+        if self.tracker:
+            self.tracker.push(item[0], item)
+        self.not_empty.notify()
+
+    def put(self, item, stop_event=None):
+        """공간이 생길 때까지 대기한 뒤 추가. stop_event가 설정되면 한도와 관계없이 추가 (종료 시 상태에 보존)"""
+        size = self.item_size(item)
+        with self.lock:
+            if size and self.items and self.nbytes + size > self.max_bytes:
+                start = time.monotonic()
+                self.put_waits += 1
+                while self.items and self.nbytes + size > self.max_bytes:
+                    if stop_event is not None and stop_event.is_set():
+                        break
+                    self.not_full.wait(0.5)
+                self.put_wait_seconds += time.monotonic() - start
+            self._append_locked(item)
+
+    def try_put(self, item):
+        """대기하지 않는 버전 (asyncio 워커용). 공간이 없으면 False"""
+        with self.lock:
+            if self.items and self.nbytes + self.item_size(item) > self.max_bytes:
+                return False
+            self._append_locked(item)
+            return True
+
+    def record_put_wait(self, seconds):
+        """try_put 재시도로 기다린 시간을 통계에 반영"""
+        with self.lock:
+            self.put_waits += 1
+            self.put_wait_seconds += seconds
+
+    def get(self, timeout):
+        """항목이 들어올 때까지 최대 timeout초 대기. 없으면 None"""
+        with self.lock:
+            if not self.items:
+                start = time.monotonic()
+                self.not_empty.wait_for(lambda: self.items, timeout)
+                self.get_wait_seconds += time.monotonic() - start
+                if not self.items:
+                    return None
+            item = self.items.popleft()
+            self.nbytes -= self.item_size(item)
+            if self.tracker:
+                self.tracker.pop(item[0])
+            self.not_full.notify_all()
+            return item
+
+    def stats(self):
+        with self.lock:
+            return {
+                "depth": len(self.items),
+                "max_depth": self.max_depth,
+                "bytes": self.nbytes,
+                "max_bytes": self.max_bytes,
+                "put_waits": self.put_waits,
+                "put_wait_seconds": round(self.put_wait_seconds, 3),
+                "get_wait_seconds": round(self.get_wait_seconds, 3),
+            }
+
+    def checkpoint_items(self):
+        """스냅샷용 항목 목록. 같은 Lock 안에서 tracker를 비우므로 목록과 이후 저널 사이에 빠지는 추가/제거가 없음"""
+        with self.lock:
+            if self.tracker:
+                self.tracker.drain()
+            return list(self.items)
+
+    def __iter__(self):
+        with self.lock:
+            return iter(list(self.items))
+
+    def __len__(self):
+        return len(self.items)
+
+    def __bool__(self):
+        return bool(self.items)
@@ -0,0 +1,515 @@
+# cluster.py
+
+import hashlib
+import json
+import logging
+import math
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import defaultdict
+
+STOP_FILE = 'STOP'
+DEFAULT_HOST_PARTITIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config', 'host_partitions.json')
+
+def stable_hash(key):
+    """프로세스/머신과 관계없이 같은 64비트 해시 (파이썬 hash()는 실행마다 달라짐)"""
+    return int.from_bytes(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest(), 'big')
+
+def write_json_atomic(path, data):
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False)
+    os.replace(temp_path, path)
+
+def read_json(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+class HashPartitioner:
+    """
+    고유 식별자(extract_unique_identifier와 같은 값)의 해시로 URL의 담당 노드를 정함.
+    같은 게시글의 다른 URL은 항상 같은 노드가 받으므로 방문/식별자 집합은 노드 안에서만 확인하면 됩니다.
+    한 호스트의 URL이 모든 노드에 나뉘므로 노드마다 호스트 요청 한도를 노드 수로 나눠 씁니다 (shares_hosts).
+    """
+    shares_hosts = True
+
+    def __init__(self, nodes):
+        self.nodes = nodes
+
+    def owner(self, normalized_url, unique_id, netloc):
+        return stable_hash(unique_id) % self.nodes
+
+
+class HostPartitioner:
+    """
+    netloc 단위로 URL의 담당 노드를 정함. 설정 파일의 호스트 그룹은 순서대로 노드 0, 1, ...에 배정하고 (노드 수로 나눈 나머지),
+    나열되지 않은 호스트는 netloc 해시로 배정합니다.
+    한 호스트는 한 노드만 요청하므로 노드마다 호스트 요청 한도를 그대로 씁니다.
+    고유 식별자에 netloc이 포함되므로 방문/식별자 집합도 노드 안에서만 확인하면 됩니다.
+    """
+    shares_hosts = False
+
+    def __init__(self, nodes, groups=()):
+        self.nodes = nodes
+        self.pinned = {}
+        for index, hosts in enumerate(groups):
+            for host in hosts:
+                self.pinned[host.lower()] = index % nodes
+
+    @classmethod
+    def from_config(cls, nodes, config_file=None):
+        """호스트 그룹 설정 파일(JSON, netloc은 정규화된 형태: 소문자, 'www.' 제외)에서 생성"""
+        with open(config_file or DEFAULT_HOST_PARTITIONS_FILE, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        return cls(nodes, config.get('groups', []))
+
+    def owner(self, normalized_url, unique_id, netloc):
+        node_id = self.pinned.get(netloc)
+        if node_id is None:
+            node_id = self.pinned[netloc] = stable_hash(netloc) % self.nodes
+        return node_id
+
+
+class SpoolTransport:
+    """
+    폴더 기반 링크 전달 (로컬 폴더 또는 여러 머신이 공유하는 파일 시스템).
+    배치마다 받는 노드의 inbox에 임시 이름으로 쓴 뒤 이름을 바꾸므로 받는 쪽은 완성된 파일만 봅니다.
+    받은 파일은 processed로 옮겼다가 링크가 상태 파일에 저장된 뒤(체크포인트) 지웁니다.
+    체크포인트 전에 중단되면 다음 실행에서 processed의 파일을 다시 받습니다 (수용 단계에서 중복 제거).
+    """
+    counted = False  # 보내고 받은 수가 아니라 inbox의 파일 수로 전달 중인 링크를 확인
+
+    def __init__(self, cluster_dir, node_id):
+        self.cluster_dir = cluster_dir
+        self.node_id = node_id
+        self.inbox = self.inbox_dir(node_id)
+        self.processed = os.path.join(cluster_dir, f"node-{node_id}", 'processed')
+        os.makedirs(self.inbox, exist_ok=True)
+        os.makedirs(self.processed, exist_ok=True)
+        self.seq = 0
+
+    def inbox_dir(self, node_id):
+        return os.path.join(self.cluster_dir, f"node-{node_id}", 'inbox')
+
+    def send(self, owner, entries):
+        self.seq += 1
+        inbox = self.inbox_dir(owner)
+        os.makedirs(inbox, exist_ok=True)
+        name = f"batch-{time.time_ns():020d}-{self.node_id}-{self.seq}.jsonl"
+        temp_path = os.path.join(inbox, '.' + name + '.tmp')
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            f.write(''.join(json.dumps(entry, ensure_ascii=False) + '\n' for entry in entries))
+        os.replace(temp_path, os.path.join(inbox, name))
+
+    def read(self, path):
+        entries = []
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    entries.append(json.loads(line))
+        return entries
+
+    def recover(self):
+        """이전 실행에서 받았지만 체크포인트 전에 중단된 배치 [(토큰, 항목 목록), ...]"""
+        return [(name, self.read(os.path.join(self.processed, name))) for name in sorted(os.listdir(self.processed))]
+
+    def receive(self):
+        """inbox에 도착한 배치 [(토큰, 항목 목록), ...]"""
+        batches = []
+        for name in sorted(os.listdir(self.inbox)):
+            if name.startswith('.'):
+                continue  # 쓰는 중인 파일
+            path = os.path.join(self.inbox, name)
+            processed_path = os.path.join(self.processed, name)
+            os.replace(path, processed_path)
+            batches.append((name, self.read(processed_path)))
+        return batches
+
+    def ack(self, tokens):
+        """체크포인트에 반영된 배치를 삭제"""
+        for name in tokens:
+            try:
+                os.remove(os.path.join(self.processed, name))
+            except FileNotFoundError:
+                pass
+
+    def pending(self):
+        return sum(1 for name in os.listdir(self.inbox) if not name.startswith('.'))
+
+
+class QueueTransport:
+    """
+    한 머신의 노드 프로세스 사이 링크 전달 (노드마다 multiprocessing.Queue 하나).
+    큐는 프로세스가 끝나면 사라지므로, 종료 시점에 전달 중이던 배치는 실행한 프로세스(launch_local_cluster)가
+    받는 노드의 inbox 폴더에 SpoolTransport 형식으로 기록하고, 다음 실행에서 체크포인트 후 삭제 방식으로 다시 수용합니다.
+    """
+    counted = True  # inbox 폴더가 없으므로 전체 노드의 보낸/받은 배치 수가 같아야 전달 완료
+
+    def __init__(self, queues, cluster_dir, node_id):
+        self.queues = queues
+        self.node_id = node_id
+        self.spool = SpoolTransport(cluster_dir, node_id)
+
+    def send(self, owner, entries):
+        self.queues[owner].put(entries)
+
+    def recover(self):
+        return self.spool.recover() + self.spool.receive()
+
+    def receive(self):
+        batches = []
+        while True:
+            try:
+                batches.append((None, self.queues[self.node_id].get_nowait()))
+            except queue.Empty:
+                return batches
+
+    def ack(self, tokens):
+        self.spool.ack([token for token in tokens if token is not None])
+
+    def pending(self):
+        return 0
+
+
+class ClusterNode:
+    """
+    여러 Crawler 프로세스(노드)가 URL 공간을 나눠 크롤링할 때 한 노드의 조정자.
+    - 수용 단계에서 다른 노드가 담당하는 링크는 노드별로 모았다가 batch_size개 또는 sync_interval초마다 전달
+    - 받은 링크는 이 노드의 수용 단계(admit_links)로 넣음
+    - 체크포인트: 저장 전에 보낼 링크를 모두 전달하고, 저장 후에 받은 배치를 삭제하므로
+      각 노드의 상태 파일과 전달 중인 링크가 항상 함께 복구됩니다.
+    - 종료: 노드마다 status_interval초마다 상태(유휴 여부, 작업 수, 보낸/받은 배치 수)를 기록하고,
+      노드 0이 모든 노드가 유휴이고 두 번 연속 새로 기록된 상태에서 작업 수가 변하지 않았으면 STOP 파일을 만듭니다.
+    """
+
+    def __init__(self, node_id, nodes, cluster_dir, logger, partitioner=None, transport=None,
+                 batch_size=500, sync_interval=0.5, status_interval=1.0):
+        self.node_id = node_id
+        self.nodes = nodes
+        self.cluster_dir = cluster_dir
+        self.logger = logger
+        self.partitioner = partitioner or HashPartitioner(nodes)
+        self.transport = transport or SpoolTransport(cluster_dir, node_id)
+        self.batch_size = batch_size
+        self.sync_interval = sync_interval
+        self.status_interval = status_interval
+        self.node_dir = os.path.join(cluster_dir, f"node-{node_id}")
+        os.makedirs(self.node_dir, exist_ok=True)
+        self.status_file = os.path.join(self.node_dir, 'status.json')
+        self.stop_file = os.path.join(cluster_dir, STOP_FILE)
+
+        self.outbox = defaultdict(list)  # 담당 노드 -> [[url, depth], ...]
+        self.outbox_lock = threading.Lock()
+        self.send_lock = threading.Lock()
+        self.received_tokens = []  # 수용했지만 아직 체크포인트에 반영되지 않은 배치
+        self.received_lock = threading.Lock()
+        self.sent_batches = 0
+        self.received_batches = 0
+        self.forwarded_links = 0
+        self.status_seq = 0
+        self.last_observation = None  # 노드 0의 직전 종료 확인 결과
+        self.started_at = time.time()
+        self.crawler = None
+        self.stop_event = threading.Event()
+        self.finished_event = threading.Event()
+        self.thread = None
+
+    def attach(self, crawler):
+        self.crawler = crawler
+        crawler.metrics.gauge('cluster_outbox_links', '다른 노드로 전달 대기 중인 링크 수', func=self.outbox_size)
+
+    def route(self, candidates, depth, netlocs):
+        """
+        {고유 식별자: 정규화된 URL} 중 다른 노드가 담당하는 링크를 전달 대기열에 넣고,
+        이 노드가 담당하는 항목만 남긴 dict를 반환 (netlocs: {고유 식별자: netloc})
+        """
+        local = {}
+        forwarded = defaultdict(list)
+        for unique_id, normalized_url in candidates.items():
+            owner = self.partitioner.owner(normalized_url, unique_id, netlocs[unique_id])
+            if owner == self.node_id:
+                local[unique_id] = normalized_url
+            else:
+                forwarded[owner].append([normalized_url, depth])
+        if forwarded:
+            full = []
+            with self.outbox_lock:
+                for owner, entries in forwarded.items():
+                    self.outbox[owner].extend(entries)
+                    self.forwarded_links += len(entries)
+                    if len(self.outbox[owner]) >= self.batch_size:
+                        full.append(owner)
+            for owner in full:
+                self.flush_owner(owner)
+        return local
+
+    def flush_owner(self, owner):
+        with self.send_lock:
+            with self.outbox_lock:
+                entries = self.outbox.pop(owner, None)
+            if not entries:
+                return
+            try:
+                self.transport.send(owner, entries)
+                self.sent_batches += 1
+            except OSError as e:
+                # 보내지 못한 링크는 다음 전달 때 다시 시도
+                self.logger.error(f"노드 {owner}에 링크 {len(entries)}개 전달 실패: {e}")
+                with self.outbox_lock:
+                    self.outbox[owner][:0] = entries
+
+    def flush(self):
+        with self.outbox_lock:
+            owners = list(self.outbox)
+        for owner in owners:
+            self.flush_owner(owner)
+
+    def outbox_size(self):
+        with self.outbox_lock:
+            return sum(len(entries) for entries in self.outbox.values())
+
+    def admit_batches(self, batches, count=True):
+        """받은 배치를 수용 단계로 넣음 (count=False: 이전 실행에서 남은 배치라 보낸 수에 포함되지 않음)"""
+        for token, entries in batches:
+            by_depth = defaultdict(list)
+            for url, depth in entries:
+                by_depth[depth].append(url)
+            for depth, urls in by_depth.items():
+                self.crawler.admit_links(urls, depth)
+            with self.received_lock:
+                self.received_tokens.append(token)
+                if count:
+                    self.received_batches += 1
+
+    def prepare_checkpoint(self):
+        """상태 저장 직전: 보낼 링크를 모두 전달하고, 이번 저장에 반영될 받은 배치 목록을 반환"""
+        self.flush()
+        with self.received_lock:
+            tokens, self.received_tokens = self.received_tokens, []
+        return tokens
+
+    def commit_checkpoint(self, tokens):
+        """상태 저장 직후: 저장에 반영된 받은 배치를 삭제"""
+        if tokens:
+            self.transport.ack(tokens)
+
+    def is_idle(self):
+        return self.crawler.is_idle() and self.outbox_size() == 0 and self.transport.pending() == 0
+
+    def activity(self):
+        return self.crawler.work_done + self.sent_batches + self.received_batches
+
+    def write_status(self):
+        self.status_seq += 1
+        write_json_atomic(self.status_file, {
+            "node": self.node_id,
+            "seq": self.status_seq,
+            "started_at": self.started_at,
+            "time": time.time(),
+            "idle": self.is_idle(),
+            "activity": self.activity(),
+            "sent": self.sent_batches,
+            "received": self.received_batches,
+            "forwarded_links": self.forwarded_links,
+            "fetch_queue": len(self.crawler.fetch_queue),
+            "parse_queue": len(self.crawler.parse_queue),
+        })
+
+    def read_statuses(self):
+        statuses = []
+        for node_id in range(self.nodes):
+            status = read_json(os.path.join(self.cluster_dir, f"node-{node_id}", 'status.json'))
+            # 이전 실행이 남긴 상태는 무시 (노드가 아직 시작하지 않음)
+            if status is None or status.get('time', 0) < self.started_at:
+                return None
+            statuses.append(status)
+        return statuses
+
+    def check_completion(self):
+        """노드 0에서 호출: 모든 노드가 끝났으면 STOP 파일을 만들고 True"""
+        statuses = self.read_statuses()
+        if statuses is None or not all(status['idle'] for status in statuses):
+            self.last_observation = None
+            return False
+        if self.transport.counted and sum(s['sent'] for s in statuses) != sum(s['received'] for s in statuses):
+            self.last_observation = None
+            return False  # 전달 중인 배치가 있음
+        observation = [(status['seq'], status['activity']) for status in statuses]
+        previous, self.last_observation = self.last_observation, observation
+        if previous is None:
+            return False
+        # 모든 노드가 직전 확인 이후 상태를 새로 기록했고, 그 사이 아무 작업도 없었어야 종료
+        for (old_seq, old_activity), (seq, activity) in zip(previous, observation):
+            if seq <= old_seq or activity != old_activity:
+                return False
+        write_json_atomic(self.stop_file, {"time": time.time(), "by": self.node_id})
+        self.logger.info(f"모든 노드({self.nodes}개)가 유휴 상태이고 전달 중인 링크가 없어 종료를 요청합니다.")
+        return True
+
+    def stop_requested(self):
+        try:
+            return os.path.getmtime(self.stop_file) >= self.started_at
+        except OSError:
+            return False
+
+    def start(self):
+        # 이전 실행에서 체크포인트 전에 중단된 배치를 다시 수용
+        recovered = self.transport.recover()
+        if recovered:
+            self.logger.info(f"이전 실행에서 받은 링크 배치 {len(recovered)}개를 다시 수용합니다.")
+            self.admit_batches(recovered, count=False)
+        self.thread = threading.Thread(target=self.run, name=f"Cluster-{self.node_id}", daemon=True)
+        self.thread.start()
+        return self
+
+    def run(self):
+        last_status = 0.0
+        while not self.stop_event.wait(self.sync_interval):
+            try:
+                self.flush()
+                self.admit_batches(self.transport.receive())
+                now = time.monotonic()
+                if now - last_status >= self.status_interval:
+                    last_status = now
+                    self.write_status()
+                    if self.node_id == 0:
+                        self.check_completion()
+                    if self.stop_requested():
+                        self.finished_event.set()
+            except Exception as e:
+                self.logger.error(f"클러스터 동기화 오류: {e}")
+
+    def stop(self):
+        """동기화 스레드를 멈추고 남은 링크를 전달 (최종 상태 저장 전에 호출, 반환값은 commit_checkpoint에 전달)"""
+        self.stop_event.set()
+        if self.thread:
+            self.thread.join()
+        tokens = self.prepare_checkpoint()
+        self.write_status()
+        return tokens
+
+
+def scaled_rate(rate, burst, nodes):
+    """한 호스트를 모든 노드가 나눠 가져올 때 노드별 요청 한도 (전체 합이 원래 한도를 넘지 않게)"""
+    return rate / nodes, max(1, math.ceil(burst / nodes))
+
+def node_logger(cluster_dir, node_id, console=True):
+    """노드 프로세스마다 별도 로그 파일 (여러 프로세스가 같은 RotatingFileHandler를 쓰지 않도록)"""
+    logger = logging.getLogger(f'CrawlerLogger.node{node_id}')
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    formatter = logging.Formatter(f'%(asctime)s [%(levelname)s] [node {node_id}] %(message)s')
+    file_handler = logging.FileHandler(os.path.join(cluster_dir, f"node-{node_id}", 'crawler.log'), encoding='utf-8')
+    file_handler.setFormatter(formatter)
+    logger.addHandler(file_handler)
+    if console:
+        console_handler = logging.StreamHandler()
+        console_handler.setFormatter(formatter)
+        logger.addHandler(console_handler)
+    return logger
+
+def make_partitioner(partition, nodes, host_partitions=None):
+    """'hash': 고유 식별자 해시, 'host': netloc 단위 (host_partitions 설정의 호스트 그룹 우선)"""
+    if partition == 'host':
+        return HostPartitioner.from_config(nodes, host_partitions)
+    return HashPartitioner(nodes)
+
+def run_cluster_node(node_id, nodes, cluster_dir, options, console=True, partition='hash', host_partitions=None, queues=None):
+    """
+    노드 하나를 실행 (로컬 다중 프로세스 실행 시 프로세스 진입점, 여러 머신에서는 머신마다 직접 호출).
+    options는 Crawler 생성자 인자이며, 출력/상태 파일 경로는 cluster_dir/node-<번호>/ 아래로 바꿉니다.
+    queues가 있으면 폴더 대신 프로세스 간 큐로 링크를 전달합니다 (같은 머신).
+    """
+    from crawler import Crawler
+    node_dir = os.path.join(cluster_dir, f"node-{node_id}")
+    os.makedirs(os.path.join(node_dir, 'original_data'), exist_ok=True)
+    logger = node_logger(cluster_dir, node_id, console)
+    options = dict(options)
+    transport = QueueTransport(queues, cluster_dir, node_id) if queues else SpoolTransport(cluster_dir, node_id)
+    cluster = ClusterNode(node_id, nodes, cluster_dir, logger, make_partitioner(partition, nodes, host_partitions), transport)
+    if cluster.partitioner.shares_hosts and nodes > 1:
+        options['host_rate'], options['host_burst'] = scaled_rate(options.get('host_rate', 2.0), options.get('host_burst', 2), nodes)
+        options['host_rules'] = [(pattern, *scaled_rate(rate, burst, nodes)) for pattern, rate, burst in options.get('host_rules') or []]
+    options['original_file'] = os.path.join(node_dir, 'original_data', 'original_data.jsonl')
+    options['state_file'] = os.path.join(node_dir, 'crawler_state.json')
+    options['profile_control_file'] = options.get('profile_control_file') and os.path.join(node_dir, 'profile.on')
+    for key in ('http_cache_file', 'trace_file', 'stats_file'):
+        if options.get(key):
+            options[key] = os.path.join(node_dir, os.path.basename(options[key]))
+    if options.get('archive_dir'):
+        options['archive_dir'] = os.path.join(node_dir, 'archive')
+    if options.get('metrics_port'):
+        options['metrics_port'] += node_id
+    crawler = Crawler(logger=logger, cluster=cluster, **options)
+    logger.info(f"노드 {node_id}/{nodes} 시작 (클러스터 폴더: {cluster_dir}, 분할: {partition})")
+    crawler.run()
+
+def drain(node_queue, timeout=0.0):
+    batches = []
+    while True:
+        try:
+            batches.append(node_queue.get(timeout=timeout) if timeout else node_queue.get_nowait())
+        except queue.Empty:
+            return batches
+
+def wait_for_nodes(processes, queues):
+    """
+    모든 노드 프로세스가 끝날 때까지 대기. 큐 전달 방식에서는 이미 끝난 노드의 큐를 대신 비워
+    그 노드로 보내던 프로세스가 종료 중에 막히지 않게 하고, 남은 배치를 {노드 번호: [배치, ...]}로 반환
+    """
+    leftovers = defaultdict(list)
+    while True:
+        try:
+            alive = False
+            for node_id, process in enumerate(processes):
+                process.join(timeout=0.1)
+                if process.is_alive():
+                    alive = True
+                elif queues:
+                    leftovers[node_id].extend(drain(queues[node_id]))
+            if not alive:
+                break
+        except KeyboardInterrupt:
+            # 자식 프로세스도 SIGINT를 받아 각자 상태를 저장하고 종료
+            continue
+    if queues:
+        for node_id, node_queue in enumerate(queues):
+            leftovers[node_id].extend(drain(node_queue, timeout=0.1))
+    return leftovers
+
+def launch_local_cluster(nodes, cluster_dir, options, logger, console=True, partition='hash', host_partitions=None, transport='spool'):
+    """
+    이 머신에서 노드 nodes개를 프로세스로 실행하고 모두 끝날 때까지 대기.
+    transport: 'spool'(노드 폴더의 inbox 파일) 또는 'queue'(프로세스 간 큐)
+    """
+    os.makedirs(cluster_dir, exist_ok=True)
+    # 이전 실행의 종료 요청 제거
+    if os.path.exists(os.path.join(cluster_dir, STOP_FILE)):
+        os.remove(os.path.join(cluster_dir, STOP_FILE))
+    context = multiprocessing.get_context('spawn')
+    queues = [context.Queue() for _ in range(nodes)] if transport == 'queue' else None
+    processes = [context.Process(target=run_cluster_node, name=f"CrawlerNode-{node_id}",
+                                 args=(node_id, nodes, cluster_dir, options, console, partition, host_partitions, queues))
+                 for node_id in range(nodes)]
+    for process in processes:
+        process.start()
+    logger.info(f"로컬 클러스터 시작: 노드 {nodes}개 ({partition} 분할, {transport} 전달), 출력: {cluster_dir}/node-*/original_data/")
+    leftovers = wait_for_nodes(processes, queues)
+    # 종료 시점에 큐에 남은 링크는 다음 실행에서 수용하도록 받는 노드의 inbox에 기록
+    for node_id, batches in leftovers.items():
+        if batches:
+            spool = SpoolTransport(cluster_dir, node_id)
+            for entries in batches:
+                spool.send(node_id, entries)
+            logger.info(f"노드 {node_id}로 전달 중이던 링크 배치 {len(batches)}개를 다음 실행을 위해 저장했습니다.")
+    failed = [process.name for process in processes if process.exitcode]
+    if failed:
+        logger.error(f"비정상 종료한 노드: {', '.join(failed)}")
+    return not failed
@@ -1,26 +1,48 @@
 import threading
 import time
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 import requests
 import os
 import json
-from collections import deque
+from collections import deque, Counter
 from urllib.parse import urlparse, urljoin, parse_qs
 from bs4 import BeautifulSoup
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 import hashlib
-import re
 from fetcher import Fetcher
-from parser import Parser
+from politeness import HostScheduler
+from parser import Parser, init_parse_process, parse_page_in_process
 from saver import Saver
-from state_manager import StateManager
+from archive import WarcArchive
+from metrics import MetricsRegistry, MetricsServer, StatsWriter
+from tracing import Tracer, activate, current_trace, span
+from profiling import ParseProfiler
+from frontier import UrlScorer
+from state_manager import StateManager, ChangeTracker, TrackedSet
+from bounded_queue import ByteBoundedQueue
+from exclusion import ExclusionMatcher
+from membership import make_membership_set
+from near_duplicate import MinHashIndex
+from http_cache import HttpCache
+from encoding import EncodingResolver
 import logging
 
-from utils import normalize_url, load_jsonl, extract_unique_identifier
+from utils import normalize_url, load_jsonl, normalize_with_identifier, normalize_text
 
 class Crawler:
     def __init__(self, start_url, max_depth, fetch_threads, parse_threads, save_interval, user_agents,
-                 original_file, state_file, logger):
+                 original_file, state_file, logger, fetch_mode='thread', async_concurrency=200,
+                 host_rate=2.0, host_burst=2, host_rules=None, http_cache_file=None, reparse_unchanged=False,
+                 parse_mode='thread', parse_processes=None, membership='exact', bloom_error_rate=0.001,
+                 near_duplicate_threshold=0.0, parse_queue_bytes=128 * 1024 * 1024,
+                 exclusion_config=None, output_batch_size=100, output_flush_interval=1.0, output_fsync='never',
+                 output_compression=None, output_queue_bytes=64 * 1024 * 1024, archive_dir=None, idle_timeout=120,
+                 metrics_port=None, stats_file=None, stats_interval=10, trace_file=None, trace_sample=1.0, trace_top=20,
+                 profile_control_file=os.path.join('crawler_state', 'profile.on'), profile_dir='profiles', profile_sample=0.1,
+                 frontier='priority', frontier_config=None, max_runtime=None, cluster=None):
         self.start_url = start_url
         self.max_depth = max_depth
         self.fetch_threads = fetch_threads
@@ -28,6 +50,46 @@ class Crawler:
         self.save_interval = save_interval
         self.user_agents = user_agents
         self.logger = logger
+        self.fetch_mode = fetch_mode  # 'thread' 또는 'async'
+        self.async_concurrency = async_concurrency  # async 모드에서 동시에 처리할 요청 수
+        self.host_rate = host_rate  # 호스트별 초당 요청 수 (기본값)
+        self.host_burst = host_burst  # 호스트별 연속 요청 허용 수 (기본값)
+        self.host_rules = host_rules  # [(netloc 패턴, rate, burst), ...]
+        self.reparse_unchanged = reparse_unchanged  # 304 응답 페이지도 다시 파싱할지 여부
+        self.parse_mode = parse_mode  # 'thread' 또는 'process'
+        self.parse_processes = parse_processes or os.cpu_count() or 1  # process 모드의 워커 프로세스 수
+        self.membership = membership  # 방문/파싱/식별자/본문 해시 집합 방식 ('exact', 'compact', 'bloom')
+        self.bloom_error_rate = bloom_error_rate  # bloom 모드의 목표 오탐률
+        self.near_duplicate_threshold = near_duplicate_threshold  # 근접 중복으로 볼 본문 자카드 유사도 (0이면 사용 안 함)
+        self.parse_queue_bytes = parse_queue_bytes  # Parse 큐에 쌓을 수 있는 원본 HTML의 최대 바이트 수
+        self.idle_timeout = idle_timeout  # 큐가 이 시간(초) 이상 비어 있으면 크롤링 종료
+        self.max_runtime = max_runtime  # 이 시간(초)이 지나면 큐가 남아 있어도 크롤링 종료 (없으면 제한 없음)
+        # 'priority': URL 유형/깊이/변경 비율 점수가 높은 URL부터, 'fifo': 발견한 순서대로 (너비 우선)
+        self.frontier = frontier
+        self.frontier_scorer = UrlScorer.from_config(frontier_config) if frontier == 'priority' else None
+        self.change_stats = self.frontier_scorer.change_stats if self.frontier_scorer else None
+        self.metrics_port = metrics_port  # 지표 HTTP 엔드포인트 포트 (없으면 사용 안 함)
+        self.stats_file = stats_file  # 지표 스냅샷을 stats_interval초마다 추가할 JSONL 파일 (없으면 사용 안 함)
+        self.stats_interval = stats_interval
+        # 여러 노드가 URL 공간을 나눠 크롤링할 때 이 노드의 ClusterNode (cluster.py, 없으면 단독 실행)
+        self.cluster = cluster
+
+        # 단계별 지연 시간, 큐 길이, 호스트별 상태 코드 등의 지표 (Fetcher, Parser, Saver와 공유)
+        self.metrics = MetricsRegistry()
+        self.stage_seconds = self.metrics.histogram('stage_seconds', '크롤링 단계별 소요 시간 (초)', ('stage',))
+        self.page_results = self.metrics.counter(
+            'pages_total', '파싱 단계 결과별 페이지 수 (saved, empty, duplicate, near_duplicate, not_modified, parse_error)', ('result',))
+        self.fetch_failures = self.metrics.counter('fetch_failures_total', '가져오지 못한 URL 수')
+        self.link_results = self.metrics.counter('links_total', '링크 수용 결과별 링크 수 (admitted, duplicate, excluded, forwarded)', ('result',))
+        self.metrics_server = None
+        self.stats_writer = None
+
+        # 페이지별 단계 추적 (sample 비율의 URL을 trace_file에 기록, 없으면 사용 안 함)
+        self.tracer = Tracer(trace_file, self.logger, sample_rate=trace_sample, top_n=trace_top) if trace_file else None
+        # 실행 중 profile_control_file을 만들면 파싱 단계를 cProfile로 표본 측정 (없으면 사용 안 함)
+        self.profile_options = None
+        if profile_control_file:
+            self.profile_options = {"control_file": profile_control_file, "output_dir": profile_dir, "sample_rate": profile_sample}
 
         # 시작 URL의 netloc을 추출하여 base_domain으로 설정
         parsed_start_url = urlparse(start_url)
@@ -37,167 +99,194 @@ class Crawler:
         self.fetch_queue = deque()
         self.fetch_queue_lock = threading.Lock()  # fetch_queue 접근을 위한 Lock
         self.parse_queue = deque()
-        self.parse_queue_lock = threading.Lock()  # parse_queue 접근을 위한 Lock
         self.visited = set()
-        self.visited_lock = threading.Lock()  # visited 접근을 위한 Lock
+        # 링크 수용 시 visited_identifiers와 visited를 함께 확인/기록하는 Lock (페이지당 한 번만 잡음)
+        self.admission_lock = threading.Lock()
+        self.visited_lock = self.admission_lock  # visited 접근을 위한 Lock
         self.parsed_set = set()
         self.parsed_set_lock = threading.Lock()  # parsed_set 접근을 위한 Lock
 
+        # 인코딩 판별 경로별 페이지 수 (header, meta, host_default, detected, fallback)
+        self.encoding_stats = Counter()
+        self.encoding_stats_lock = threading.Lock()
+
         # 중복된 merged_text를 추적하기 위한 집합과 락 추가
         self.seen_texts = set()
         self.seen_texts_lock = threading.Lock()
 
-        # 링크 파일 설정 
-        self.links_file = os.path.join('crawler_state', 'links.jsonl')
+        # 링크 파일 설정 (상태 파일과 같은 폴더)
+        self.links_file = os.path.join(os.path.dirname(state_file) or '.', 'links.jsonl')
         self.links_lock = threading.Lock()  # 파일 쓰기 동기화를 위한 락
 
-        # Fetcher 객체 초기화
-        self.fetcher = Fetcher(self.user_agents, self.logger)
+        # 조건부 GET 캐시 초기화 (재크롤링 시 변경되지 않은 페이지는 304로 처리)
+        self.http_cache = HttpCache(http_cache_file, self.logger) if http_cache_file else None
+
+        # 가져온 응답의 원본 바이트 보관소 (오프라인 재파싱용, 없으면 보관하지 않음)
+        self.archive = None
+        if archive_dir:
+            # 재파싱이 같은 base_domain, 중복 기준, 압축 방식을 쓰도록 크롤링 설정을 함께 기록
+            settings = {"start_url": start_url, "near_duplicate_threshold": near_duplicate_threshold,
+                        "output_compression": output_compression}
+            self.archive = WarcArchive(archive_dir, self.logger, settings=settings)
+
+        # Fetcher 객체 초기화 (요청 간 지연은 HostScheduler가 호스트별로 관리)
+        self.fetcher = Fetcher(self.user_agents, self.logger, politeness_delay=None, cache=self.http_cache, metrics=self.metrics)
+        if self.fetch_mode == 'async':
+            # aiohttp는 async 모드에서만 필요하므로 여기서 불러옴
+            from async_fetcher import AsyncFetcher
+            self.async_fetcher = AsyncFetcher(self.user_agents, self.logger, politeness_delay=None, cache=self.http_cache,
+                                              metrics=self.metrics)
 
         # Parser 객체 초기화
-        self.parser = Parser(self.base_domain, self.logger)
-
-        # Saver 객체 초기화
-        self.saver = Saver(original_file, self.logger)
+        self.parser = Parser(self.base_domain, self.logger, metrics=self.metrics)
+
+        # process 모드: 추출 작업은 프로세스 풀에서, 중복 제거와 큐 관리는 부모 프로세스에서 수행
+        self.parse_pool = None
+        if self.parse_mode == 'process':
+            self.parse_pool = ProcessPoolExecutor(
+                max_workers=self.parse_processes,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_parse_process,
+                initargs=(self.base_domain, self.profile_options)
+            )
+            # 파싱 스레드는 프로세스 풀에 작업을 넘기고 결과를 처리하는 역할만 하므로 프로세스 수 이상으로 유지
+            self.parse_threads = max(self.parse_threads, self.parse_processes)
+        # thread 모드에서는 파싱 스레드가, process 모드에서는 워커 프로세스가 각자 프로파일링
+        self.parse_profiler = None
+        if self.profile_options and not self.parse_pool:
+            self.parse_profiler = ParseProfiler(logger=self.logger, **self.profile_options)
+
+        # Saver 객체 초기화 (전용 쓰기 스레드가 batch 단위로 기록)
+        self.saver = Saver(original_file, self.logger, batch_size=output_batch_size,
+                           flush_interval=output_flush_interval, fsync=output_fsync,
+                           compression=output_compression, metrics=self.metrics,
+                           max_pending_bytes=output_queue_bytes)
 
         # StateManager 객체 초기화
-        self.state_manager = StateManager(state_file, self.logger)
+        self.state_manager = StateManager(state_file, self.logger, set_factory=self.new_membership_set,
+                                          near_duplicate_factory=self.new_near_duplicate_index)
 
         # 상태 로드 (seen_texts 포함)
         state = self.state_manager.load_state(self.start_url)
-        self.fetch_queue, self.parse_queue, self.visited, self.parsed_set, self.seen_texts, self.visited_identifiers = state
+        fetch_queue, parse_queue, self.visited, self.parsed_set, self.seen_texts, self.visited_identifiers, self.near_duplicates = state
+
+        if self.change_stats is not None:
+            self.change_stats.load_state(self.state_manager.change_stats)
+
+        # 호스트별 토큰 버킷으로 요청 간격을 조절하는 Fetch 큐 (priority 모드에서는 호스트마다 점수 순)
+        self.fetch_queue = HostScheduler(self.host_rate, self.host_burst, self.host_rules, scorer=self.frontier_scorer)
+        self.fetch_queue.extend(fetch_queue)
+        # 불러온 뒤부터의 추가/제거만 상태 저널에 기록
+        self.fetch_queue.tracker = ChangeTracker()
+
+        # 원본 HTML의 총 바이트 수로 제한되는 Parse 큐 (가득 차면 Fetch 스레드가 대기)
+        self.parse_queue = ByteBoundedQueue(self.parse_queue_bytes, parse_queue, tracker=ChangeTracker())
+
+        # 조회할 때마다 값을 읽는 큐 길이 지표
+        self.metrics.gauge('fetch_queue_depth', 'Fetch 큐의 URL 수', func=lambda: len(self.fetch_queue))
+        self.metrics.gauge('parse_queue_depth', 'Parse 큐의 페이지 수', func=lambda: len(self.parse_queue))
+        self.metrics.gauge('parse_queue_bytes', 'Parse 큐에 쌓인 원본 HTML 바이트 수', func=lambda: self.parse_queue.nbytes)
 
         self.stop_crawling_event = threading.Event()
 
+        # 큐에서 꺼내 처리 중인 URL/페이지 수 (클러스터 종료 판단용, 두 큐가 비어 있어도 처리 중이면 유휴가 아님)
+        self.in_progress = 0
+        self.work_done = 0
+        self.work_lock = threading.Lock()
 
-        self.visited_identifiers = set()
-        self.visited_identifiers_lock = threading.Lock()
-
-        # 이미 제외된 URL을 저장하는 캐시 추가
-        self.excluded_cache = set()
-
-        # 제외할 경로 패턴 정의
-        self.excluded_paths = [
-            '/wj/',
-            '/en_sc/',
-            '/en_wj/',
-            '/ocx/',
-            '/ocx_en/',
-            '/cn_wj/',
-            '/wj',
-            '/en_sc',
-            '/en_wj/',
-            '/ocx',
-            '/ocx_en/',
-            '/cn_wj'
-        ]
-        
-        # 제외할 정확한 URL 정의
-        self.excluded_urls = [
-            'https://www.yonsei.ac.kr/sc/support/notice.jsp',
-            'https://yonsei.ac.kr/sc/support/notice.jsp',
-            'https://yicrc.yonsei.ac.kr/news.asp',
-            'https://yicrc.yonsei.ac.kr/program.asp',
-            'https://yicrc.yonsei.ac.kr/newsletter.asp',
-            'https://yicrc.yonsei.ac.kr/rc.asp',
-            'https://yicdorm.yonsei.ac.kr/board.asp?mid=m05_02',
-            'https://yicdorm.yonsei.ac.kr/board.asp?mid=m05_05',
-            'https://yicdorm.yonsei.ac.kr/board.asp?mid=m05_03',
-            'https://yicdorm.yonsei.ac.kr/board.asp?mid=m05_04',
-            'https://yicdorm.yonsei.ac.kr/board.asp?mid=m05_07',
-            'https://dorm.yonsei.ac.kr/en',
-            'https://computing.yonsei.ac.kr/eng',
-            'https://library.yonsei.ac.kr/en',
-            'https://library.yonsei.ac.kr/SSOLegacy.do',
-            'https://library.yonsei.ac.kr/login',
-            'https://yonsei.ac.kr/sc/intro/promotionvideo.jsp',
-            'https://yonsei.ac.kr/sc/intro/promotionvideo-for-sns.jsp',
-            'https://yonsei.ac.kr/sc/intro/pressrel.jsp',
-            'https://yonsei.ac.kr/sc/intro/media1.jsp',
-            'https://oia.yonsei.ac.kr/intro/photo.asp',
-            'https://oia.yonsei.ac.kr/upload_file/',
-            'https://yicrc.yonsei.ac.kr/main/downloadfile.asp?',
-            'https://yonsei.ac.kr/sc/support/scholarship.jsp',
-            'https://yonsei.ac.kr/sc/support/lost_found.jsp',
-            'https://yonsei.ac.kr/sc/campus/yonseibean.jsp',
-            'https://yonsei.ac.kr/sc/intro/sympathy.jsp',
-            'https://yicdorm.yonsei.ac.kr/downloadfile.asp',
-            'https://yicdorm.yonsei.ac.kr/board.asp?act=view&bid=2',
-            'https://yicdorm.yonsei.ac.kr/board.asp?act=view&bid=3',
-            'https://yicdorm.yonsei.ac.kr/board.asp?act=view&bid=4',
-            'https://yicdorm.yonsei.ac.kr/board.asp?act=view&bid=5',
-            'https://yicdorm.yonsei.ac.kr/board.asp?act=view&bid=7'
-        ]
+        # visited_identifiers는 load_state가 불러온 집합을 그대로 사용 (다시 만들면 다음 압축 때 빈 집합이 스냅샷에 기록됨)
+        self.visited_identifiers_lock = self.admission_lock
 
+        # 제외 규칙을 하나의 정규식으로 컴파일한 매처 (판정 결과는 크기가 제한된 LRU 캐시에 보관)
+        self.exclusion_matcher = ExclusionMatcher.from_config(exclusion_config)
 
     def is_excluded(self, url):
         """
         URL이 제외 패턴에 맞는지 확인하는 메서드
         """
-        parsed = urlparse(url)
-        
-        # 정확히 제외할 URL인지 확인 (접두사 일치 확인)
-        for excluded_url in self.excluded_urls:
-            if url.startswith(excluded_url):
-                return True
-        
-        # 제외할 경로 패턴인지 확인
-        for path in self.excluded_paths:
-            if parsed.path.startswith(path):
-                return True
-        
-        # 쿼리 문자열에 'mid=n' 포함 여부 확인
-        query_params = parse_qs(parsed.query)
-        if 'mid' in query_params and query_params['mid'][0].startswith('n'):
-            return True
-
-        return False
+        return self.exclusion_matcher.is_excluded(url)
+
+    def new_membership_set(self):
+        """--membership 설정에 맞는 집합 객체 생성 (StateManager가 상태를 불러올 때도 사용)"""
+        return make_membership_set(self.membership, self.bloom_error_rate)
+
+    def new_near_duplicate_index(self):
+        # 사용하지 않을 때도 저장된 서명은 그대로 보존
+        if self.near_duplicate_threshold > 0:
+            return MinHashIndex(self.near_duplicate_threshold)
+        return TrackedSet()
 
     def add_url_to_queue(self, url, depth):
-        normalized_url = normalize_url(url)
-        
-        # URL이 절대 경로인지 확인
-        parsed_url = urlparse(normalized_url)
-        if not parsed_url.scheme or not parsed_url.netloc:
-            self.logger.warning(f"절대 경로가 아닌 URL을 건너뜁니다: {normalized_url}")
-            return  # 절대 경로가 아니면 추가하지 않음
-        
-        unique_id = extract_unique_identifier(normalized_url)
-        
-        with self.visited_identifiers_lock:
-            if unique_id in self.visited_identifiers:
-                self.logger.debug(f"제외하거나 처리된 콘텐츠입니다: {unique_id}")
-                return  # 이미 처리된 콘텐츠이므로 추가하지 않음
-            else:
-                self.visited_identifiers.add(unique_id)
-        
-        with self.visited_lock:
-            if normalized_url not in self.visited and normalized_url not in self.parsed_set:
-                if self.max_depth is None or depth <= self.max_depth:
-                    # 캐시 확인: 이미 제외된 URL인지 확인
-                    if normalized_url in self.excluded_cache or self.is_excluded(normalized_url):
-                        self.excluded_cache.add(normalized_url)  # 제외된 URL 캐시에 추가
-                        return  # 제외된 URL이므로 큐에 추가하지 않음
-
-                    # 중복이 아니면 fetch_queue에 추가
-                    with self.fetch_queue_lock:
-                        self.fetch_queue.append((normalized_url, depth))
-                        self.logger.debug(f"URL 큐에 추가됨: {normalized_url} (Depth: {depth})")
-                    self.visited.add(normalized_url)
-                    
-                    # links.jsonl에 추가
-                    summarized_link = {
-                        "url": normalized_url,
-                        "depth": depth
-                    }
-                    with self.links_lock:
-                        try:
-                            with open(self.links_file, 'a', encoding='utf-8') as f_links:
-                                json.dump(summarized_link, f_links, ensure_ascii=False)
-                                f_links.write('\n')
-                        except Exception as e:
-                            self.logger.error(f"links.jsonl에 URL 저장 실패: {e}")
+        self.admit_links([url], depth)
 
+    def admit_links(self, links, depth):
+        """
+        한 페이지의 하위 링크를 한 번에 큐에 추가.
+        링크마다 URL을 한 번만 파싱하고 페이지 안에서 먼저 중복을 제거한 뒤,
+        방문 여부 확인과 기록은 하나의 임계 구역에서, links.jsonl 기록은 한 번에 수행합니다.
+        """
+        start = time.perf_counter()
+        candidates = {}  # 고유 식별자 -> 정규화된 URL (페이지 안에서 처음 나온 링크)
+        netlocs = {}  # 고유 식별자 -> netloc (클러스터 모드의 담당 노드 계산용)
+        for url in links:
+            normalized_url, unique_id, netloc = normalize_with_identifier(url)
+            # URL이 절대 경로인지 확인
+            if not netloc:
+                self.logger.warning(f"절대 경로가 아닌 URL을 건너뜁니다: {normalized_url}")
+                continue  # 절대 경로가 아니면 추가하지 않음
+            candidates.setdefault(unique_id, normalized_url)
+            if self.cluster:
+                netlocs.setdefault(unique_id, netloc)
+
+        # 클러스터 모드: 다른 노드가 담당하는 링크는 그 노드로 전달하고, 이 노드가 담당하는 링크만 확인
+        forwarded_count = 0
+        if self.cluster:
+            local = self.cluster.route(candidates, depth, netlocs)
+            forwarded_count = len(candidates) - len(local)
+            candidates = local
+
+        within_depth = self.max_depth is None or depth <= self.max_depth
+        # 제외 규칙 확인은 공유 상태를 바꾸지 않으므로 임계 구역 밖에서 수행 (결과는 매처의 LRU 캐시에 보관)
+        excluded = {url for url in candidates.values() if within_depth and self.is_excluded(url)}
+
+        admitted = []
+        excluded_count = 0
+        with self.admission_lock:
+            for unique_id, normalized_url in candidates.items():
+                if unique_id in self.visited_identifiers:
+                    self.logger.debug(f"제외하거나 처리된 콘텐츠입니다: {unique_id}")
+                    continue  # 이미 처리된 콘텐츠이므로 추가하지 않음
+                self.visited_identifiers.add(unique_id)
+                if normalized_url in self.visited or normalized_url in self.parsed_set:
+                    continue
+                if not within_depth or normalized_url in excluded:
+                    excluded_count += 1
+                    continue  # 제외된 URL이므로 큐에 추가하지 않음
+                self.visited.add(normalized_url)
+                admitted.append((normalized_url, depth))
+            # 중복이 아니면 fetch_queue에 추가
+            self.fetch_queue.extend(admitted)
+
+        self.link_results.inc(len(admitted), ('admitted',))
+        self.link_results.inc(excluded_count, ('excluded',))
+        self.link_results.inc(forwarded_count, ('forwarded',))
+        self.link_results.inc(len(links) - len(admitted) - excluded_count - forwarded_count, ('duplicate',))
+        if admitted:
+            self.logger.debug(f"URL {len(admitted)}개 큐에 추가됨 (Depth: {depth})")
+
+            # links.jsonl에 한 번에 추가
+            lines = ''.join(json.dumps({"url": url, "depth": depth}, ensure_ascii=False) + '\n' for url, _ in admitted)
+            with self.links_lock:
+                try:
+                    with open(self.links_file, 'a', encoding='utf-8') as f_links:
+                        f_links.write(lines)
+                except Exception as e:
+                    self.logger.error(f"links.jsonl에 URL 저장 실패: {e}")
+        elapsed = time.perf_counter() - start
+        self.stage_seconds.observe(elapsed, ('admission',))
+        trace = current_trace()
+        if trace is not None:
+            trace.add('admission', start, elapsed, {"links": len(links), "admitted": len(admitted)})
 
     def load_additional_links(self, links_file):
         """links.jsonl에서 URL을 큐에 추가"""
@@ -221,15 +310,43 @@ class Crawler:
             with open(links_file, 'w', encoding='utf-8') as f_links:
                 pass
 
+    def load_cluster_links(self, links_file):
+        """클러스터 모드의 links.jsonl: 깊이별로 수용 단계에 넣어 담당 노드로 나눔"""
+        if not os.path.exists(links_file):
+            return
+        by_depth = {}
+        for entry in load_jsonl(links_file):
+            if entry.get('url'):
+                by_depth.setdefault(entry.get('depth', 0), []).append(entry['url'])
+        for depth, urls in by_depth.items():
+            self.admit_links(urls, depth)
+        self.logger.info(f"links.jsonl의 URL {sum(len(urls) for urls in by_depth.values())}개를 담당 노드로 나눴습니다.")
+        with open(links_file, 'w', encoding='utf-8') as f_links:
+            pass
+
     def start_threads(self):
         """각 스레드 그룹 시작"""
+        # 지표 엔드포인트와 주기적 stats 기록
+        if self.metrics_port is not None:
+            self.metrics_server = MetricsServer(self.metrics, self.metrics_port).start()
+            self.logger.info(f"지표 엔드포인트: http://127.0.0.1:{self.metrics_server.server_address[1]}/metrics")
+        if self.stats_file:
+            self.stats_writer = StatsWriter(self.metrics, self.stats_file, self.stats_interval, self.logger).start()
+
         # Fetcher 스레드 시작
         self.fetch_threads_list = []
-        for i in range(self.fetch_threads):
-            t = threading.Thread(target=self.fetch_worker, name=f"Fetcher-{i+1}")
+        if self.fetch_mode == 'async':
+            # 하나의 이벤트 루프 스레드가 모든 요청을 처리
+            t = threading.Thread(target=self.async_fetch_loop, name="AsyncFetcher")
             t.start()
-            self.logger.info(f"{t.name} 시작")
+            self.logger.info(f"{t.name} 시작 (동시 요청 수: {self.async_concurrency})")
             self.fetch_threads_list.append(t)
+        else:
+            for i in range(self.fetch_threads):
+                t = threading.Thread(target=self.fetch_worker, name=f"Fetcher-{i+1}")
+                t.start()
+                self.logger.info(f"{t.name} 시작")
+                self.fetch_threads_list.append(t)
 
         # Parser 스레드 시작
         self.parse_threads_list = []
@@ -254,157 +371,429 @@ class Crawler:
             session.mount("http://", adapter)
 
             while not self.stop_crawling_event.is_set():
-                with self.fetch_queue_lock:
-                    if self.fetch_queue:
-                        url, depth = self.fetch_queue.popleft()
-                    else:
-                        url, depth = None, None
-
-                if url is None:
-                    self.stop_crawling_event.wait(timeout=0.3) # 큐가 비어있으면 잠시 대기
+                # 준비된 호스트의 URL이 없으면 최대 0.3초 대기
+                item = self.fetch_queue.get(timeout=0.3)
+                if item is None:
                     continue
+                url, depth = item
+
+                self.begin_work()
+                try:
+                    trace = self.tracer.start(url) if self.tracer else None
+                    with activate(trace):
+                        with span('fetch', self.stage_seconds) as attrs:
+                            result = self.fetcher.fetch_page(session, url)
+                            self.describe_fetch(attrs, result)
+                    if result:
+                        if self.archive:
+                            self.archive.store(url, result)
+                        if trace is not None:
+                            self.tracer.hand_off(trace)
+                        # Parse 큐에 추가 (가득 차 있으면 파싱이 따라잡을 때까지 대기)
+                        self.parse_queue.put((url, result.content, depth, self.page_meta(result)), self.stop_crawling_event)
+                    else:
+                        # 크롤링 실패 시 로깅
+                        self.fetch_failures.inc()
+                        if trace is not None:
+                            self.tracer.finish(trace, 'fetch_failed')
+                        self.logger.warning(f"[{thread_name}] 크롤링 실패: {url}")
+                finally:
+                    self.end_work()
+
+    def begin_work(self):
+        with self.work_lock:
+            self.in_progress += 1
+
+    def end_work(self):
+        with self.work_lock:
+            self.in_progress -= 1
+            self.work_done += 1
+
+    def is_idle(self):
+        """두 큐가 비어 있고 처리 중인 URL/페이지도 없는지 여부"""
+        with self.work_lock:
+            return self.in_progress == 0 and not self.fetch_queue and not self.parse_queue
+
+    def describe_fetch(self, attrs, result):
+        """추적 기록의 fetch span 속성"""
+        if result:
+            attrs['status'] = result.status
+            attrs['bytes'] = len(result.content)
+
+    def page_meta(self, result):
+        """파싱 단계에 함께 전달할 응답 정보"""
+        return {
+            "not_modified": result.not_modified,
+            "content_type": result.headers.get('Content-Type', '')
+        }
+
+    def async_fetch_loop(self):
+        """asyncio 이벤트 루프를 실행하는 스레드 진입점"""
+        asyncio.run(self.async_fetch_main())
+
+    async def async_fetch_main(self):
+        async with self.async_fetcher.create_session(self.async_concurrency) as session:
+            workers = [
+                asyncio.create_task(self.async_fetch_worker(session, f"AsyncFetcher-{i+1}"))
+                for i in range(self.async_concurrency)
+            ]
+            await asyncio.gather(*workers)
+
+    async def async_fetch_worker(self, session, worker_name):
+        while not self.stop_crawling_event.is_set():
+            item, wait = self.fetch_queue.pop_ready()
+            if item is None:
+                # 준비된 호스트가 없으면 다음 호스트가 준비될 때까지 (최대 0.3초) 대기
+                await asyncio.sleep(0.3 if wait is None else min(wait, 0.3))
+                continue
+            url, depth = item
 
-                content = self.fetcher.fetch_page_content(session, url)
-                if content:
-                    # Parse 큐에 추가
-                    with self.parse_queue_lock:
-                        self.parse_queue.append((url, content, depth))
+            self.begin_work()
+            try:
+                # 추적 기록은 asyncio 작업마다 따로 유지됨 (contextvars)
+                trace = self.tracer.start(url) if self.tracer else None
+                with activate(trace):
+                    with span('fetch', self.stage_seconds) as attrs:
+                        result = await self.async_fetcher.fetch_page(session, url)
+                        self.describe_fetch(attrs, result)
+                if result:
+                    if self.archive:
+                        # 이벤트 루프를 막지 않도록 아카이브 쓰기 큐가 가득 차면 보관하지 않음
+                        self.archive.store(url, result, block=False)
+                    if trace is not None:
+                        self.tracer.hand_off(trace)
+                    # Parse 큐에 추가 (스레드 모드와 동일한 파싱 단계로 전달). 이벤트 루프를 막지 않도록 공간이 생길 때까지 양보
+                    item = (url, result.content, depth, self.page_meta(result))
+                    if not self.parse_queue.try_put(item):
+                        start = time.monotonic()
+                        while not self.parse_queue.try_put(item):
+                            if self.stop_crawling_event.is_set():
+                                self.parse_queue.put(item, self.stop_crawling_event)
+                                break
+                            await asyncio.sleep(0.05)
+                        self.parse_queue.record_put_wait(time.monotonic() - start)
                 else:
                     # 크롤링 실패 시 로깅
-                    self.logger.warning(f"[{thread_name}] 크롤링 실패: {url}")
-
-    def normalize_text(self, text):
-        # 모든 공백을 단일 공백으로 변환하고 양쪽 공백 제거
-        text = re.sub(r'\s+', ' ', text).strip()
-        # 소문자 변환
-        text = text.lower()
-        # 불필요한 특수 문자 제거 (필요에 따라 조정)
-        text = re.sub(r'[^\w\s]', '', text)
-        return text
+                    self.fetch_failures.inc()
+                    if trace is not None:
+                        self.tracer.finish(trace, 'fetch_failed')
+                    self.logger.warning(f"[{worker_name}] 크롤링 실패: {url}")
+            finally:
+                self.end_work()
 
     def parse_worker(self):
         thread_name = threading.current_thread().name
         while not self.stop_crawling_event.is_set():
-            with self.parse_queue_lock:
-                if self.parse_queue:
-                    url, content, depth = self.parse_queue.popleft()
-                else:
-                    url, content, depth = None, None, None
-
-            if url is None:
-                time.sleep(1)
+            # 페이지가 들어올 때까지 대기 (종료 신호 확인을 위해 최대 0.5초)
+            item = self.parse_queue.get(timeout=0.5)
+            if item is None:
                 continue
+            url, content, depth, meta = item
 
+            self.begin_work()
             try:
-                merged_text = self.parser.extract_and_merge_text(content, url)
+                links_only = bool(meta.get('not_modified')) and not self.reparse_unchanged
+                content_type = meta.get('content_type', '')
+                trace = self.tracer.resume(url) if self.tracer else None
+                result = None
+                with activate(trace):
+                    try:
+                        page = None
+                        if self.parse_pool:
+                            # process 모드: 원본 바이트를 워커 프로세스로 보내 추출 결과만 돌려받음
+                            page = self.parse_in_process(thread_name, url, content, links_only, content_type)
+                        if page is not None or not self.parse_pool:
+                            if self.parse_profiler:
+                                self.parse_profiler.run(self.process_page, thread_name, url, content, depth, links_only, page, content_type)
+                            else:
+                                self.process_page(thread_name, url, content, depth, links_only, page, content_type)
+                    except Exception as e:
+                        # 한 페이지의 오류로 파싱 스레드가 종료되지 않도록 기록만 하고 다음 페이지로 진행
+                        result = 'parse_error'
+                        self.count_page(url, result)
+                        self.logger.exception(f"[{thread_name}] 페이지 처리 오류 ({url}): {e}")
+                if trace is not None:
+                    self.tracer.finish(trace, result)
+            finally:
+                self.end_work()
+        if self.parse_profiler:
+            self.parse_profiler.dump()  # 종료 시 이 스레드가 모은 프로파일 기록
+
+    def parse_in_process(self, thread_name, url, content, links_only, content_type=''):
+        trace = current_trace()
+        try:
+            # 워커 프로세스의 단계별 지표는 부모로 돌아오지 않으므로 왕복 시간을 하나의 단계로 측정
+            with span('parse_process', self.stage_seconds):
+                offset = trace.offset() if trace is not None else 0.0
+                page, logs = self.parse_pool.submit(parse_page_in_process, content, url, links_only, content_type,
+                                                    trace is not None).result()
+        except Exception as e:
+            self.count_page(url, 'parse_error')
+            self.logger.error(f"[{thread_name}] 파싱 프로세스 오류 ({url}): {e}")
+            return None
+        # 워커 프로세스에서 남긴 로그를 부모 프로세스의 로거로 전달
+        for level, message in logs:
+            self.logger.log(level, f"[{thread_name}] {message}")
+        # 워커 프로세스의 단계별 span을 제출 시점 기준으로 이어 붙임 (프로세스 간 전송 시간은 parse_process에만 포함)
+        spans = page.pop('trace', None)
+        if trace is not None and spans:
+            trace.merge(spans, offset)
+        return page
+
+    def count_encoding_source(self, source):
+        if source:
+            with self.encoding_stats_lock:
+                self.encoding_stats[source] += 1
+
+    def report_encoding_stats(self):
+        with self.encoding_stats_lock:
+            stats = ", ".join(f"{source}={self.encoding_stats[source]}" for source in EncodingResolver.SOURCES)
+        self.logger.info(f"인코딩 판별 경로별 페이지 수: {stats}")
+
+    def report_queue_stats(self):
+        """
+        단계별 크기 조정을 위한 큐 상태.
+        Fetch 대기(put 대기)가 길면 파싱이, Parse 대기(get 대기)가 길면 Fetch가 병목입니다.
+        """
+        fetch = self.fetch_queue.stats()
+        parse = self.parse_queue.stats()
+        self.logger.info(
+            f"큐 상태: Fetch 큐 {fetch['depth']}개 (최대 {fetch['max_depth']}개, 호스트 {fetch['hosts']}개, "
+            f"URL 대기 {fetch['get_wait_seconds']:.1f}초), "
+            f"Parse 큐 {parse['depth']}개 {parse['bytes'] / 1024 / 1024:.1f}MB/{parse['max_bytes'] / 1024 / 1024:.0f}MB "
+            f"(최대 {parse['max_depth']}개, Fetch 대기 {parse['put_waits']}회 {parse['put_wait_seconds']:.1f}초, "
+            f"파서 대기 {parse['get_wait_seconds']:.1f}초)"
+        )
+        output = self.saver.stats()
+        self.logger.info(
+            f"원본 데이터 쓰기: 대기 {output['pending']}개, {output['records']}개/{output['batches']}회 기록 "
+            f"({output['bytes'] / 1024 / 1024:.1f}MB, {output['write_seconds']:.1f}초), fsync {output['fsyncs']}회"
+        )
+        if self.archive:
+            archive = self.archive.stats()
+            self.logger.info(
+                f"아카이브: 대기 {archive['pending']}개, response {archive['responses']}개, revisit {archive['revisits']}개 (304 {archive['not_modified']}개), 버림 {archive['dropped']}개, "
+                f"원본 {archive['raw_bytes'] / 1024 / 1024:.1f}MB -> {archive['stored_bytes'] / 1024 / 1024:.1f}MB"
+            )
+
+    def process_page(self, thread_name, url, content, depth, links_only, page=None, content_type=''):
+        """
+        한 페이지의 파싱 결과를 처리 (중복 제거, 저장, 하위 링크 추가).
+        page가 주어지면 (process 모드) 미리 추출된 결과를 사용하고, 없으면 이 스레드에서 추출합니다.
+        """
+        # 페이지를 한 번만 디코딩/파싱하여 모든 추출기가 공유 (thread 모드)
+        document = None if page else self.parser.as_document(content, url, content_type)
+
+        if links_only:
+            # 변경되지 않은 페이지: 텍스트 추출과 저장은 건너뛰고 하위 링크만 추출
+            self.count_page(url, 'not_modified')
+            self.logger.info(f"[{thread_name}] 변경 없음 (304), 파싱을 건너뜁니다: {url}")
+            with self.parsed_set_lock:
+                self.parsed_set.add(url)
+            links = page['links'] if page else self.parser.extract_links(document, url)
+            self.count_encoding_source(page['encoding_source'] if page else document.encoding_source)
+            self.admit_links(links, depth + 1)
+            return
+
+        if page:
+            merged_text = page['merged_text']
+        else:
+            try:
+                merged_text = self.parser.extract_and_merge_text(document, url)
             except Exception as e:
                 self.logger.error(f"[{thread_name}] 텍스트 추출 오류 ({url}): {e}")
                 merged_text = ""
+        self.count_encoding_source(page['encoding_source'] if page else document.encoding_source)
+
+        # merged_text가 비어있으면 저장하지 않음
+        if not merged_text.strip():
+            self.count_page(url, 'empty')
+            self.logger.info(f"[{thread_name}] 빈 merged_text로 인해 저장을 건너뜁니다: {url}")
+            return
+
+        # merged_text 정규화
+        normalized_text = normalize_text(merged_text)
+
+        # 정규화된 텍스트가 비어있으면 저장하지 않음
+        if not normalized_text:
+            self.count_page(url, 'empty')
+            self.logger.info(f"[{thread_name}] 정규화 후 빈 텍스트로 인해 저장을 건너뜁니다: {url}")
+            return
+
+        duplicate = self.check_duplicate(normalized_text)
+        if duplicate:
+            self.count_page(url, duplicate[0])
+            if duplicate[0] == 'duplicate':
+                self.logger.info(f"[{thread_name}] 중복된 merged_text를 발견하여 저장을 건너뜁니다: {url}")
+            else:
+                self.logger.info(f"[{thread_name}] 근접 중복 merged_text를 발견하여 저장을 건너뜁니다 (유사도 {duplicate[1]:.2f}): {url}")
+            return  # 중복되면 저장하지 않고 건너뜀
 
-            # merged_text가 비어있으면 저장하지 않음
-            if not merged_text.strip():
-                self.logger.info(f"[{thread_name}] 빈 merged_text로 인해 저장을 건너뜁니다: {url}")
-                continue
-
-            # merged_text 정규화
-            normalized_text = self.normalize_text(merged_text)
-
-            # 정규화된 텍스트가 비어있으면 저장하지 않음
-            if not normalized_text:
-                self.logger.info(f"[{thread_name}] 정규화 후 빈 텍스트로 인해 저장을 건너뜁니다: {url}")
-                continue
-
+        if page:
+            images, files, tables = page['images'], page['files'], page['tables']
+        else:
+            # 이미지, 파일, 테이블 추출
+            images = self.parser.extract_image_links(document.soup, url)
+            files = self.parser.extract_file_links(document.soup, url)
+            tables = self.parser.extract_tables(document.soup, url)
+
+        # 원본 데이터 저장 (merged_text, images, files, tables)
+        original_data = {
+            "url": url,
+            "merged_text": merged_text,
+            "images": images,
+            "files": files,
+            "tables": tables
+        }
+        with span('enqueue_save'):
+            self.saver.save_original_data(original_data)
+        self.count_page(url, 'saved')
+        self.logger.info(f"[{thread_name}] 원본 데이터 저장 대기열에 추가: {url}")
+
+        # 파싱된 URL 집합에 추가
+        with self.parsed_set_lock:
+            self.parsed_set.add(url)
+
+        # 하위 링크 추출
+        links = page['links'] if page else self.parser.extract_links(document, url)
+        self.admit_links(links, depth + 1)  # 중복 체크하며 큐에 추가
+
+    def count_page(self, url, result):
+        """페이지 처리 결과를 지표, URL 유형별 변경 비율, (추적 중이면) 현재 페이지의 추적 기록에 남김"""
+        self.page_results.inc(labels=(result,))
+        if self.frontier_scorer:
+            self.frontier_scorer.record_result(url, result)
+        trace = current_trace()
+        if trace is not None:
+            trace.result = result
+
+    def check_duplicate(self, normalized_text):
+        """
+        정확히 같은 본문(SHA-256)을 먼저 확인하고, 그 다음 근접 중복(MinHash)을 확인.
+        중복이면 ('duplicate', None) 또는 ('near_duplicate', 유사도), 새 본문이면 기록하고 None
+        """
+        with span('dedupe', self.stage_seconds):
             # merged_text의 해시값 생성 (SHA-256 사용)
             text_hash = hashlib.sha256(normalized_text.encode('utf-8')).hexdigest()
 
-            # 중복 체크
+            # 근접 중복 검사용 MinHash 서명 (날짜, 조회수 등 일부만 다른 페이지 검출)
+            signature = None
+            if self.near_duplicate_threshold > 0:
+                signature = self.near_duplicates.signature(normalized_text)
+
             with self.seen_texts_lock:
                 if text_hash in self.seen_texts:
-                    self.logger.info(f"[{thread_name}] 중복된 merged_text를 발견하여 저장을 건너뜁니다: {url}")
-                    continue  # 중복되면 저장하지 않고 건너뜀
+                    return 'duplicate', None
+                if signature is not None:
+                    similarity = self.near_duplicates.find(signature)
+                    if similarity is not None:
+                        return 'near_duplicate', similarity
+                    self.near_duplicates.add(signature)
                 self.seen_texts.add(text_hash)  # 중복되지 않으면 해시값을 추가
-
-            soup = BeautifulSoup(content, 'html.parser')
-
-            # 이미지, 파일, 테이블 추출
-            images = self.parser.extract_image_links(soup, url)
-            files = self.parser.extract_file_links(soup, url)
-            tables = self.parser.extract_tables(soup, url)
-
-            # 원본 데이터 저장 (merged_text, images, files, tables)
-            original_data = {
-                "url": url,
-                "merged_text": merged_text,
-                "images": images,
-                "files": files,
-                "tables": tables
-            }
-            self.saver.save_original_data(original_data)
-            self.logger.info(f"[{thread_name}] 원본 데이터 저장 완료: {url}")
-
-            # 파싱된 URL 집합에 추가
-            with self.parsed_set_lock:
-                self.parsed_set.add(url)
-
-            # 하위 링크 추출
-            links = self.parser.extract_links(content, url)
-            for link in links:
-                self.add_url_to_queue(link, depth + 1)  # 중복 체크하며 큐에 추가
+            return None
 
     def periodic_state_save(self):
         thread_name = threading.current_thread().name
         while not self.stop_crawling_event.is_set():
-            with self.parse_queue_lock:  # parse_queue를 안전하게 잠그고 복사본 생성
-                parse_queue_copy = list(self.parse_queue)
-
-            self.state_manager.save_state(
-                self.fetch_queue, 
-                parse_queue_copy,  # 복사본 사용
-                self.visited, 
-                self.parsed_set,
-                self.seen_texts,
-                self.visited_identifiers
-            )
+            # 파싱 완료로 기록될 페이지의 원본 데이터가 먼저 파일에 반영되도록 쓰기 큐를 비움
+            try:
+                if not self.saver.flush(timeout=max(self.save_interval, 60)):
+                    # 기록되지 않은 페이지가 파싱 완료로 저장되지 않도록 이번 저장은 건너뜀
+                    self.logger.warning(f"[{thread_name}] 원본 데이터 쓰기가 밀려 이번 상태 저장을 건너뜁니다.")
+                    continue
+            except RuntimeError as e:
+                # 더 이상 원본 데이터를 기록할 수 없으므로 크롤링을 멈추고 현재 상태를 저장
+                self.logger.error(f"[{thread_name}] {e} 크롤링을 중단합니다.")
+                self.stop_crawling_event.set()
+                break
+            # 클러스터 모드: 다른 노드로 보낼 링크를 먼저 전달하고, 이번 저장에 반영될 받은 배치를 기록
+            received = self.cluster.prepare_checkpoint() if self.cluster else None
+            # 마지막 체크포인트 이후의 변경만 저널에 기록 (parse_queue는 TrackedDeque가 변경을 추적)
+            with self.stage_seconds.time(('checkpoint',)):
+                self.state_manager.save_state(
+                    self.fetch_queue,
+                    self.parse_queue,
+                    self.visited,
+                    self.parsed_set,
+                    self.seen_texts,
+                    self.visited_identifiers,
+                    self.near_duplicates,
+                    self.change_stats
+                )
+            if self.cluster:
+                self.cluster.commit_checkpoint(received)
             self.logger.info(f"[{thread_name}] 상태 저장 완료.")
-            # 파일 크기 확인 및 로테이션
-            self.saver.check_file_size_and_rotate(self.saver.original_file)
-            time.sleep(self.save_interval)
-        # 크롤링이 완료되면 최종 저장
+            self.report_encoding_stats()
+            self.report_queue_stats()
+            if self.tracer:
+                self.tracer.flush()
+            # 조건부 GET 캐시 커밋
+            if self.http_cache:
+                self.http_cache.flush()
+            if self.archive:
+                self.archive.flush()
+            self.stop_crawling_event.wait(self.save_interval)
+        # 크롤링이 완료되면 최종 저장 (기록되지 않은 페이지는 파싱 완료로 저장하지 않음)
+        try:
+            if not self.saver.flush(timeout=max(self.save_interval, 60)):
+                self.logger.warning(f"[{thread_name}] 원본 데이터가 아직 기록되지 않아 최종 상태 저장을 건너뜁니다.")
+                return
+        except RuntimeError as e:
+            self.logger.error(f"[{thread_name}] {e} 최종 상태 저장을 건너뜁니다.")
+            return
         self.state_manager.save_state(
             self.fetch_queue, 
-            parse_queue_copy,  # 복사본 사용
+            self.parse_queue,
             self.visited, 
             self.parsed_set,
             self.seen_texts,
-            self.visited_identifiers
+            self.visited_identifiers,
+            self.near_duplicates,
+            self.change_stats
         )
         self.logger.info(f"[{thread_name}] 최종 상태 저장 완료.")
 
 
     def run(self):
+        # 클러스터 모드: 링크 전달/수신 스레드 시작 (시작 URL은 담당 노드로 전달됨)
+        if self.cluster:
+            self.cluster.attach(self)
+            self.cluster.start()
+
         # 시작 URL을 큐에 추가
         self.add_url_to_queue(self.start_url, 0)
 
         # 스레드 시작
         self.start_threads()
 
-        # 원본 파일 미리 생성
-        if not os.path.exists(self.saver.original_file):
-            with open(self.saver.original_file, 'w', encoding='utf-8') as f:
-                pass  # 빈 파일 생성
-            self.logger.info(f"파일 생성됨: {self.saver.original_file}")
-
-        # 링크 파일에서 추가 링크를 로드
-        self.load_additional_links('links.jsonl')
+        # 링크 파일에서 추가 링크를 로드 (클러스터 모드에서는 노드 0만 읽어 담당 노드로 전달)
+        if not self.cluster:
+            self.load_additional_links('links.jsonl')
+        elif self.cluster.node_id == 0:
+            self.load_cluster_links('links.jsonl')
 
         # 크롤링 완료를 판단하기 위한 타이머 설정
         idle_time = 0
-        idle_threshold = 120  # 크롤링이 idle 상태로 120초 이상 유지되면 종료
+        idle_threshold = self.idle_timeout  # 크롤링이 idle 상태로 idle_timeout초 이상 유지되면 종료
+        started = time.monotonic()
 
         try:
             while not self.stop_crawling_event.is_set():
+                if self.max_runtime is not None and time.monotonic() - started >= self.max_runtime:
+                    # 시간 제한: 남은 큐는 상태 파일에 저장되어 다음 실행에서 이어서 처리
+                    self.logger.info(f"최대 실행 시간 {self.max_runtime}초가 지나 크롤링을 종료합니다. (Fetch 큐 {len(self.fetch_queue)}개 남음)")
+                    self.stop_crawling_event.set()
+                    break
+                if self.cluster:
+                    # 클러스터 모드: 모든 노드가 유휴이고 전달 중인 링크가 없을 때 노드 0이 종료를 요청
+                    if self.cluster.finished_event.is_set():
+                        self.logger.info("모든 노드의 작업이 끝나 크롤링을 종료합니다.")
+                        self.stop_crawling_event.set()
+                        break
+                    time.sleep(1)
+                    continue
                 # 작업 진행 중인지 확인
-                with self.fetch_queue_lock, self.parse_queue_lock:
+                with self.fetch_queue_lock:
                     if not self.fetch_queue and not self.parse_queue:
                         idle_time += 1
                         if idle_time >= idle_threshold:
@@ -429,10 +818,35 @@ class Crawler:
             # 상태 저장 스레드 종료
             self.state_thread.join()
 
-            # 남아있는 데이터를 최종 저장
-            self.saver.final_save()
+            # 클러스터 동기화 종료 (남은 전달 링크를 보내고, 받은 배치는 최종 상태 저장 후 삭제)
+            received = self.cluster.stop() if self.cluster else None
+
+            # 파싱 프로세스 풀 종료
+            if self.parse_pool:
+                self.parse_pool.shutdown()
 
-            # 상태 저장 (seen_texts 포함)
-            self.state_manager.save_state(self.fetch_queue, self.parse_queue, self.visited, self.parsed_set, self.seen_texts, self.visited_identifiers)
+            # 남아있는 데이터를 최종 저장
+            saved = self.saver.final_save()
+            if self.http_cache:
+                self.http_cache.close()
+            if self.archive:
+                self.archive.close()
+            if self.stats_writer:
+                self.stats_writer.stop()
+            if self.metrics_server:
+                self.metrics_server.stop()
+
+            # 상태 저장 (seen_texts 포함). 원본 데이터를 모두 기록하지 못했으면 마지막 체크포인트에서 다시 크롤링하도록 저장하지 않음
+            if saved:
+                self.state_manager.save_state(self.fetch_queue, self.parse_queue, self.visited, self.parsed_set, self.seen_texts, self.visited_identifiers, self.near_duplicates, self.change_stats)
+                if self.cluster:
+                    self.cluster.commit_checkpoint(received)
+            else:
+                self.logger.error("원본 데이터 일부를 기록하지 못해 최종 상태 저장을 건너뜁니다. 다음 실행은 마지막 체크포인트에서 이어집니다.")
 
+            self.report_encoding_stats()
+            self.report_queue_stats()
+            if self.tracer:
+                self.tracer.report()
+                self.tracer.close()
             self.logger.info("크롤링 및 파싱 작업이 종료되었습니다.")
@@ -0,0 +1,41 @@
+# document.py
+
+from bs4 import BeautifulSoup
+from encoding import EncodingResolver
+
+class PageDocument:
+    """
+    한 페이지의 디코딩과 DOM 파싱을 한 번만 수행하여 모든 추출기가 공유하는 객체.
+    text와 soup은 처음 사용할 때 만들어집니다.
+    """
+
+    def __init__(self, content, url, logger=None, content_type='', resolver=None):
+        self.content = content
+        self.url = url
+        self.logger = logger
+        self.content_type = content_type  # Fetcher가 받은 Content-Type 헤더
+        self.resolver = resolver or EncodingResolver()
+        self.encoding = None
+        self.encoding_source = None  # 인코딩 판별 경로 (header, meta, host_default, detected, fallback)
+        self._text = None
+        self._soup = None
+
+    @property
+    def text(self):
+        """디코딩된 HTML 문자열"""
+        if self._text is None:
+            try:
+                self._text, self.encoding, self.encoding_source = self.resolver.decode(self.content, self.url, self.content_type)
+            except Exception as e:
+                if self.logger:
+                    self.logger.error(f"컨텐츠 디코딩 오류 ({self.url}): {e}")
+                self._text = self.content.decode('utf-8', errors='replace')
+                self.encoding, self.encoding_source = 'utf-8', 'fallback'
+        return self._text
+
+    @property
+    def soup(self):
+        """lxml 백엔드로 한 번만 파싱한 BeautifulSoup 객체"""
+        if self._soup is None:
+            self._soup = BeautifulSoup(self.text, 'lxml')
+        return self._soup
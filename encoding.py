@@ -0,0 +1,94 @@
+# encoding.py
+
+import codecs
+import re
+import threading
+from collections import Counter
+from urllib.parse import urlparse
+import chardet
+
+# 한국어 페이지에서 EUC-KR로 표기되거나 검출되는 인코딩은 상위 집합인 CP949로 디코딩
+ENCODING_ALIASES = {
+    'euc_kr': 'cp949',
+    'ks_c_5601-1987': 'cp949',
+    'ks_c_5601': 'cp949',
+    'x-windows-949': 'cp949',
+    'windows-949': 'cp949',
+    'ascii': 'utf-8',
+}
+
+CHARSET_HEADER_RE = re.compile(r'charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+META_CHARSET_RE = re.compile(rb'<meta[^>]+charset\s*=\s*["\']?([\w.:-]+)', re.IGNORECASE)
+
+def normalize_encoding(name):
+    """인코딩 이름을 파이썬 코덱 이름으로 정규화. 알 수 없는 인코딩이면 None"""
+    if not name:
+        return None
+    name = name.strip().lower()
+    name = ENCODING_ALIASES.get(name, name)
+    try:
+        codec_name = codecs.lookup(name).name
+    except LookupError:
+        return None
+    return ENCODING_ALIASES.get(codec_name, codec_name)
+
+
+class EncodingResolver:
+    """
+    페이지 인코딩 판별기. 다음 순서로 시도합니다.
+    1. HTTP Content-Type 헤더의 charset
+    2. 본문 앞부분(meta_scan_bytes)의 <meta charset>
+    3. 같은 호스트에서 학습한 기본 인코딩 (엄격한 디코딩에 성공할 때만)
+    4. 본문 일부(sample_bytes)에 대한 chardet 검출
+    """
+
+    SOURCES = ('header', 'meta', 'host_default', 'detected', 'fallback')
+
+    def __init__(self, meta_scan_bytes=4096, sample_bytes=32 * 1024):
+        self.meta_scan_bytes = meta_scan_bytes
+        self.sample_bytes = sample_bytes
+        self.host_encodings = {}  # netloc -> Counter(인코딩)
+        self.lock = threading.Lock()
+
+    def learn(self, netloc, encoding):
+        with self.lock:
+            self.host_encodings.setdefault(netloc, Counter())[encoding] += 1
+
+    def host_default(self, netloc):
+        with self.lock:
+            counts = self.host_encodings.get(netloc)
+            return counts.most_common(1)[0][0] if counts else None
+
+    def decode(self, content, url, content_type=''):
+        """(디코딩된 문자열, 인코딩, 판별 경로) 반환"""
+        netloc = urlparse(url).netloc
+
+        # 1. HTTP 헤더
+        match = CHARSET_HEADER_RE.search(content_type or '')
+        encoding = normalize_encoding(match.group(1)) if match else None
+        if encoding:
+            self.learn(netloc, encoding)
+            return content.decode(encoding, errors='replace'), encoding, 'header'
+
+        # 2. <meta charset> / <meta http-equiv="Content-Type">
+        match = META_CHARSET_RE.search(content[:self.meta_scan_bytes])
+        encoding = normalize_encoding(match.group(1).decode('ascii', errors='ignore')) if match else None
+        if encoding:
+            self.learn(netloc, encoding)
+            return content.decode(encoding, errors='replace'), encoding, 'meta'
+
+        # 3. 호스트별 학습된 기본값 (잘못된 추측을 막기 위해 엄격하게 디코딩)
+        encoding = self.host_default(netloc)
+        if encoding:
+            try:
+                return content.decode(encoding), encoding, 'host_default'
+            except UnicodeDecodeError:
+                pass
+
+        # 4. 본문 일부에 대해서만 chardet 검출
+        encoding = normalize_encoding(chardet.detect(content[:self.sample_bytes])['encoding'])
+        if encoding:
+            self.learn(netloc, encoding)
+            return content.decode(encoding, errors='replace'), encoding, 'detected'
+
+        return content.decode('utf-8', errors='replace'), 'utf-8', 'fallback'
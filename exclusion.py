@@ -0,0 +1,81 @@
+# exclusion.py
+
+import json
+import os
+import re
+import threading
+from collections import OrderedDict
+
+DEFAULT_EXCLUSIONS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config', 'exclusions.json')
+
+def prefix_pattern(prefixes):
+    """
+    접두사 목록을 트라이 모양의 정규식으로 변환 (공통 접두사는 한 번만 비교).
+    다른 접두사로 시작하는 접두사는 짧은 쪽만 남깁니다.
+    """
+    trie = {}
+    for prefix in prefixes:
+        node = trie
+        for ch in prefix:
+            node = node.setdefault(ch, {})
+        node[''] = {}
+
+    def build(node):
+        if '' in node:
+            return ''
+        alternatives = [re.escape(ch) + build(child) for ch, child in sorted(node.items())]
+        if len(alternatives) == 1:
+            return alternatives[0]
+        return '(?:' + '|'.join(alternatives) + ')'
+
+    return build(trie)
+
+
+class ExclusionMatcher:
+    """
+    제외 규칙을 하나의 정규식으로 컴파일한 URL 매처.
+    - url_prefixes: URL 전체의 접두사
+    - path_prefixes: 경로의 접두사
+    - query_prefixes: {매개변수 이름: [값 접두사, ...]} (같은 매개변수가 여러 번 있으면 첫 번째 값으로 판단)
+    판정 결과는 크기가 제한된 LRU 캐시에 보관합니다.
+    """
+
+    def __init__(self, url_prefixes=(), path_prefixes=(), query_prefixes=None, cache_size=100000):
+        parts = []
+        if url_prefixes:
+            parts.append(prefix_pattern(url_prefixes))
+        if path_prefixes:
+            parts.append(r'[^:/?#]*://[^/?#]*' + prefix_pattern(path_prefixes))
+        for name, values in (query_prefixes or {}).items():
+            if values:
+                name = re.escape(name)
+                parts.append(rf'[^?#]*\?(?:(?!{name}=)[^&#]*&)*{name}=' + prefix_pattern(values))
+        self.pattern = re.compile('^(?:' + '|'.join(parts) + ')' if parts else '(?!)')
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_config(cls, config_file=None, cache_size=100000):
+        """제외 규칙 설정 파일(JSON)에서 매처 생성"""
+        with open(config_file or DEFAULT_EXCLUSIONS_FILE, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        return cls(config.get('url_prefixes', []), config.get('path_prefixes', []),
+                   config.get('query_prefixes', {}), cache_size)
+
+    def is_excluded(self, url):
+        with self.lock:
+            result = self.cache.get(url)
+            if result is not None:
+                self.cache.move_to_end(url)
+                self.hits += 1
+                return result
+            self.misses += 1
+        result = self.pattern.match(url) is not None
+        with self.lock:
+            self.cache[url] = result
+            if len(self.cache) > self.cache_size:
+                self.cache.popitem(last=False)
+        return result
@@ -6,21 +6,65 @@ import time
 import urllib3
 from urllib.parse import urlparse, urljoin
 import logging
+from collections import namedtuple
 from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
 from urllib3.util.retry import Retry
+from metrics import MetricsRegistry
+
+# fetch_page 결과: not_modified가 True면 content는 HttpCache에 저장된 본문
+FetchResult = namedtuple('FetchResult', ['content', 'status', 'headers', 'not_modified'])
 
 class Fetcher:
-    def __init__(self, user_agents=None, logger=None):
+    def __init__(self, user_agents=None, logger=None, politeness_delay=(0.1, 0.5), cache=None, metrics=None):
         # 기본 User-Agent를 설정
         self.USER_AGENTS = user_agents or [
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
         ]
         self.logger = logger
+        # 성공한 요청 뒤의 지연 범위 (초). 호스트별 스케줄러를 쓰는 경우 None
+        self.politeness_delay = politeness_delay
+        # 조건부 GET에 사용할 HttpCache (없으면 항상 전체 본문을 받음)
+        self.cache = cache
+        # 호스트별 응답 상태 코드와 오류 종류 집계
+        self.metrics = metrics or MetricsRegistry()
+        self.responses = self.metrics.counter('fetch_responses_total', '호스트/상태 코드별 HTTP 응답 수', ('host', 'status'))
+        self.errors = self.metrics.counter('fetch_errors_total', '호스트/종류별 요청 실패 수 (timeout, request_error, gave_up, non_html)', ('host', 'kind'))
+        self.received_bytes = self.metrics.counter('fetch_bytes_total', '200 응답으로 받은 본문 바이트 수')
+
+    def record_response(self, url, status, content=None):
+        self.responses.inc(labels=(urlparse(url).netloc, str(status)))
+        if content:
+            self.received_bytes.inc(len(content))
 
-    def fetch_page_content(self, session, url, retries=10, backoff_factor=2, max_backoff=100, initial_timeout=30, max_total_timeout=200):
+    def record_error(self, url, kind):
+        self.errors.inc(labels=(urlparse(url).netloc, kind))
+
+    def build_headers(self, url):
         headers = {
             'User-Agent': random.choice(self.USER_AGENTS)
         }
+        if self.cache:
+            headers.update(self.cache.conditional_headers(url))
+        return headers
+
+    def not_modified_result(self, url, response_headers):
+        """304 응답에 대해 캐시된 본문으로 FetchResult 생성. 캐시가 비어 있으면 None"""
+        cached = self.cache.load(url) if self.cache else None
+        if cached is None:
+            return None
+        content, content_type = cached
+        headers = CaseInsensitiveDict(response_headers)
+        if 'Content-Type' not in headers:
+            headers['Content-Type'] = content_type
+        return FetchResult(content, 304, headers, True)
+
+    def fetch_page_content(self, session, url, **kwargs):
+        result = self.fetch_page(session, url, **kwargs)
+        return result.content if result else None
+
+    def fetch_page(self, session, url, retries=10, backoff_factor=2, max_backoff=100, initial_timeout=30, max_total_timeout=200):
+        headers = self.build_headers(url)
         attempt = 0
         backoff = backoff_factor  # 초기 대기 시간 (초)
         timeout = initial_timeout  # 타임아웃 시간
@@ -32,14 +76,30 @@ class Fetcher:
                 response = session.get(url, headers=headers, verify=False, allow_redirects=True, timeout=timeout)
                 elapsed_time = time.time() - start_time
                 total_time_spent += elapsed_time
+                self.record_response(url, response.status_code, response.content if response.status_code == 200 else None)
                 if response.status_code == 200:
                     content_type = response.headers.get('Content-Type', '').lower()
                     if 'text/html' in content_type:
-                        time.sleep(random.uniform(0.1, 0.5))  # 짧은 지연 시간 추가
-                        return response.content
+                        if self.cache:
+                            self.cache.store(url, response.headers, response.content)
+                        if self.politeness_delay:
+                            time.sleep(random.uniform(*self.politeness_delay))  # 짧은 지연 시간 추가
+                        return FetchResult(response.content, 200, response.headers, False)
                     else:
                         self.logger.warning(f"비HTML 컨텐츠 ({content_type}) for URL: {url}. 스킵합니다.")
+                        self.record_error(url, 'non_html')
                         return None
+                elif response.status_code == 304:
+                    # 변경되지 않은 페이지: 캐시된 본문 재사용 (실패로 취급하지 않음)
+                    result = self.not_modified_result(url, response.headers)
+                    if result:
+                        self.logger.debug(f"변경 없음 (304): {url}")
+                        return result
+                    # 캐시에 본문이 없으면 조건부 헤더 없이 다시 요청
+                    self.logger.warning(f"304 응답이지만 캐시된 본문이 없음: {url}. 전체 요청으로 재시도합니다.")
+                    headers.pop('If-None-Match', None)
+                    headers.pop('If-Modified-Since', None)
+                    attempt += 1
                 elif 500 <= response.status_code < 600:
                     # 서버 오류 시 재시도
                     attempt += 1
@@ -49,12 +109,14 @@ class Fetcher:
                     time.sleep(backoff)
                     backoff = min(backoff * 2, max_backoff)  # 지수 백오프 적용
                 else:
-                    # 클라이언트 오류: 로깅 후 재시도하지 않음
+                    # 클라이언트 오류: 로깅 후 재시도하지 않음 (재시도 끝에 포기한 gave_up과 구분하여 client_error로 기록)
                     self.logger.error(f"클라이언트 오류 {response.status_code} for URL: {url}. 재시도하지 않음.")
-                    break
+                    self.record_error(url, 'client_error')
+                    return None
             except requests.exceptions.Timeout as e:
                 # 타임아웃 예외 처리
                 attempt += 1
+                self.record_error(url, 'timeout')
                 elapsed_time = time.time() - start_time
                 total_time_spent += elapsed_time
                 self.logger.warning(f"타임아웃 발생 (Attempt {attempt}/{retries}): {url} - {e}")
@@ -65,6 +127,7 @@ class Fetcher:
             except requests.exceptions.RequestException as e:
                 # 기타 예외 처리
                 attempt += 1
+                self.record_error(url, 'request_error')
                 elapsed_time = time.time() - start_time
                 total_time_spent += elapsed_time
                 self.logger.warning(f"URL 요청 실패 (Attempt {attempt}/{retries}): {url} - {e}")
@@ -72,6 +135,7 @@ class Fetcher:
                     break
                 time.sleep(backoff)
                 backoff = min(backoff * 2, max_backoff)
+        self.record_error(url, 'gave_up')
         self.logger.error(f"{retries}번의 시도 또는 최대 대기 시간 {max_total_timeout}초 후에도 가져오지 못함: {url}")
         return None
 
@@ -0,0 +1,140 @@
+# frontier.py
+
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from collections import deque
+
+DEFAULT_FRONTIER_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config', 'frontier.json')
+
+# 변경 여부를 알 수 있는 페이지 처리 결과 (crawler.count_page 참고)
+CHANGED_RESULTS = ('saved',)
+UNCHANGED_RESULTS = ('not_modified', 'duplicate', 'near_duplicate')
+
+
+class ChangeStats:
+    """URL 유형별로 가져온 페이지 중 새 내용이 있었던 비율 (상태 파일에 함께 저장)"""
+
+    def __init__(self):
+        self.counts = {}  # 유형 -> [가져온 수, 변경된 수]
+        self.lock = threading.Lock()
+        self.dirty = False
+
+    def record(self, page_class, changed):
+        with self.lock:
+            counts = self.counts.setdefault(page_class, [0, 0])
+            counts[0] += 1
+            if changed:
+                counts[1] += 1
+            self.dirty = True
+
+    def rate(self, page_class):
+        """라플라스 보정한 변경 비율 (기록이 없으면 0.5)"""
+        fetched, changed = self.counts.get(page_class, (0, 0))
+        return (changed + 1) / (fetched + 2)
+
+    def to_state(self):
+        with self.lock:
+            self.dirty = False
+            return {page_class: list(counts) for page_class, counts in self.counts.items()}
+
+    def load_state(self, state):
+        with self.lock:
+            self.counts = {page_class: list(counts) for page_class, counts in (state or {}).items()}
+
+
+class UrlScorer:
+    """
+    Fetch 큐의 우선순위 점수 (클수록 먼저 가져옴).
+    점수 = URL 유형 가중치 + change_weight * 유형별 변경 비율 - depth_weight * 깊이.
+    호스트 선택 시에는 대기 URL 수에 따른 벌점(backlog_weight * log2(대기 수))을 추가로 적용합니다 (HostScheduler 참고).
+    """
+
+    def __init__(self, classes=(), default_class='static', default_weight=0.0, depth_weight=1.0,
+                 change_weight=10.0, backlog_weight=1.0):
+        self.classes = [(name, re.compile(pattern), float(weight)) for name, pattern, weight in classes]
+        self.default_class = default_class
+        self.default_weight = float(default_weight)
+        self.depth_weight = depth_weight
+        self.change_weight = change_weight
+        self.backlog_weight = backlog_weight
+        self.change_stats = ChangeStats()
+
+    @classmethod
+    def from_config(cls, config_file=None):
+        """우선순위 설정 파일(JSON)에서 생성"""
+        with open(config_file or DEFAULT_FRONTIER_FILE, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        classes = [(entry['name'], entry['pattern'], entry.get('weight', 0.0)) for entry in config.get('classes', [])]
+        return cls(classes, config.get('default_class', 'static'), config.get('default_weight', 0.0),
+                   config.get('depth_weight', 1.0), config.get('change_weight', 10.0), config.get('backlog_weight', 1.0))
+
+    def classify(self, url):
+        """(유형 이름, 유형 가중치). 먼저 일치하는 유형을 사용"""
+        for name, pattern, weight in self.classes:
+            if pattern.search(url):
+                return name, weight
+        return self.default_class, self.default_weight
+
+    def score(self, url, depth):
+        page_class, weight = self.classify(url)
+        return round(weight + self.change_weight * self.change_stats.rate(page_class) - self.depth_weight * depth, 3)
+
+    def backlog_penalty(self, backlog):
+        # 대기 수가 두 배가 될 때만 값이 바뀌도록 정수로 내림 (호스트 힙 재배치 횟수 제한)
+        return self.backlog_weight * int(math.log2(backlog)) if backlog > 0 else 0.0
+
+    def record_result(self, url, result):
+        """페이지 처리 결과로 유형별 변경 비율을 갱신 (빈 페이지, 파싱 오류는 반영하지 않음)"""
+        if result in CHANGED_RESULTS or result in UNCHANGED_RESULTS:
+            self.change_stats.record(self.classify(url)[0], result in CHANGED_RESULTS)
+
+
+class FifoHostQueue:
+    """호스트 하나의 대기열 (추가 순서대로 꺼냄)"""
+
+    def __init__(self):
+        self.items = deque()
+
+    def push(self, url, depth, score):
+        self.items.append((url, depth, score))
+
+    def pop(self):
+        return self.items.popleft()
+
+    def head_score(self):
+        return 0.0
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+
+class PriorityHostQueue:
+    """호스트 하나의 대기열 (점수가 높은 URL부터, 같으면 추가 순서대로 꺼냄)"""
+
+    def __init__(self):
+        self.heap = []
+        self.counter = 0
+
+    def push(self, url, depth, score):
+        self.counter += 1
+        heapq.heappush(self.heap, (-score, self.counter, url, depth))
+
+    def pop(self):
+        neg_score, _, url, depth = heapq.heappop(self.heap)
+        return url, depth, -neg_score
+
+    def head_score(self):
+        return -self.heap[0][0]
+
+    def __iter__(self):
+        return ((url, depth, -neg_score) for neg_score, _, url, depth in self.heap)
+
+    def __len__(self):
+        return len(self.heap)
@@ -0,0 +1,90 @@
+# http_cache.py
+
+import sqlite3
+import threading
+import time
+import zlib
+from utils import normalize_url
+
+class HttpCache:
+    """
+    재크롤링을 위한 HTTP 검증자(ETag / Last-Modified)와 본문 캐시.
+    정규화된 URL을 키로 SQLite 파일에 저장합니다.
+    """
+
+    def __init__(self, cache_file, logger, commit_every=50):
+        self.cache_file = cache_file
+        self.logger = logger
+        self.commit_every = commit_every
+        self.pending_writes = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(cache_file, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " url TEXT PRIMARY KEY,"
+            " etag TEXT,"
+            " last_modified TEXT,"
+            " content_type TEXT,"
+            " body BLOB,"
+            " fetched_at REAL)"
+        )
+        self.conn.commit()
+
+    def conditional_headers(self, url):
+        """저장된 검증자로 If-None-Match / If-Modified-Since 헤더 생성"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT etag, last_modified FROM entries WHERE url = ?", (normalize_url(url),)
+            ).fetchone()
+        headers = {}
+        if row:
+            etag, last_modified = row
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
+        return headers
+
+    def load(self, url):
+        """캐시된 (본문, Content-Type) 반환. 없으면 None"""
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT body, content_type FROM entries WHERE url = ?", (normalize_url(url),)
+            ).fetchone()
+        if not row or row[0] is None:
+            return None
+        try:
+            return zlib.decompress(row[0]), row[1]
+        except zlib.error as e:
+            self.logger.error(f"캐시 본문 손상 ({url}): {e}")
+            return None
+
+    def store(self, url, headers, content):
+        """200 응답의 검증자와 본문 저장 (검증자가 없는 응답은 저장하지 않음)"""
+        etag = headers.get('ETag')
+        last_modified = headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO entries (url, etag, last_modified, content_type, body, fetched_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (normalize_url(url), etag, last_modified, headers.get('Content-Type', ''),
+                 zlib.compress(content), time.time())
+            )
+            self.pending_writes += 1
+            if self.pending_writes >= self.commit_every:
+                self.conn.commit()
+                self.pending_writes = 0
+
+    def flush(self):
+        with self.lock:
+            self.conn.commit()
+            self.pending_writes = 0
+
+    def close(self):
+        self.flush()
+        with self.lock:
+            self.conn.close()
@@ -4,7 +4,14 @@ import logging
 from logging.handlers import RotatingFileHandler
 import urllib3
 import os
+from urllib.parse import urlparse
 from crawler import Crawler
+from politeness import HostScheduler
+from reparse import Reparser
+from archive import ArchiveReader
+from tracing import top_pages, format_top_pages
+from profiling import install_signal_toggle
+from cluster import run_cluster_node, launch_local_cluster
 
 # 로깅 설정
 logger = logging.getLogger('CrawlerLogger')
@@ -27,20 +34,16 @@ logger.addHandler(console_handler)
 # HTTPS 경고 무시 (주의: 실제 환경에서는 권장하지 않음)
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
-def main():
-    parser = argparse.ArgumentParser(description="웹 크롤러")
-    parser.add_argument('--start_url', type=str, default="https://www.yonsei.ac.kr/sc/admission/dep.jsp", help='시작할 URL')
-    parser.add_argument('--max_depth', type=int, default=None, help='크롤링 최대 깊이 (없으면 무한대)')
-    parser.add_argument('--fetch_threads', type=int, default=1, help='URL Fetch 스레드 수')
-    parser.add_argument('--parse_threads', type=int, default=3, help='페이지 파싱 스레드 수')
-    parser.add_argument('--save_interval', type=int, default=10, help='상태 저장 주기 (초)')
-    args = parser.parse_args()
-
+def crawler_options(args):
+    """명령줄 인자로 Crawler 생성자 인자(logger 제외)를 구성 (클러스터 노드 프로세스에도 그대로 전달)"""
     start_url = args.start_url
     max_depth = args.max_depth
     fetch_threads = args.fetch_threads
     parse_threads = args.parse_threads
     save_interval = args.save_interval
+    fetch_mode = args.fetch_mode
+    async_concurrency = args.async_concurrency
+    host_rules = HostScheduler.load_rules(args.politeness_config) if args.politeness_config else None
 
     # 파일 경로 설정
     original_dir = 'original_data'
@@ -50,8 +53,7 @@ def main():
     os.makedirs(state_dir, exist_ok=True)
     state_file = os.path.join(state_dir, 'crawler_state.json')
 
-    # 크롤러 인스턴스 생성
-    crawler = Crawler(
+    return dict(
         start_url=start_url,
         max_depth=max_depth,
         fetch_threads=fetch_threads,
@@ -80,9 +82,176 @@ def main():
         ],
         original_file=original_file,
         state_file=state_file,
-        logger=logger
+        fetch_mode=fetch_mode,
+        async_concurrency=async_concurrency,
+        host_rate=args.host_rate,
+        host_burst=args.host_burst,
+        host_rules=host_rules,
+        http_cache_file=args.http_cache,
+        reparse_unchanged=args.reparse_unchanged,
+        parse_mode=args.parse_mode,
+        parse_processes=args.parse_processes,
+        membership=args.membership,
+        bloom_error_rate=args.bloom_error_rate,
+        near_duplicate_threshold=args.near_duplicate_threshold,
+        parse_queue_bytes=args.parse_queue_mb * 1024 * 1024,
+        exclusion_config=args.exclusion_config,
+        output_batch_size=args.output_batch_size,
+        output_flush_interval=args.output_flush_interval,
+        output_fsync=args.output_fsync,
+        output_compression=args.output_compression,
+        output_queue_bytes=args.output_queue_mb * 1024 * 1024,
+        archive_dir=args.archive_dir,
+        idle_timeout=args.idle_timeout,
+        metrics_port=args.metrics_port,
+        stats_file=args.stats_file,
+        stats_interval=args.stats_interval,
+        trace_file=args.trace_file,
+        trace_sample=args.trace_sample,
+        trace_top=args.trace_top,
+        profile_control_file=args.profile_control_file,
+        profile_dir=args.profile_dir,
+        profile_sample=args.profile_sample,
+        frontier=args.frontier,
+        frontier_config=args.frontier_config,
+        max_runtime=args.max_runtime
     )
 
+def reparse_options(args, parser):
+    """
+    reparse의 시작 URL, 근접 중복 기준, 출력 압축 방식.
+    reparse 뒤에 지정한 값 > reparse 앞에 기본값과 다르게 지정한 값 > 아카이브에 기록된 크롤링 설정 > 기본값 순으로 사용
+    """
+    reader = ArchiveReader(args.archive_dir)
+    try:
+        settings = reader.settings()
+    finally:
+        reader.close()
+    options = {}
+    for name in ('start_url', 'near_duplicate_threshold', 'output_compression'):
+        value = getattr(args, 'reparse_' + name)
+        if value is None:
+            value = getattr(args, name)
+            if value == parser.get_default(name) and name in settings:
+                value = settings[name]
+        options[name] = value
+    return options
+
+def main():
+    parser = argparse.ArgumentParser(description="웹 크롤러")
+    parser.add_argument('--start_url', type=str, default="https://www.yonsei.ac.kr/sc/admission/dep.jsp", help='시작할 URL')
+    parser.add_argument('--max_depth', type=int, default=None, help='크롤링 최대 깊이 (없으면 무한대)')
+    parser.add_argument('--fetch_threads', type=int, default=1, help='URL Fetch 스레드 수')
+    parser.add_argument('--parse_threads', type=int, default=3, help='페이지 파싱 스레드 수')
+    parser.add_argument('--parse_mode', type=str, default='thread', choices=['thread', 'process'], help='파싱 단계 실행 방식 (thread: 스레드, process: 프로세스 풀)')
+    parser.add_argument('--parse_processes', type=int, default=None, help='process 모드의 파싱 프로세스 수 (기본값: CPU 코어 수)')
+    parser.add_argument('--membership', type=str, default='exact', choices=['exact', 'compact', 'bloom'], help='방문/파싱/본문 해시 집합 방식 (exact: 문자열 set, compact: 64비트 다이제스트, bloom: 블룸 필터)')
+    parser.add_argument('--bloom_error_rate', type=float, default=0.001, help='bloom 모드의 목표 오탐률')
+    parser.add_argument('--near_duplicate_threshold', type=float, default=0.0, help='본문 shingle의 자카드 유사도(MinHash 추정)가 이 값 이상인 페이지는 근접 중복으로 저장하지 않음 (기본값 0: 사용 안 함, 권장값: 0.9)')
+    parser.add_argument('--parse_queue_mb', type=int, default=128, help='Parse 큐에 쌓을 수 있는 원본 HTML의 최대 크기 (MB). 가득 차면 Fetch 스레드가 대기')
+    parser.add_argument('--output_batch_size', type=int, default=100, help='원본 데이터를 한 번에 기록할 최대 페이지 수')
+    parser.add_argument('--output_flush_interval', type=float, default=1.0, help='원본 데이터를 모아 두는 최대 시간 (초)')
+    parser.add_argument('--output_fsync', type=str, default='never', choices=['never', 'batch', 'interval'], help='원본 데이터 fsync 방식 (never: OS에 맡김, batch: 기록할 때마다, interval: 5초마다 최대 한 번)')
+    parser.add_argument('--output_queue_mb', type=int, default=64, help='쓰기 스레드가 아직 기록하지 않은 원본 데이터의 최대 크기 (MB). 가득 차면 파싱 스레드가 대기')
+    parser.add_argument('--output_compression', type=str, default=None, choices=['gzip', 'zstd'], help='원본 데이터 압축 방식 (없으면 압축 안 함, zstd는 zstandard 필요)')
+    parser.add_argument('--frontier', type=str, default='priority', choices=['priority', 'fifo'], help='Fetch 큐 순서 (priority: URL 유형/깊이/변경 비율 점수 순, fifo: 발견한 순서)')
+    parser.add_argument('--frontier_config', type=str, default=None, help='priority 모드의 URL 유형별 가중치 설정 파일 (JSON, 기본값: config/frontier.json)')
+    parser.add_argument('--max_runtime', type=int, default=None, help='이 시간(초)이 지나면 크롤링 종료 (남은 큐는 상태 파일에 저장, 없으면 제한 없음)')
+    parser.add_argument('--idle_timeout', type=int, default=120, help='큐가 이 시간(초) 이상 비어 있으면 크롤링 종료')
+    parser.add_argument('--save_interval', type=int, default=10, help='상태 저장 주기 (초)')
+    parser.add_argument('--fetch_mode', type=str, default='thread', choices=['thread', 'async'], help='Fetch 엔진 (thread: 스레드당 세션, async: asyncio 이벤트 루프)')
+    parser.add_argument('--async_concurrency', type=int, default=200, help='async 모드에서 동시에 처리할 요청 수')
+    parser.add_argument('--host_rate', type=float, default=2.0, help='호스트별 초당 요청 수 (기본값)')
+    parser.add_argument('--host_burst', type=int, default=2, help='호스트별 연속 요청 허용 수 (기본값)')
+    parser.add_argument('--politeness_config', type=str, default=None, help='호스트 패턴별 rate/burst 설정 파일 (JSON)')
+    parser.add_argument('--exclusion_config', type=str, default=None, help='제외할 URL/경로/쿼리 접두사 설정 파일 (JSON, 기본값: config/exclusions.json)')
+    parser.add_argument('--metrics_port', type=int, default=None, help='지표 HTTP 엔드포인트 포트 (127.0.0.1, /metrics: 텍스트, /metrics.json: JSON, 없으면 사용 안 함)')
+    parser.add_argument('--stats_file', type=str, default=None, help='지표 스냅샷을 주기적으로 추가할 JSONL 파일 (없으면 사용 안 함)')
+    parser.add_argument('--stats_interval', type=int, default=10, help='--stats_file 기록 주기 (초)')
+    parser.add_argument('--trace_file', type=str, default=None, help='페이지별 단계 span을 기록할 JSONL 파일 (없으면 추적 안 함)')
+    parser.add_argument('--trace_sample', type=float, default=1.0, help='추적할 URL 비율 (0~1)')
+    parser.add_argument('--trace_top', type=int, default=20, help='종료 시 로그로 남길 가장 느린 페이지 수')
+    parser.add_argument('--profile_control_file', type=str, default=os.path.join('crawler_state', 'profile.on'), help='이 파일이 있는 동안 파싱 단계를 cProfile로 표본 측정 (SIGUSR1로 생성/삭제 전환)')
+    parser.add_argument('--profile_dir', type=str, default='profiles', help='파싱 프로파일(.prof)을 기록할 폴더')
+    parser.add_argument('--profile_sample', type=float, default=0.1, help='프로파일링이 켜져 있을 때 측정할 페이지 비율 (0~1)')
+    parser.add_argument('--archive_dir', type=str, default=None, help='가져온 응답의 원본 HTML을 WARC 세그먼트로 보관할 폴더 (없으면 보관 안 함)')
+    parser.add_argument('--http_cache', type=str, default=None, help='조건부 GET(ETag/Last-Modified) 캐시 파일 경로 (없으면 사용 안 함)')
+    parser.add_argument('--reparse_unchanged', action='store_true', help='304 응답 페이지도 캐시된 본문으로 다시 파싱')
+
+    # 하위 명령: reparse (아카이브의 원본 HTML을 네트워크 없이 다시 파싱)
+    subparsers = parser.add_subparsers(dest='command')
+    reparse_parser = subparsers.add_parser('reparse', help='--archive_dir에 보관된 원본 HTML로 원본 데이터를 다시 생성')
+    reparse_parser.add_argument('--archive_dir', type=str, required=True, help='크롤링 시 --archive_dir로 지정한 아카이브 폴더')
+    reparse_parser.add_argument('--output_file', type=str, default=os.path.join('original_data', 'reparsed_data.jsonl'), help='다시 생성할 원본 데이터 파일 (기존 파일은 덮어씀)')
+    reparse_parser.add_argument('--diff', type=str, nargs='+', default=None, help='비교할 이전 출력 파일 (교체된 파일이 여러 개면 오래된 순으로)')
+    reparse_parser.add_argument('--diff_output', type=str, default=None, help='URL별 추가/삭제/변경 목록 파일 (기본값: <output_file>.diff.jsonl)')
+    reparse_parser.add_argument('--processes', type=int, default=None, help='파싱 프로세스 수 (기본값: CPU 코어 수)')
+    reparse_parser.add_argument('--start_url', dest='reparse_start_url', type=str, default=None, help='링크/파일의 base_domain을 정할 시작 URL (기본값: 아카이브에 기록된 크롤링 설정)')
+    reparse_parser.add_argument('--near_duplicate_threshold', dest='reparse_near_duplicate_threshold', type=float, default=None, help='근접 중복 기준 (기본값: 아카이브에 기록된 크롤링 설정, 0: 사용 안 함)')
+    reparse_parser.add_argument('--output_compression', dest='reparse_output_compression', type=str, default=None, choices=['gzip', 'zstd'], help='출력 압축 방식 (기본값: 아카이브에 기록된 크롤링 설정)')
+
+    # 하위 명령: trace_report (추적 파일에서 가장 느린 페이지 목록 출력)
+    trace_parser = subparsers.add_parser('trace_report', help='--trace_file 기록에서 처리 시간이 가장 긴 페이지 목록을 출력')
+    trace_parser.add_argument('trace_files', type=str, nargs='+', help='크롤링 시 --trace_file로 지정한 파일')
+    trace_parser.add_argument('--top', type=int, default=20, help='출력할 페이지 수')
+
+    # 하위 명령: cluster (노드마다 URL 고유 식별자의 해시 구간 또는 호스트 집합을 맡아 크롤링)
+    cluster_parser = subparsers.add_parser('cluster', help='URL 공간을 나눠 여러 노드 프로세스로 크롤링 (본문 중복 제거는 노드별로만 이루어지므로 단독 실행보다 저장 레코드가 많을 수 있음)')
+    cluster_parser.add_argument('--nodes', type=int, default=2, help='전체 노드 수')
+    cluster_parser.add_argument('--cluster_dir', type=str, default='cluster', help='노드별 출력/상태와 링크 전달 폴더 (여러 머신이면 공유 파일 시스템)')
+    cluster_parser.add_argument('--node_id', type=int, default=None, help='이 프로세스에서 실행할 노드 번호 (없으면 이 머신에서 모든 노드를 실행)')
+    cluster_parser.add_argument('--partition', type=str, default='hash', choices=['hash', 'host'], help='URL 담당 노드 결정 방식 (hash: 고유 식별자 해시, host: netloc 단위)')
+    cluster_parser.add_argument('--host_partitions', type=str, default=None, help='host 분할에서 노드에 순서대로 배정할 호스트 그룹 설정 파일 (JSON, 기본값: config/host_partitions.json)')
+    cluster_parser.add_argument('--transport', type=str, default='spool', choices=['spool', 'queue'], help='노드 간 링크 전달 방식 (spool: 노드 폴더의 파일, queue: 프로세스 간 큐, 한 머신에서만)')
+    args = parser.parse_args()
+
+    if args.command == 'trace_report':
+        for line in format_top_pages(top_pages(args.trace_files, args.top)):
+            print(line)
+        return
+
+    if args.command == 'reparse':
+        options = reparse_options(args, parser)
+        logger.info(f"재파싱 설정: {options}")
+        reparser = Reparser(
+            archive_dir=args.archive_dir,
+            output_file=args.output_file,
+            logger=logger,
+            base_domain=urlparse(options['start_url']).netloc.lower(),
+            processes=args.processes,
+            near_duplicate_threshold=options['near_duplicate_threshold'],
+            output_compression=options['output_compression'],
+            previous_files=args.diff,
+            diff_file=args.diff_output
+        )
+        reparser.run()
+        return
+
+    options = crawler_options(args)
+
+    # 하위 명령: cluster (URL 공간을 나눠 여러 노드 프로세스로 크롤링)
+    if args.command == 'cluster':
+        if args.node_id is not None:
+            if args.transport == 'queue':
+                parser.error('--transport queue는 한 머신에서 모든 노드를 실행할 때만 사용할 수 있습니다. (--node_id 없이 실행)')
+            # 여러 머신: 공유 파일 시스템의 --cluster_dir을 지정하고 머신마다 노드 번호를 달리하여 실행
+            run_cluster_node(args.node_id, args.nodes, args.cluster_dir, options,
+                             partition=args.partition, host_partitions=args.host_partitions)
+            return
+        if not launch_local_cluster(args.nodes, args.cluster_dir, options, logger, partition=args.partition,
+                                    host_partitions=args.host_partitions, transport=args.transport):
+            sys.exit(1)
+        return
+
+    # 크롤러 인스턴스 생성
+    crawler = Crawler(logger=logger, **options)
+
+    # 재시작 없이 파싱 프로파일링을 켜고 끌 수 있도록 SIGUSR1 처리기 등록
+    if args.profile_control_file:
+        if os.path.exists(args.profile_control_file):
+            logger.info(f"프로파일링 제어 파일이 있어 파싱 프로파일링을 켠 상태로 시작합니다: {args.profile_control_file}")
+        install_signal_toggle(args.profile_control_file, logger)
+
     # 크롤링 시작
     crawler.run()
 
@@ -0,0 +1,270 @@
+# membership.py
+
+import hashlib
+import math
+import struct
+import sys
+import threading
+from array import array
+from state_manager import TrackedSet
+
+def item_digest(item):
+    """URL/해시 문자열의 64비트 다이제스트 (0은 빈 슬롯 표시로 쓰므로 1로 대체)"""
+    digest = int.from_bytes(hashlib.blake2b(item.encode('utf-8'), digest_size=8).digest(), 'little')
+    return digest or 1
+
+def _digests_to_bytes(digests):
+    packed = array('Q', digests)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed.tobytes()
+
+def _digests_from_bytes(data):
+    packed = array('Q')
+    packed.frombytes(data)
+    if sys.byteorder == 'big':
+        packed.byteswap()
+    return packed
+
+
+class DigestSet:
+    """
+    원소 대신 64비트 다이제스트만 저장하는 오픈 어드레싱 해시 테이블 (선형 탐사).
+    원소당 약 8 / 적재율 바이트를 사용하며, 서로 다른 원소가 같은 다이제스트를 가질 확률은
+    1천만 개에서도 백만분의 수 수준입니다. 원래 문자열은 복원할 수 없습니다.
+    """
+
+    kind = 'digest'
+
+    def __init__(self, capacity=1 << 16, max_load=0.7):
+        self.max_load = max_load
+        size = 1
+        while size * max_load < capacity:
+            size <<= 1
+        self.slots = (array('Q', bytes(8 * size)), size - 1)  # (테이블, 마스크) - 한 번에 교체
+        self.count = 0
+        self.added = array('Q')  # 체크포인트 이후 추가된 다이제스트 (int 객체 대신 8바이트씩 저장)
+        self.lock = threading.Lock()
+
+    def _insert(self, digest):
+        table, mask = self.slots
+        i = digest & mask
+        while table[i]:
+            if table[i] == digest:
+                return False
+            i = (i + 1) & mask
+        table[i] = digest
+        self.count += 1
+        if self.count > self.max_load * (mask + 1):
+            self._resize()
+        return True
+
+    def _resize(self):
+        old_table, old_mask = self.slots
+        size = (old_mask + 1) * 2
+        table = array('Q', bytes(8 * size))
+        mask = size - 1
+        for digest in old_table:
+            if digest:
+                i = digest & mask
+                while table[i]:
+                    i = (i + 1) & mask
+                table[i] = digest
+        self.slots = (table, mask)
+
+    def contains_digest(self, digest):
+        table, mask = self.slots
+        i = digest & mask
+        while table[i]:
+            if table[i] == digest:
+                return True
+            i = (i + 1) & mask
+        return False
+
+    def add(self, item):
+        digest = item_digest(item)
+        with self.lock:
+            if self._insert(digest):
+                self.added.append(digest)
+
+    def __contains__(self, item):
+        return self.contains_digest(item_digest(item))
+
+    def __len__(self):
+        return self.count
+
+    def drain_added(self):
+        """마지막 체크포인트 이후 추가된 다이제스트 목록을 반환하고 기록을 비움"""
+        with self.lock:
+            added, self.added = self.added, array('Q')
+        return added
+
+    def load_items(self, items):
+        """저장된 상태에서 원소를 불러옴 (저널에 다시 기록하지 않음)"""
+        with self.lock:
+            for item in items:
+                self._insert(item_digest(item))
+
+    def load_digests(self, digests):
+        with self.lock:
+            for digest in digests:
+                self._insert(digest)
+
+    def nbytes(self):
+        table, _ = self.slots
+        return table.itemsize * len(table)
+
+    def to_bytes(self):
+        table, _ = self.slots
+        with self.lock:
+            return struct.pack('<4sQ', b'DGS1', self.count) + _digests_to_bytes(d for d in table if d)
+
+    def load_snapshot(self, kind, data):
+        if kind != 'digest':
+            raise ValueError(f"{kind} 형식의 스냅샷은 DigestSet으로 불러올 수 없습니다.")
+        magic, count = struct.unpack_from('<4sQ', data)
+        self.load_digests(_digests_from_bytes(data[12:12 + 8 * count]))
+
+
+class BloomFilter:
+    """고정 크기 블룸 필터 (64비트 다이제스트에서 이중 해싱으로 k개 위치 계산)"""
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        self.num_hashes = max(1, int(math.ceil(-math.log2(error_rate))))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def add_digest(self, digest):
+        bits, m = self.bits, self.num_bits
+        pos = digest % m
+        step = (digest >> 32) % (m - 1) + 1
+        for _ in range(self.num_hashes):
+            bits[pos >> 3] |= 1 << (pos & 7)
+            pos += step
+            if pos >= m:
+                pos -= m
+        self.count += 1
+
+    def contains_digest(self, digest):
+        bits, m = self.bits, self.num_bits
+        pos = digest % m
+        step = (digest >> 32) % (m - 1) + 1
+        for _ in range(self.num_hashes):
+            if not bits[pos >> 3] & (1 << (pos & 7)):
+                return False
+            pos += step
+            if pos >= m:
+                pos -= m
+        return True
+
+
+class ScalableBloomFilter:
+    """
+    가득 차면 더 큰 필터를 추가하는 블룸 필터 (Almeida et al.).
+    필터마다 오탐률을 tightening 비율로 줄여 전체 오탐률이 error_rate를 넘지 않도록 합니다.
+    오탐(실제로 없는데 있다고 판단)이 발생할 수 있으므로 메모리를 더 줄여야 할 때만 사용합니다.
+    """
+
+    kind = 'bloom'
+
+    def __init__(self, error_rate=0.001, initial_capacity=1 << 16, growth=2, tightening=0.5):
+        self.error_rate = error_rate
+        self.initial_capacity = initial_capacity
+        self.growth = growth
+        self.tightening = tightening
+        self.filters = []
+        self.added = array('Q')  # 체크포인트 이후 추가된 다이제스트 (int 객체 대신 8바이트씩 저장)
+        self.lock = threading.Lock()
+
+    def _current_filter(self):
+        if not self.filters or self.filters[-1].count >= self.filters[-1].capacity:
+            n = len(self.filters)
+            capacity = self.initial_capacity * (self.growth ** n)
+            error = self.error_rate * (1 - self.tightening) * (self.tightening ** n)
+            self.filters.append(BloomFilter(capacity, error))
+        return self.filters[-1]
+
+    def contains_digest(self, digest):
+        return any(f.contains_digest(digest) for f in reversed(self.filters))
+
+    def _insert(self, digest):
+        if self.contains_digest(digest):
+            return False
+        self._current_filter().add_digest(digest)
+        return True
+
+    def add(self, item):
+        digest = item_digest(item)
+        with self.lock:
+            if self._insert(digest):
+                self.added.append(digest)
+
+    def __contains__(self, item):
+        return self.contains_digest(item_digest(item))
+
+    def __len__(self):
+        return sum(f.count for f in self.filters)
+
+    def drain_added(self):
+        with self.lock:
+            added, self.added = self.added, array('Q')
+        return added
+
+    def load_items(self, items):
+        with self.lock:
+            for item in items:
+                self._insert(item_digest(item))
+
+    def load_digests(self, digests):
+        with self.lock:
+            for digest in digests:
+                self._insert(digest)
+
+    def nbytes(self):
+        return sum(len(f.bits) for f in self.filters)
+
+    def to_bytes(self):
+        with self.lock:
+            parts = [struct.pack('<4sdQdI', b'SBF1', self.error_rate, self.initial_capacity, self.tightening, len(self.filters))]
+            for f in self.filters:
+                parts.append(struct.pack('<QdQIQ', f.capacity, f.error_rate, f.num_bits, f.num_hashes, f.count))
+                parts.append(bytes(f.bits))
+        return b''.join(parts)
+
+    def load_snapshot(self, kind, data):
+        if kind == 'digest':
+            # DigestSet 스냅샷은 다이제스트를 그대로 추가하여 변환
+            magic, count = struct.unpack_from('<4sQ', data)
+            self.load_digests(_digests_from_bytes(data[12:12 + 8 * count]))
+            return
+        if kind != 'bloom':
+            raise ValueError(f"{kind} 형식의 스냅샷은 ScalableBloomFilter로 불러올 수 없습니다.")
+        header = struct.calcsize('<4sdQdI')
+        _, _, _, _, num_filters = struct.unpack_from('<4sdQdI', data)
+        offset = header
+        filters = []
+        for _ in range(num_filters):
+            capacity, error, num_bits, num_hashes, count = struct.unpack_from('<QdQIQ', data, offset)
+            offset += struct.calcsize('<QdQIQ')
+            f = BloomFilter(capacity, error)
+            f.num_bits, f.num_hashes, f.count = num_bits, num_hashes, count
+            f.bits = bytearray(data[offset:offset + (num_bits + 7) // 8])
+            offset += len(f.bits)
+            filters.append(f)
+        with self.lock:
+            self.filters = filters
+
+
+def make_membership_set(mode='exact', error_rate=0.001):
+    """
+    방문/파싱/식별자/본문 해시 집합 생성.
+    exact: 원래 문자열을 저장하는 set, compact: 64비트 다이제스트 테이블, bloom: 확장형 블룸 필터
+    """
+    if mode == 'compact':
+        return DigestSet()
+    if mode == 'bloom':
+        return ScalableBloomFilter(error_rate)
+    return TrackedSet()
@@ -0,0 +1,263 @@
+# metrics.py
+
+import bisect
+import json
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 지연 시간 히스토그램의 기본 구간 상한 (초)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def sample_name(name, label_names, label_values):
+    """Prometheus 텍스트 형식의 표본 이름 (예: fetch_responses_total{host="a",status="200"})"""
+    if not label_names:
+        return name
+    labels = ','.join(f'{key}="{str(value).replace(chr(34), "")}"' for key, value in zip(label_names, label_values))
+    return f"{name}{{{labels}}}"
+
+
+class Metric:
+    type_name = None
+
+    def __init__(self, name, help_text, label_names=()):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.lock = threading.Lock()
+        self.values = {}  # 레이블 값 튜플 -> 값
+
+    def samples(self):
+        """[(표본 이름, 값), ...]"""
+        with self.lock:
+            items = list(self.values.items())
+        return [(sample_name(self.name, self.label_names, labels), value) for labels, value in sorted(items, key=lambda item: item[0])]
+
+
+class Counter(Metric):
+    type_name = 'counter'
+
+    def inc(self, amount=1, labels=()):
+        with self.lock:
+            self.values[labels] = self.values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    """set()으로 값을 바꾸거나, func를 주면 조회할 때마다 func()의 값을 사용 (큐 길이 등)"""
+    type_name = 'gauge'
+
+    def __init__(self, name, help_text, label_names=(), func=None):
+        super().__init__(name, help_text, label_names)
+        self.func = func
+
+    def set(self, value, labels=()):
+        with self.lock:
+            self.values[labels] = value
+
+    def samples(self):
+        if self.func is not None:
+            try:
+                return [(self.name, self.func())]
+            except Exception:
+                return []
+        return super().samples()
+
+
+class Histogram(Metric):
+    """고정 구간 히스토그램. 분위수는 구간 안에서 선형 보간한 추정값입니다."""
+    type_name = 'histogram'
+
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, label_names)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, labels=()):
+        index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            state = self.values.get(labels)
+            if state is None:
+                # [구간별 개수..., +Inf 개수, 합계, 개수]
+                state = self.values[labels] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            state[index] += 1
+            state[-2] += value
+            state[-1] += 1
+
+    @contextmanager
+    def time(self, labels=()):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, labels)
+
+    def quantile(self, state, q):
+        count = state[-1]
+        if not count:
+            return 0.0
+        rank = q * count
+        cumulative = 0
+        for i, bucket_count in enumerate(state[:len(self.buckets) + 1]):
+            if cumulative + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else lower
+                return lower + (upper - lower) * (rank - cumulative) / bucket_count
+            cumulative += bucket_count
+        return self.buckets[-1]
+
+    def summaries(self):
+        """[(표본 이름, {count, sum, p50, p90, p99}), ...]"""
+        with self.lock:
+            items = [(labels, list(state)) for labels, state in self.values.items()]
+        return [(sample_name(self.name, self.label_names, labels), {
+            "count": state[-1],
+            "sum": round(state[-2], 6),
+            "p50": round(self.quantile(state, 0.5), 6),
+            "p90": round(self.quantile(state, 0.9), 6),
+            "p99": round(self.quantile(state, 0.99), 6),
+        }) for labels, state in sorted(items, key=lambda item: item[0])]
+
+    def text_lines(self):
+        with self.lock:
+            items = [(labels, list(state)) for labels, state in self.values.items()]
+        lines = []
+        for labels, state in sorted(items, key=lambda item: item[0]):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + ('+Inf',), state):
+                cumulative += bucket_count
+                lines.append(f"{sample_name(self.name + '_bucket', self.label_names + ('le',), labels + (bound,))} {cumulative}")
+            lines.append(f"{sample_name(self.name + '_sum', self.label_names, labels)} {state[-2]}")
+            lines.append(f"{sample_name(self.name + '_count', self.label_names, labels)} {state[-1]}")
+        return lines
+
+
+class MetricsRegistry:
+    """
+    크롤링 단계별 카운터/게이지/지연 시간 히스토그램 모음.
+    같은 이름으로 다시 요청하면 이미 만든 지표를 돌려주므로 여러 객체(Fetcher, AsyncFetcher 등)가 공유할 수 있습니다.
+    """
+
+    def __init__(self):
+        self.metrics = {}
+        self.lock = threading.Lock()
+        self.started_at = time.time()
+
+    def _get_or_create(self, cls, name, help_text, label_names, **kwargs):
+        with self.lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, help_text, label_names, **kwargs)
+            elif not isinstance(metric, cls):
+                raise ValueError(f"지표 {name}은(는) 이미 {metric.type_name}(으)로 등록되어 있습니다")
+            return metric
+
+    def counter(self, name, help_text, label_names=()):
+        return self._get_or_create(Counter, name, help_text, label_names)
+
+    def gauge(self, name, help_text, label_names=(), func=None):
+        gauge = self._get_or_create(Gauge, name, help_text, label_names)
+        if func is not None:
+            gauge.func = func
+        return gauge
+
+    def histogram(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        return self._get_or_create(Histogram, name, help_text, label_names, buckets=buckets)
+
+    def snapshot(self):
+        """stats JSONL 한 줄에 기록할 현재 값"""
+        with self.lock:
+            metrics = list(self.metrics.values())
+        snapshot = {"timestamp": round(time.time(), 3), "uptime": round(time.time() - self.started_at, 3),
+                    "counters": {}, "gauges": {}, "histograms": {}}
+        for metric in metrics:
+            if isinstance(metric, Histogram):
+                snapshot["histograms"].update(metric.summaries())
+            else:
+                snapshot[metric.type_name + 's'].update(metric.samples())
+        return snapshot
+
+    def render_text(self):
+        """Prometheus 텍스트 형식"""
+        with self.lock:
+            metrics = sorted(self.metrics.values(), key=lambda metric: metric.name)
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {metric.help_text}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            if isinstance(metric, Histogram):
+                lines.extend(metric.text_lines())
+            else:
+                lines.extend(f"{name} {value}" for name, value in metric.samples())
+        return '\n'.join(lines) + '\n'
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        registry = self.server.registry
+        if self.path in ('/', '/metrics'):
+            body, content_type = registry.render_text().encode('utf-8'), 'text/plain; version=0.0.4; charset=utf-8'
+        elif self.path == '/metrics.json':
+            body, content_type = json.dumps(registry.snapshot(), ensure_ascii=False).encode('utf-8'), 'application/json'
+        else:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # 요청 로그 출력 생략
+
+
+class MetricsServer(ThreadingHTTPServer):
+    """로컬 HTTP 지표 엔드포인트 (/metrics: 텍스트, /metrics.json: JSON)"""
+    daemon_threads = True
+
+    def __init__(self, registry, port, host='127.0.0.1'):
+        super().__init__((host, port), MetricsHandler)
+        self.registry = registry
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.serve_forever, name="MetricsServer", daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+class StatsWriter:
+    """interval초마다 지표 스냅샷을 JSONL 파일에 한 줄씩 추가하는 스레드"""
+
+    def __init__(self, registry, stats_file, interval, logger):
+        self.registry = registry
+        self.stats_file = stats_file
+        self.interval = interval
+        self.logger = logger
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="StatsWriter", daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def write(self):
+        try:
+            with open(self.stats_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(self.registry.snapshot(), ensure_ascii=False) + '\n')
+        except OSError as e:
+            self.logger.error(f"지표 기록 실패: {e}")
+
+    def run(self):
+        while not self.stop_event.wait(self.interval):
+            self.write()
+
+    def stop(self):
+        """마지막 스냅샷을 기록하고 종료"""
+        self.stop_event.set()
+        self.thread.join()
+        self.write()
@@ -0,0 +1,143 @@
+# near_duplicate.py
+
+import base64
+import hashlib
+import threading
+from array import array
+
+MAX_HASH = (1 << 32) - 1
+EMPTY_BIN_OFFSET = 0x9e3779b1  # 빈 구간을 채울 때 거리마다 더하는 값 (구간 간 값이 겹치지 않도록)
+
+def shingle_hash(shingle):
+    return int.from_bytes(hashlib.blake2b(shingle.encode('utf-8'), digest_size=8).digest(), 'little')
+
+def band_probability(similarity, bands, rows):
+    """자카드 유사도가 similarity인 두 문서가 적어도 한 밴드에서 일치할 확률"""
+    return 1 - (1 - similarity ** rows) ** bands
+
+def optimal_bands(threshold, num_perm, false_positive_weight=0.1, steps=100):
+    """
+    threshold 아래의 후보(오검출)와 위의 누락(미검출) 확률 면적의 가중 합이 가장 작은 (밴드 수, 밴드당 행 수).
+    후보는 서명 유사도로 다시 확인하므로 누락 쪽에 더 큰 가중치를 둡니다.
+    """
+    best = None
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        false_positive = sum(band_probability(threshold * i / steps, bands, rows) for i in range(steps)) * threshold / steps
+        false_negative = sum(1 - band_probability(threshold + (1 - threshold) * i / steps, bands, rows)
+                             for i in range(steps)) * (1 - threshold) / steps
+        error = false_positive_weight * false_positive + (1 - false_positive_weight) * false_negative
+        if best is None or error < best[0]:
+            best = (error, bands, rows)
+    return best[1], best[2]
+
+
+class MinHashIndex:
+    """
+    본문 단어 shingle 집합의 MinHash LSH 색인 (근접 중복 검사).
+    서명은 shingle마다 해시를 한 번만 계산하는 one permutation hashing으로 만들고(빈 구간은 오른쪽 구간 값으로 채움),
+    서명을 밴드로 나누어 밴드별 사전 조회로 후보를 찾으며(페이지 수와 무관한 상수 시간),
+    후보는 서명으로 추정한 자카드 유사도가 threshold 이상일 때만 중복으로 판정합니다.
+    상태 저장을 위해 TrackedSet과 같은 add/drain_added/load_items 인터페이스를 제공합니다 (원소는 base64 서명).
+    """
+
+    def __init__(self, threshold=0.9, num_perm=128, shingle_size=3, min_tokens=8):
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.min_tokens = min_tokens  # 이보다 짧은 본문은 추정이 불안정하므로 검사하지 않음
+        self.bands, self.rows = optimal_bands(threshold, num_perm)
+        self.signatures = array('I')  # 모든 서명을 이어 붙여 저장 (페이지 i의 서명은 [i * num_perm, (i + 1) * num_perm))
+        self.buckets = {}  # 밴드 키 -> 페이지 번호 또는 페이지 번호 목록
+        self.added = []
+        self.lock = threading.Lock()
+
+    def signature(self, text):
+        """정규화된 본문의 MinHash 서명. 단어 수가 min_tokens 미만이면 None"""
+        words = text.split()
+        if len(words) < self.min_tokens:
+            return None
+        n, k = self.shingle_size, self.num_perm
+        bins = [None] * k
+        for h in {shingle_hash(' '.join(words[i:i + n])) for i in range(len(words) - n + 1)}:
+            # 해시의 나머지로 구간을, 몫으로 구간 안의 값을 정함
+            b, value = h % k, (h // k) & MAX_HASH
+            if bins[b] is None or value < bins[b]:
+                bins[b] = value
+        signature = array('I', bytes(4 * k))
+        for i in range(k):
+            # 빈 구간은 오른쪽으로 가장 가까운 값이 있는 구간의 값을 거리만큼 바꿔서 사용 (rotation densification)
+            distance = 0
+            while bins[(i + distance) % k] is None:
+                distance += 1
+            signature[i] = (bins[(i + distance) % k] + distance * EMPTY_BIN_OFFSET) & MAX_HASH
+        return signature
+
+    def _band_keys(self, signature):
+        r = self.rows
+        return [hash((i,) + tuple(signature[i * r:(i + 1) * r])) for i in range(self.bands)]
+
+    def similarity(self, signature, page):
+        start = page * self.num_perm
+        stored = self.signatures[start:start + self.num_perm]
+        return sum(1 for x, y in zip(signature, stored) if x == y) / self.num_perm
+
+    def find(self, signature):
+        """추정 자카드 유사도가 threshold 이상인 페이지가 있으면 그 유사도, 없으면 None"""
+        best = None
+        checked = set()
+        for key in self._band_keys(signature):
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                continue
+            for page in (bucket if isinstance(bucket, list) else (bucket,)):
+                if page in checked:
+                    continue
+                checked.add(page)
+                similarity = self.similarity(signature, page)
+                if similarity >= self.threshold and (best is None or similarity > best):
+                    best = similarity
+        return best
+
+    def _insert(self, signature):
+        page = len(self.signatures) // self.num_perm
+        self.signatures.extend(signature)
+        for key in self._band_keys(signature):
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                self.buckets[key] = page
+            elif isinstance(bucket, list):
+                bucket.append(page)
+            else:
+                self.buckets[key] = [bucket, page]
+
+    def encode(self, signature):
+        return base64.b64encode(signature.tobytes()).decode('ascii')
+
+    def add(self, signature):
+        with self.lock:
+            self._insert(signature)
+            self.added.append(self.encode(signature))
+
+    def drain_added(self):
+        """마지막 체크포인트 이후 추가된 서명 목록을 반환하고 기록을 비움"""
+        with self.lock:
+            added, self.added = self.added, []
+        return added
+
+    def load_items(self, items):
+        """저장된 상태에서 서명을 불러옴 (저널에 다시 기록하지 않음)"""
+        with self.lock:
+            for item in items:
+                signature = array('I')
+                signature.frombytes(base64.b64decode(item))
+                if len(signature) == self.num_perm:
+                    self._insert(signature)
+
+    def __iter__(self):
+        for page in range(len(self)):
+            start = page * self.num_perm
+            yield self.encode(self.signatures[start:start + self.num_perm])
+
+    def __len__(self):
+        return len(self.signatures) // self.num_perm
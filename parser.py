@@ -1,17 +1,76 @@
 # parser.py
 
 import re
-import chardet
-from bs4 import BeautifulSoup
 from urllib.parse import urljoin, urlparse
 import trafilatura
 from boilerpy3 import extractors as boilerpy_extractors
 import logging
+from document import PageDocument
+from encoding import EncodingResolver
+from metrics import MetricsRegistry
+from tracing import PageTrace, activate, span
+
+# process 모드 워커 프로세스에서 사용하는 Parser, 로그 버퍼, 프로파일러
+_process_parser = None
+_process_logs = []
+_process_profiler = None
+
+class _BufferingHandler(logging.Handler):
+    """워커 프로세스의 로그를 모아 두었다가 결과와 함께 부모 프로세스로 돌려보냄"""
+    def emit(self, record):
+        _process_logs.append((record.levelno, record.getMessage()))
+
+def init_parse_process(base_domain, profile_options=None):
+    """
+    ProcessPoolExecutor initializer: 워커 프로세스마다 Parser를 한 번만 생성.
+    profile_options가 주어지면 ParseProfiler(control_file, output_dir, sample_rate 등)를 만들어 부모와 같은 제어 파일로 켜고 끔
+    """
+    global _process_parser, _process_profiler
+    logger = logging.getLogger('CrawlerLogger.parse_process')
+    logger.setLevel(logging.INFO)
+    logger.propagate = False
+    logger.addHandler(_BufferingHandler())
+    _process_parser = Parser(base_domain, logger)
+    if profile_options:
+        from profiling import ParseProfiler
+        _process_profiler = ParseProfiler(logger=logger, **profile_options)
+
+def parse_page_in_process(content, url, links_only=False, content_type='', trace=False, follow_links=True):
+    """
+    워커 프로세스에서 한 페이지를 파싱하여 (추출 결과, 로그 목록) 반환.
+    trace가 참이면 단계별 span을 추출 결과의 'trace'에 담아 돌려보냄 (이 함수 시작 기준)
+    follow_links가 거짓이면 하위 링크를 추출하지 않음 (재파싱)
+    """
+    del _process_logs[:]
+    page_trace = PageTrace(url) if trace else None
+    with activate(page_trace):
+        if _process_profiler:
+            page = _process_profiler.run(_process_parser.parse_page, content, url, links_only, content_type, follow_links)
+        else:
+            page = _process_parser.parse_page(content, url, links_only, content_type, follow_links)
+    if page_trace is not None:
+        page['trace'] = page_trace.spans
+    return page, list(_process_logs)
 
 class Parser:
-    def __init__(self, base_domain, logger):
+    def __init__(self, base_domain, logger, metrics=None):
         self.base_domain = base_domain.lower()
         self.logger = logger
+        # 호스트별 기본 인코딩을 학습하므로 Parser마다 하나를 공유
+        self.encoding_resolver = EncodingResolver()
+        # 단계별 소요 시간 (decode, dom, extract_text, extract_tables, extract_links)
+        self.metrics = metrics or MetricsRegistry()
+        self.stage_seconds = self.metrics.histogram('stage_seconds', '크롤링 단계별 소요 시간 (초)', ('stage',))
+
+    def stage(self, name):
+        """단계 지표와 (추적 중이면) 현재 페이지의 span을 함께 기록"""
+        return span(name, self.stage_seconds)
+
+    def as_document(self, content, url, content_type=''):
+        """원본 바이트면 PageDocument로 감싸고, 이미 PageDocument면 그대로 반환"""
+        if isinstance(content, PageDocument):
+            return content
+        return PageDocument(content, url, self.logger, content_type, self.encoding_resolver)
 
     def clean_text(self, text):
         if text is None:
@@ -125,12 +184,17 @@ class Parser:
 
     def extract_tables(self, soup, base_url):
         tables = []
-        for table in soup.find_all('table'):
-            try:
-                parsed_table = self.parse_table(table, base_url)
-                tables.append(parsed_table)
-            except Exception as e:
-                self.logger.error(f"테이블 파싱 오류 ({base_url}): {e}")
+        with self.stage('extract_tables') as attrs:
+            for index, table in enumerate(soup.find_all('table')):
+                # 테이블마다 span을 남겨 거대한 테이블이 있는 페이지를 찾을 수 있게 함 (지표에는 기록하지 않음)
+                with span('parse_table', index=index) as table_attrs:
+                    try:
+                        parsed_table = self.parse_table(table, base_url)
+                        tables.append(parsed_table)
+                        table_attrs['cells'] = len(parsed_table['table'])
+                    except Exception as e:
+                        self.logger.error(f"테이블 파싱 오류 ({base_url}): {e}")
+            attrs['tables'] = len(tables)
         return tables
 
     def extract_links(self, page_content, base_url):
@@ -140,102 +204,162 @@ class Parser:
             base_url = f"{parsed_base.scheme}://www.{parsed_base.netloc}{parsed_base.path}"
             self.logger.debug(f"변경된 base_url: {base_url}")
 
-        soup = BeautifulSoup(page_content, 'html.parser')
         links = []
-        for link in soup.find_all('a', href=True):
-            href = link['href']
-            self.logger.debug(f"추출된 href: {href}")
-            if href.startswith('mailto:') or href.startswith('javascript:'):
-                continue
-            if 'download.jsp' in href.lower():
-                continue
-            hrefs = re.split(r'\s+', href)
-            for href_part in hrefs:
-                full_url = urljoin(base_url, href_part)
-                self.logger.debug(f"변환된 링크: {full_url}")  # 모든 full_url을 출력
-                parsed = urlparse(full_url)
-                if parsed.scheme in ['http', 'https']:
-                    if self.is_within_base_domain(parsed.netloc):
-                        links.append(full_url)
+        with self.stage('extract_links') as attrs:
+            soup = self.as_document(page_content, base_url).soup
+            for link in soup.find_all('a', href=True):
+                href = link['href']
+                self.logger.debug(f"추출된 href: {href}")
+                if href.startswith('mailto:') or href.startswith('javascript:'):
+                    continue
+                if 'download.jsp' in href.lower():
+                    continue
+                hrefs = re.split(r'\s+', href)
+                for href_part in hrefs:
+                    full_url = urljoin(base_url, href_part)
+                    self.logger.debug(f"변환된 링크: {full_url}")  # 모든 full_url을 출력
+                    parsed = urlparse(full_url)
+                    if parsed.scheme in ['http', 'https']:
+                        if self.is_within_base_domain(parsed.netloc):
+                            links.append(full_url)
+            attrs['links'] = len(links)
         return links
 
 
 
+    def parse_page(self, content, url, links_only=False, content_type='', follow_links=True):
+        """
+        한 페이지에서 텍스트, 이미지, 파일, 테이블, 하위 링크를 모두 추출.
+        merged_text가 비어 있으면 저장되지 않는 페이지이므로 나머지 추출은 생략합니다.
+        follow_links가 거짓이면 하위 링크는 추출하지 않습니다 (links는 빈 목록).
+        """
+        page = {"merged_text": "", "images": [], "files": [], "tables": [], "links": [], "encoding_source": None}
+        document = self.as_document(content, url, content_type)
+        if links_only:
+            page["links"] = self.extract_links(document, url)
+            page["encoding_source"] = document.encoding_source
+            return page
+
+        try:
+            page["merged_text"] = self.extract_and_merge_text(document, url)
+        except Exception as e:
+            self.logger.error(f"텍스트 추출 오류 ({url}): {e}")
+        page["encoding_source"] = document.encoding_source
+        if not page["merged_text"].strip():
+            return page
+
+        page["images"] = self.extract_image_links(document.soup, url)
+        page["files"] = self.extract_file_links(document.soup, url)
+        page["tables"] = self.extract_tables(document.soup, url)
+        if follow_links:
+            page["links"] = self.extract_links(document, url)
+        return page
+
     def is_within_base_domain(self, netloc):
         netloc = netloc.lower()
         return netloc == self.base_domain or netloc.endswith('.' + self.base_domain)
 
     def extract_and_merge_text(self, content, url):
+        document = self.as_document(content, url)
+        # 디코딩과 DOM 파싱은 처음 사용할 때 한 번만 일어나므로 여기서 먼저 수행하여 단계별로 측정
+        with self.stage('decode') as attrs:
+            text = document.text
+            attrs['html_chars'] = len(text)
+        with self.stage('dom'):
+            try:
+                document.soup
+            except Exception:
+                pass  # 오류는 아래 BoilerPy3 추출에서 기록
+        with self.stage('extract_text') as attrs:
+            merged_text = self.merge_text(document, text, url)
+            attrs['text_chars'] = len(merged_text)
+            return merged_text
+
+    def merge_text(self, document, text, url):
+        """trafilatura와 BoilerPy3 추출 결과를 병합"""
+        # 하위 단계는 추적 기록에만 남김 (병합이 느린 페이지를 찾기 위함)
         try:
-            detected_encoding = chardet.detect(content)['encoding']
-            if not detected_encoding:
-                detected_encoding = 'utf-8'
-            text = content.decode(detected_encoding, errors='replace')
-        except Exception as e:
-            self.logger.error(f"컨텐츠 디코딩 오류 ({url}): {e}")
-            text = content.decode('utf-8', errors='replace')
-
-        try:
-            trafilatura_content = self.clean_text(trafilatura.extract(text))
+            with span('trafilatura'):
+                trafilatura_content = self.clean_text(trafilatura.extract(text))
         except Exception as e:
             self.logger.error(f"Trafilatura 추출 오류 ({url}): {e}")
             trafilatura_content = ""
 
         try:
-            # HTML 정제 과정 추가
-            soup = BeautifulSoup(text, 'html5lib')
-            cleaned_html = soup.prettify()
+            # HTML 정제 과정 추가 (공유 DOM을 직렬화하여 다시 파싱하지 않음)
+            with span('boilerpy'):
+                cleaned_html = document.soup.prettify()
 
-            boilerpy_extractor = boilerpy_extractors.ArticleExtractor()
-            boilerpy_content = self.clean_text(boilerpy_extractor.get_content(cleaned_html))
+                boilerpy_extractor = boilerpy_extractors.ArticleExtractor()
+                boilerpy_content = self.clean_text(boilerpy_extractor.get_content(cleaned_html))
         except Exception as e:
             self.logger.error(f"BoilerPy3 추출 오류 ({url}): {e}")
             boilerpy_content = ""
 
         if boilerpy_content:
-            merged_text = self.sliding_window_search_optimized(trafilatura_content, boilerpy_content)
+            with span('merge_window', trafilatura_chars=len(trafilatura_content), boilerpy_chars=len(boilerpy_content)):
+                merged_text = self.sliding_window_search_optimized(trafilatura_content, boilerpy_content)
         else:
             merged_text = trafilatura_content
 
         return merged_text
 
-    # KMP 알고리즘 관련 함수
-    def kmp_failure_function(self, pattern):
-        m = len(pattern)
-        pi = [0] * m
-        j = 0
-        for i in range(1, m):
-            while (j > 0 and pattern[i] != pattern[j]):
-                j = pi[j - 1]
-            if pattern[i] == pattern[j]:
-                j += 1
-                pi[i] = j
-        return pi
-
-    def kmp_search(self, text, pattern):
-        n, m = len(text), len(pattern)
-        pi = self.kmp_failure_function(pattern)
-        j = 0
-
-        for i in range(n):
-            while (j > 0 and text[i] != pattern[j]):
-                j = pi[j - 1]
-            if text[i] == pattern[j]:
-                if j == m - 1:
-                    return i - m + 1  # 첫 번째 매칭된 위치 반환
-                j += 1
-        return -1  # 패턴이 없으면 -1 반환
+    def build_ngram_index(self, words, size):
+        """연속된 size개 단어 묶음 -> 시작 위치 목록 (오름차순) 인덱스"""
+        index = {}
+        for k in range(len(words) - size + 1):
+            index.setdefault(tuple(words[k:k + size]), []).append(k)
+        return index
+
+    def find_first_window(self, trafilatura_words, boilerpy_words, window_size):
+        """
+        " ".join(trafilatura_words[i:i + window_size])가 " ".join(boilerpy_words)의 부분 문자열로
+        처음 나타나는 i와 그 문자 위치를 반환 (없으면 None).
+
+        boilerpy 문자열에서 공백은 단어 사이에만 있으므로, 윈도우가 일치하려면
+        첫 단어는 boilerpy 단어의 접미사, 마지막 단어는 다음 boilerpy 단어의 접두사이고
+        가운데 단어들은 정확히 같아야 합니다. 가운데 단어 n-gram 인덱스를 페이지당 한 번 만들어
+        각 윈도우를 상수 시간에 가까운 조회로 확인합니다.
+        """
+        if window_size < 3:
+            # 가운데 단어가 없으면 인덱스를 쓸 수 없으므로 문자열 검색 사용
+            boilerpy_text_str = " ".join(boilerpy_words)
+            for i in range(len(trafilatura_words) - window_size + 1):
+                pattern_pos = boilerpy_text_str.find(" ".join(trafilatura_words[i:i + window_size]))
+                if pattern_pos != -1:
+                    return i, pattern_pos
+            return None
+
+        middle = window_size - 2
+        index = self.build_ngram_index(boilerpy_words[1:len(boilerpy_words) - 1], middle)
+        if not index:
+            return None
+        offsets = []  # 각 boilerpy 단어의 문자 시작 위치
+        position = 0
+        for word in boilerpy_words:
+            offsets.append(position)
+            position += len(word) + 1
+
+        for i in range(len(trafilatura_words) - window_size + 1):
+            candidates = index.get(tuple(trafilatura_words[i + 1:i + 1 + middle]))
+            if not candidates:
+                continue
+            first_word = trafilatura_words[i]
+            last_word = trafilatura_words[i + window_size - 1]
+            for k in candidates:
+                # k는 가운데 단어 묶음의 시작 위치 - 1 (boilerpy_words[1:] 기준 인덱스)
+                if boilerpy_words[k].endswith(first_word) and boilerpy_words[k + window_size - 1].startswith(last_word):
+                    return i, offsets[k] + len(boilerpy_words[k]) - len(first_word)
+        return None
 
     def sliding_window_search_optimized(self, trafilatura_text, boilerpy_text, window_size=5):
         trafilatura_words = trafilatura_text.split()
         boilerpy_words = boilerpy_text.split()
-        boilerpy_text_str = " ".join(boilerpy_words)
 
-        for i in range(len(trafilatura_words) - window_size + 1):
-            pattern = " ".join(trafilatura_words[i:i + window_size])
-            pattern_pos = self.kmp_search(boilerpy_text_str, pattern)
-            if pattern_pos != -1:
-                extra_text = boilerpy_text_str[:pattern_pos].strip()
-                trafilatura_words.insert(i, extra_text)
-                break
+        match = self.find_first_window(trafilatura_words, boilerpy_words, window_size)
+        if match is not None:
+            i, pattern_pos = match
+            boilerpy_text_str = " ".join(boilerpy_words)
+            extra_text = boilerpy_text_str[:pattern_pos].strip()
+            trafilatura_words.insert(i, extra_text)
         return " ".join(trafilatura_words)
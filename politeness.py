@@ -0,0 +1,230 @@
+# politeness.py
+
+import fnmatch
+import heapq
+import json
+import threading
+import time
+from urllib.parse import urlparse
+from frontier import FifoHostQueue, PriorityHostQueue
+
+class TokenBucket:
+    """초당 rate개의 토큰이 채워지고 최대 burst개까지 쌓이는 토큰 버킷"""
+
+    def __init__(self, rate, burst):
+        self.rate = float(rate)
+        self.burst = max(float(burst), 1.0)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        if now > self.updated:
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, now):
+        """토큰 하나를 쓸 수 있을 때까지 남은 시간 (초)"""
+        self._refill(now)
+        if self.tokens >= 1.0:
+            return 0.0
+        if self.rate <= 0:
+            return float('inf')
+        return (1.0 - self.tokens) / self.rate
+
+    def consume(self, now):
+        self._refill(now)
+        self.tokens -= 1.0
+
+
+class HostScheduler:
+    """
+    netloc별 대기열과 토큰 버킷으로 구성된 Fetch 큐.
+    get()/pop_ready()는 항상 토큰이 남아있는(준비된) 호스트의 URL만 꺼내므로
+    한 호스트에 요청이 몰리지 않고, 전체 처리량은 호스트 수에 비례해 늘어납니다.
+    scorer(frontier.UrlScorer)가 주어지면 호스트마다 점수가 높은 URL부터 꺼내고,
+    준비된 호스트 중에서는 맨 앞 URL의 점수에서 대기 수 벌점을 뺀 값이 가장 큰 호스트를 고릅니다.
+    없으면 호스트마다 추가 순서대로, 준비된 순서대로 꺼냅니다.
+    """
+
+    def __init__(self, default_rate=2.0, default_burst=2, host_rules=None, scorer=None):
+        self.default_rate = default_rate
+        self.default_burst = default_burst
+        # [(netloc 패턴, rate, burst), ...] - 먼저 일치하는 규칙을 사용
+        self.host_rules = list(host_rules or [])
+        self.scorer = scorer
+        self.queue_factory = PriorityHostQueue if scorer else FifoHostQueue
+        self.queues = {}    # netloc -> 호스트 대기열 (FifoHostQueue 또는 PriorityHostQueue)
+        self.buckets = {}   # netloc -> TokenBucket
+        self.ready_heap = []  # (준비 시각, 순번, netloc) - 토큰을 기다리는 호스트
+        self.best_heap = []  # (-호스트 점수, 순번, netloc) - 토큰이 있는 호스트 (값이 바뀌면 새로 넣고 이전 항목은 건너뜀)
+        self.best_keys = {}  # netloc -> best_heap에 넣은 최신 호스트 점수
+        self.scheduled = set()  # 두 힙 중 하나에 있는 호스트
+        self.size = 0
+        self.counter = 0
+        self.tracker = None  # 상태 저널용 ChangeTracker (StateManager 참고)
+        self.get_wait_seconds = 0.0  # Fetch 스레드가 준비된 URL을 기다린 누적 시간
+        self.max_depth = 0
+        self.lock = threading.Lock()
+        self.not_empty = threading.Condition(self.lock)
+
+    @staticmethod
+    def load_rules(config_file):
+        """politeness 설정 파일(JSON)에서 호스트 규칙 목록을 읽음"""
+        with open(config_file, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        return [(rule['pattern'], rule['rate'], rule['burst']) for rule in config.get('hosts', [])]
+
+    def rate_for(self, netloc):
+        for pattern, rate, burst in self.host_rules:
+            if fnmatch.fnmatch(netloc, pattern):
+                return rate, burst
+        return self.default_rate, self.default_burst
+
+    def _bucket(self, netloc):
+        bucket = self.buckets.get(netloc)
+        if bucket is None:
+            bucket = TokenBucket(*self.rate_for(netloc))
+            self.buckets[netloc] = bucket
+        return bucket
+
+    def _schedule(self, netloc, now):
+        self.counter += 1
+        ready_at = now + self._bucket(netloc).delay(now)
+        heapq.heappush(self.ready_heap, (ready_at, self.counter, netloc))
+        self.scheduled.add(netloc)
+
+    def _host_key(self, netloc):
+        if not self.scorer:
+            return 0.0
+        queue = self.queues[netloc]
+        return queue.head_score() - self.scorer.backlog_penalty(len(queue))
+
+    def _mark_ready(self, netloc):
+        """토큰이 있는 호스트를 best_heap에 (다시) 넣음"""
+        key = self._host_key(netloc)
+        if self.best_keys.get(netloc) == key:
+            return
+        self.best_keys[netloc] = key
+        self.counter += 1
+        heapq.heappush(self.best_heap, (-key, self.counter, netloc))
+
+    def score_items(self, items):
+        """[(url, depth) 또는 (url, depth, 점수), ...] -> [(url, depth, 점수), ...] (Lock 밖에서 점수 계산)"""
+        scored = []
+        for item in items:
+            url, depth = item[0], item[1]
+            if len(item) > 2 and item[2] is not None:
+                score = item[2]
+            else:
+                score = self.scorer.score(url, depth) if self.scorer else 0.0
+            scored.append((url, depth, score))
+        return scored
+
+    def _append_locked(self, url, depth, score, now):
+        netloc = urlparse(url).netloc
+        queue = self.queues.get(netloc)
+        if queue is None:
+            queue = self.queues[netloc] = self.queue_factory()
+        queue.push(url, depth, score)
+        self.size += 1
+        self.max_depth = max(self.max_depth, self.size)
+        if self.tracker:
+            self.tracker.push(url, (url, depth, score))
+        if netloc in self.best_keys:
+            # 이미 준비된 호스트: 맨 앞 URL이나 대기 수가 바뀌었으면 점수 갱신
+            if self.scorer:
+                self._mark_ready(netloc)
+        elif netloc not in self.scheduled:
+            self._schedule(netloc, now)
+
+    def append(self, item):
+        self.extend([item])
+
+    def extend(self, items):
+        """여러 URL을 한 번의 Lock으로 추가. 항목은 (url, depth) 또는 저장된 점수를 포함한 (url, depth, 점수)"""
+        scored = self.score_items(items)
+        if not scored:
+            return
+        with self.lock:
+            now = time.monotonic()
+            for url, depth, score in scored:
+                self._append_locked(url, depth, score, now)
+            self.not_empty.notify(len(scored))
+
+    def _pop_ready_locked(self, now):
+        """준비된 호스트의 URL을 꺼냄. 없으면 (None, 다음 준비까지 남은 시간)"""
+        # 토큰이 채워진 호스트를 준비 목록으로 옮김 (토큰은 줄지 않으므로 꺼낼 때까지 준비 상태 유지)
+        while self.ready_heap and self.ready_heap[0][0] <= now:
+            _, _, netloc = heapq.heappop(self.ready_heap)
+            self._mark_ready(netloc)
+        while self.best_heap:
+            neg_key, _, netloc = heapq.heappop(self.best_heap)
+            if self.best_keys.get(netloc) == -neg_key:
+                break
+        else:
+            if not self.ready_heap:
+                return None, None
+            return None, self.ready_heap[0][0] - now
+        del self.best_keys[netloc]
+        self.scheduled.discard(netloc)
+        queue = self.queues[netloc]
+        url, depth, _ = queue.pop()
+        self.size -= 1
+        if self.tracker:
+            self.tracker.pop(url)
+        self.buckets[netloc].consume(now)
+        if queue:
+            self._schedule(netloc, now)
+        else:
+            del self.queues[netloc]
+        return (url, depth), 0.0
+
+    def pop_ready(self):
+        """비블로킹 버전 (asyncio 워커용). (item, 대기 시간) 반환"""
+        with self.lock:
+            return self._pop_ready_locked(time.monotonic())
+
+    def get(self, timeout):
+        """준비된 호스트의 URL이 생길 때까지 최대 timeout초 대기. 없으면 None"""
+        start = time.monotonic()
+        deadline = start + timeout
+        with self.lock:
+            while True:
+                now = time.monotonic()
+                item, wait = self._pop_ready_locked(now)
+                if item is not None or now >= deadline:
+                    self.get_wait_seconds += now - start
+                    return item
+                remaining = deadline - now
+                self.not_empty.wait(remaining if wait is None else min(wait, remaining))
+
+    def stats(self):
+        with self.lock:
+            return {
+                "depth": self.size,
+                "max_depth": self.max_depth,
+                "hosts": len(self.queues),
+                "ready_hosts": len(self.best_keys),
+                "get_wait_seconds": round(self.get_wait_seconds, 3),
+            }
+
+    def snapshot(self):
+        """대기 중인 [(url, depth, 점수), ...] (상태 저장용)"""
+        with self.lock:
+            return [item for queue in self.queues.values() for item in queue]
+
+    def checkpoint_items(self):
+        """스냅샷용 항목 목록. 같은 Lock 안에서 tracker를 비우므로 목록과 이후 저널 사이에 빠지는 추가/제거가 없음"""
+        with self.lock:
+            if self.tracker:
+                self.tracker.drain()
+            return [item for queue in self.queues.values() for item in queue]
+
+    def __iter__(self):
+        return iter(self.snapshot())
+
+    def __len__(self):
+        return self.size
+
+    def __bool__(self):
+        return self.size > 0
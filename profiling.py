@@ -0,0 +1,109 @@
+# profiling.py
+
+import cProfile
+import os
+import random
+import signal
+import threading
+import time
+
+class ParseProfiler:
+    """
+    실행 중에 켜고 끌 수 있는 파싱 단계 cProfile.
+    control_file이 있는 동안 sample_rate 비율의 페이지를 프로파일링하여 스레드(프로세스)별로 누적하고,
+    파일이 없어지면(또는 dump_every개마다) output_dir에 .prof 파일로 기록합니다.
+    파일 존재 여부로 켜고 끄므로 process 모드의 워커 프로세스에도 같은 방식으로 전달됩니다.
+    Python 3.12부터는 한 프로세스에서 프로파일러를 하나만 켤 수 있으므로, 한 번에 한 스레드만 측정하고
+    다른 스레드가 측정 중이면 그 페이지는 측정하지 않습니다.
+    """
+
+    def __init__(self, control_file, output_dir, logger, sample_rate=0.1, check_interval=1.0, dump_every=50):
+        self.control_file = control_file
+        self.output_dir = output_dir
+        self.logger = logger
+        self.sample_rate = sample_rate
+        self.check_interval = check_interval
+        self.dump_every = dump_every
+        self.local = threading.local()  # 스레드별 (Profile, 파일 경로, 누적 페이지 수)
+        self.active = False
+        self.last_check = 0.0
+        self.profile_lock = threading.Lock()  # 프로세스 전체에서 동시에 켜진 프로파일러는 하나
+
+    def enabled(self):
+        """control_file 존재 여부 (check_interval초마다 한 번만 확인)"""
+        now = time.monotonic()
+        if now - self.last_check >= self.check_interval:
+            self.last_check = now
+            self.active = os.path.exists(self.control_file)
+        return self.active
+
+    def run(self, func, *args, **kwargs):
+        """프로파일링이 켜져 있고 표본으로 뽑히면 func를 프로파일러 안에서 실행"""
+        if not self.enabled():
+            self.dump()  # 꺼졌으면 이 스레드가 모은 결과를 기록
+            return func(*args, **kwargs)
+        if random.random() >= self.sample_rate or not self.profile_lock.acquire(blocking=False):
+            return func(*args, **kwargs)
+        try:
+            state = getattr(self.local, 'state', None)
+            if state is None:
+                thread_name = threading.current_thread().name
+                path = os.path.join(self.output_dir, f"parse-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}-{thread_name}.prof")
+                state = self.local.state = [cProfile.Profile(), path, 0]
+            try:
+                state[0].enable()
+            except ValueError as e:
+                # 다른 프로파일러가 이미 켜져 있음 (예: python -m cProfile로 실행): 측정하지 않고 실행
+                self.logger.warning(f"파싱 프로파일링을 시작할 수 없음: {e}")
+                return func(*args, **kwargs)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                state[0].disable()
+                state[2] += 1
+                if state[2] % self.dump_every == 0:
+                    self.write(state)
+        finally:
+            self.profile_lock.release()
+
+    def write(self, state):
+        profile, path, pages = state
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            profile.dump_stats(path)
+        except OSError as e:
+            self.logger.error(f"프로파일 기록 실패 ({path}): {e}")
+            return
+        self.logger.info(f"파싱 프로파일 기록 ({pages}개 페이지): {path} (python -m pstats {path})")
+
+    def dump(self):
+        """이 스레드의 누적 결과를 기록하고 초기화 (모은 것이 없으면 아무것도 하지 않음)"""
+        state = getattr(self.local, 'state', None)
+        if state is None:
+            return
+        self.local.state = None
+        self.write(state)
+
+
+def install_signal_toggle(control_file, logger, signum=getattr(signal, 'SIGUSR1', None)):
+    """
+    signum(기본값: SIGUSR1)을 받을 때마다 control_file을 만들거나 지워 프로파일링을 켜고 끔.
+    메인 스레드에서만 호출할 수 있으며, SIGUSR1이 없는 플랫폼에서는 control_file을 직접 만들고 지우면 됩니다.
+    """
+    if signum is None:
+        return False
+
+    def toggle(signum, frame):
+        try:
+            if os.path.exists(control_file):
+                os.remove(control_file)
+                logger.info(f"파싱 프로파일링 끔 ({control_file} 삭제)")
+            else:
+                os.makedirs(os.path.dirname(control_file) or '.', exist_ok=True)
+                open(control_file, 'a').close()
+                logger.info(f"파싱 프로파일링 켬 ({control_file} 생성)")
+        except OSError as e:
+            logger.error(f"프로파일링 전환 실패: {e}")
+
+    signal.signal(signum, toggle)
+    return True
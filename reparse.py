@@ -0,0 +1,208 @@
+# reparse.py
+
+import gzip
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from archive import ArchiveReader
+from near_duplicate import MinHashIndex
+from parser import init_parse_process, parse_page_in_process
+from saver import Saver, output_path
+from utils import normalize_text
+
+RECORD_FIELDS = ('merged_text', 'images', 'files', 'tables')
+
+# 워커 프로세스에서 사용하는 아카이브 읽기 객체
+_process_reader = None
+
+def init_reparse_process(base_domain, archive_dir):
+    """ProcessPoolExecutor initializer: 워커 프로세스마다 Parser와 ArchiveReader를 한 번만 생성"""
+    global _process_reader
+    init_parse_process(base_domain)
+    _process_reader = ArchiveReader(archive_dir)
+
+def reparse_urls(urls):
+    """워커 프로세스에서 URL 묶음을 아카이브에서 읽어 파싱. [(url, 추출 결과 또는 None, 로그 목록), ...]"""
+    results = []
+    for url in urls:
+        archived = _process_reader.load(url)
+        if archived is None or not archived.content:
+            results.append((url, None, []))
+            continue
+        content_type = next((value for name, value in archived.headers if name.lower() == 'content-type'), '')
+        try:
+            # 재파싱에서는 링크를 따라가지 않으므로 링크 추출을 생략
+            page, logs = parse_page_in_process(archived.content, url, False, content_type, follow_links=False)
+        except Exception as e:
+            results.append((url, None, [(40, f"파싱 오류 ({url}): {e}")]))
+            continue
+        results.append((url, page, logs))
+    return results
+
+def open_jsonl(path):
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8')
+    if path.endswith('.zst'):
+        import zstandard
+        return zstandard.open(path, 'rt', encoding='utf-8')
+    return open(path, 'r', encoding='utf-8')
+
+def record_fingerprint(record):
+    """필드별 해시 (이전 출력 전체를 메모리에 올리지 않고 비교하기 위함)"""
+    return {field: hashlib.sha1(json.dumps(record.get(field), ensure_ascii=False, sort_keys=True).encode('utf-8')).digest()
+            for field in RECORD_FIELDS}
+
+def load_fingerprints(paths, logger):
+    """
+    이전 출력(JSONL, .gz/.zst 가능, 교체된 파일 여러 개)의 URL별 필드 해시.
+    같은 URL이 여러 번 있으면 나중 레코드 기준이므로 오래된 파일부터 넘겨야 합니다.
+    """
+    fingerprints = {}
+    for path in paths:
+        with open_jsonl(path) as f:
+            for line_no, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError as e:
+                    logger.warning(f"{path} {line_no}번째 줄을 읽지 못함: {e}")
+                    continue
+                fingerprints[record['url']] = record_fingerprint(record)
+    return fingerprints
+
+
+class Reparser:
+    """
+    아카이브(WarcArchive)에 보관된 원본 HTML을 네트워크 없이 다시 파싱하여 original_data.jsonl을 다시 만듭니다.
+    추출은 프로세스 풀에서 URL 묶음 단위로 수행하고(워커가 아카이브를 직접 읽음),
+    중복 제거(SHA-256, MinHash 근접 중복)와 저장은 크롤링과 같은 규칙으로 아카이브 순서대로 부모 프로세스에서 수행합니다.
+    previous_files가 주어지면 이전 출력과 비교한 추가/삭제/변경 목록을 diff_file에 기록합니다.
+    """
+
+    def __init__(self, archive_dir, output_file, logger, base_domain, processes=None, chunk_size=16,
+                 near_duplicate_threshold=0.0, output_compression=None, previous_files=None, diff_file=None,
+                 progress_interval=5.0):
+        self.archive_dir = archive_dir
+        self.output_file = output_file
+        self.logger = logger
+        self.base_domain = base_domain
+        self.processes = processes or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.near_duplicate_threshold = near_duplicate_threshold
+        self.output_compression = output_compression
+        self.previous_files = previous_files or []
+        self.diff_file = diff_file or (output_file + '.diff.jsonl' if self.previous_files else None)
+        self.progress_interval = progress_interval
+        self.seen_texts = set()
+        self.near_duplicates = MinHashIndex(near_duplicate_threshold) if near_duplicate_threshold > 0 else None
+        self.stats = {"pages": 0, "saved": 0, "empty": 0, "duplicates": 0, "near_duplicates": 0, "errors": 0}
+
+    def is_duplicate(self, url, merged_text):
+        """크롤러의 process_page와 같은 중복 판정. 새 본문이면 기록하고 False"""
+        normalized_text = normalize_text(merged_text)
+        if not normalized_text:
+            self.stats["empty"] += 1
+            return True
+        text_hash = hashlib.sha256(normalized_text.encode('utf-8')).hexdigest()
+        if text_hash in self.seen_texts:
+            self.stats["duplicates"] += 1
+            return True
+        if self.near_duplicates is not None:
+            signature = self.near_duplicates.signature(normalized_text)
+            if signature is not None:
+                if self.near_duplicates.find(signature) is not None:
+                    self.logger.debug(f"근접 중복으로 건너뜀: {url}")
+                    self.stats["near_duplicates"] += 1
+                    return True
+                self.near_duplicates.add(signature)
+        self.seen_texts.add(text_hash)
+        return False
+
+    def report_progress(self, done, total, start):
+        elapsed = time.monotonic() - start
+        rate = done / elapsed if elapsed > 0 else 0.0
+        remaining = (total - done) / rate if rate > 0 else 0.0
+        self.logger.info(f"재파싱 진행: {done}/{total} ({done / max(total, 1):.1%}), {rate:.1f} pages/sec, 남은 시간 약 {remaining:.0f}초")
+
+    def write_diff(self, previous, current):
+        """이전 출력과 새 출력의 URL별 차이를 기록하고 개수를 반환"""
+        counts = {"added": 0, "removed": 0, "changed": 0, "unchanged": 0}
+        with open(self.diff_file, 'w', encoding='utf-8') as f:
+            for url, fingerprint in current.items():
+                old = previous.get(url)
+                if old is None:
+                    change = {"url": url, "change": "added"}
+                elif old != fingerprint:
+                    change = {"url": url, "change": "changed",
+                              "fields": [field for field in RECORD_FIELDS if old[field] != fingerprint[field]]}
+                else:
+                    counts["unchanged"] += 1
+                    continue
+                counts[change["change"]] += 1
+                f.write(json.dumps(change, ensure_ascii=False) + '\n')
+            for url in previous.keys() - current.keys():
+                counts["removed"] += 1
+                f.write(json.dumps({"url": url, "change": "removed"}, ensure_ascii=False) + '\n')
+        return counts
+
+    def run(self):
+        reader = ArchiveReader(self.archive_dir)
+        urls = reader.urls()
+        reader.close()
+        total = len(urls)
+        previous = load_fingerprints(self.previous_files, self.logger) if self.previous_files else None
+        current = {} if previous is not None else None
+
+        # 다시 만드는 파일이므로 기존 출력은 지우고 시작
+        path = output_path(self.output_file, self.output_compression)
+        if os.path.exists(path):
+            self.logger.warning(f"기존 출력을 덮어씁니다: {path}")
+            os.remove(path)
+        saver = Saver(self.output_file, self.logger, compression=self.output_compression)
+
+        self.logger.info(f"재파싱 시작: 아카이브 {self.archive_dir}의 {total}개 페이지, 프로세스 {self.processes}개")
+        chunks = [urls[i:i + self.chunk_size] for i in range(0, total, self.chunk_size)]
+        start = time.monotonic()
+        last_report = start
+        done = 0
+        with ProcessPoolExecutor(max_workers=self.processes, mp_context=multiprocessing.get_context('spawn'),
+                                 initializer=init_reparse_process, initargs=(self.base_domain, self.archive_dir)) as pool:
+            # 결과는 아카이브 순서대로 받으므로 중복 제거 결과가 실행마다 같음
+            for results in pool.map(reparse_urls, chunks):
+                for url, page, logs in results:
+                    for level, message in logs:
+                        self.logger.log(level, message)
+                    done += 1
+                    self.stats["pages"] += 1
+                    if page is None:
+                        self.stats["errors"] += 1
+                        continue
+                    merged_text = page['merged_text']
+                    if not merged_text.strip():
+                        self.stats["empty"] += 1
+                        continue
+                    if self.is_duplicate(url, merged_text):
+                        continue
+                    record = {"url": url, "merged_text": merged_text, "images": page['images'],
+                              "files": page['files'], "tables": page['tables']}
+                    saver.save_original_data(record)
+                    self.stats["saved"] += 1
+                    if current is not None:
+                        current[url] = record_fingerprint(record)
+                if time.monotonic() - last_report >= self.progress_interval:
+                    self.report_progress(done, total, start)
+                    last_report = time.monotonic()
+        if not saver.final_save():
+            self.logger.error(f"원본 데이터 {saver.lost_records}개를 기록하지 못했습니다: {path}")
+
+        elapsed = time.monotonic() - start
+        summary = dict(self.stats, seconds=round(elapsed, 1), pages_per_sec=round(done / elapsed, 1) if elapsed > 0 else 0.0)
+        if previous is not None:
+            summary["diff"] = self.write_diff(previous, current)
+            self.logger.info(f"이전 출력과의 차이를 기록했습니다: {self.diff_file}")
+        self.logger.info(f"재파싱 완료: {json.dumps(summary, ensure_ascii=False)}")
+        return summary
@@ -1,41 +1,316 @@
 # saver.py
 
+import atexit
+import gzip
+import json
 import os
 import threading
 import time
-import json
-import logging
-import shutil
+from bounded_queue import ByteBoundedQueue
+from metrics import MetricsRegistry
+
+COMPRESSION_EXTENSIONS = {'gzip': '.gz', 'zstd': '.zst'}
+FSYNC_POLICIES = ('never', 'batch', 'interval')
+
+_STOP = object()  # 쓰기 스레드 종료 표시
+
+def pending_size(item):
+    """쓰기 큐 항목의 크기 (직렬화한 줄의 길이, 제어 항목은 0)"""
+    return len(item) if isinstance(item, str) else 0
+
+def output_path(original_file, compression=None):
+    """압축 방식에 맞는 확장자를 붙인 실제 출력 파일 경로"""
+    ext = COMPRESSION_EXTENSIONS.get(compression, '')
+    return original_file if original_file.endswith(ext) else original_file + ext
+
 
 class Saver:
-    def __init__(self, original_file, logger, batch_size=1, max_file_size=50 * 1024 * 1024):
+    """
+    원본 데이터(JSONL) 저장기.
+    save_original_data()는 직렬화한 줄을 큐에 넣기만 하고, 전용 쓰기 스레드가 batch_size개가 모이거나
+    첫 줄이 들어온 뒤 flush_interval초가 지나면 한 번에 기록합니다 (group commit).
+    - fsync: 'never'(OS에 맡김), 'batch'(기록할 때마다), 'interval'(최대 fsync_interval초마다 한 번)
+    - compression: None, 'gzip', 'zstd' (파일 이름에 .gz/.zst를 붙이며, 다시 열 때마다 새 멤버/프레임으로 이어 씀)
+    파일 크기가 max_file_size를 넘으면 쓰기 스레드가 타임스탬프를 붙여 파일을 교체합니다.
+    쓰기 큐는 아직 기록하지 않은 줄의 총 크기가 max_pending_bytes를 넘으면 save_original_data()를 대기시킵니다.
+    파일은 첫 기록 때 엽니다 (폴더가 없으면 만듦).
+    기록/파일 열기 중의 I/O 오류는 로그로 남기고 같은 batch를 retry_interval초마다 다시 기록하며, 그동안 flush()는 False를 반환합니다.
+    종료(final_save) 중에도 실패하면 남은 batch를 버리고 final_save()가 False를 반환합니다.
+    """
+
+    def __init__(self, original_file, logger, batch_size=100, max_file_size=50 * 1024 * 1024,
+                 flush_interval=1.0, fsync='never', fsync_interval=5.0, compression=None, compression_level=None,
+                 metrics=None, max_pending_bytes=64 * 1024 * 1024, retry_interval=5.0):
+        if fsync not in FSYNC_POLICIES:
+            raise ValueError(f"알 수 없는 fsync 방식: {fsync}")
+        if compression not in (None, *COMPRESSION_EXTENSIONS):
+            raise ValueError(f"알 수 없는 압축 방식: {compression}")
         self.original_file = original_file
         self.logger = logger
-        self.batch_size = batch_size
+        self.batch_size = max(1, batch_size)
         self.max_file_size = max_file_size
-        self.lock = threading.Lock()
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.compression = compression
+        self.compression_level = compression_level
+        self.retry_interval = retry_interval
+        self.output_file = output_path(original_file, compression)
+        if compression == 'zstd':
+            # zstandard는 zstd 압축을 사용할 때만 필요하므로 여기서 불러옴
+            try:
+                import zstandard
+            except ImportError as e:
+                raise ImportError("zstd 압축에는 zstandard 패키지가 필요합니다 (pip install zstandard)") from e
+            self.zstd_compressor = zstandard.ZstdCompressor(level=compression_level or 3)
+
+        self.queue = ByteBoundedQueue(max_pending_bytes, item_size=pending_size)
+        self.writer_stopped = threading.Event()  # 쓰기 스레드가 끝나면 설정 (큐가 가득 차도 더 기다리지 않음)
+        self.write_failing = threading.Event()  # 기록에 실패한 batch를 다시 시도하는 중이면 설정
+        self.lost_records = 0  # 종료 중 기록하지 못하고 버린 줄 수
+        self.raw = None  # 실제 파일 객체 (크기 확인과 fsync용)
+        self.stream = None  # 압축 스트림 (압축하지 않으면 raw와 같음)
+        self.dirty = False  # 마지막 fsync 이후 기록한 내용이 있는지
+        self.last_fsync = time.monotonic()
+        # 쓰기 스레드 통계 (stats()로 조회)
+        self.records = 0
+        self.batches = 0
+        self.bytes_written = 0
+        self.fsyncs = 0
+        self.rotations = 0
+        self.write_seconds = 0.0
+        self.stats_lock = threading.Lock()
+        self.metrics = metrics or MetricsRegistry()
+        self.stage_seconds = self.metrics.histogram('stage_seconds', '크롤링 단계별 소요 시간 (초)', ('stage',))
+        self.saved_records = self.metrics.counter('saved_records_total', '원본 데이터 파일에 기록한 레코드 수')
+        self.metrics.gauge('save_queue_depth', '쓰기 스레드가 아직 기록하지 않은 레코드 수', func=lambda: len(self.queue))
+
+        self.closed = False
+        self.thread = threading.Thread(target=self.writer, name="OriginalDataWriter", daemon=True)
+        self.thread.start()
+        # final_save()를 호출하지 않고 종료하는 경우에도 남은 데이터를 기록
+        atexit.register(self.final_save)
+
+    def open(self):
+        os.makedirs(os.path.dirname(self.output_file) or '.', exist_ok=True)
+        if not os.path.exists(self.output_file):
+            self.logger.info(f"파일 생성됨: {self.output_file}")
+        self.raw = open(self.output_file, 'ab')
+        if self.compression is None and self.raw.tell() and not self.ends_with_newline():
+            # 실패한 기록의 조각 뒤에 이어 쓰지 않도록 줄을 끝냄 (다시 기록하는 batch는 새 줄부터 시작)
+            self.raw.write(b'\n')
+        if self.compression == 'gzip':
+            self.stream = gzip.GzipFile(fileobj=self.raw, mode='ab', compresslevel=self.compression_level or 6)
+        elif self.compression == 'zstd':
+            self.stream = self.zstd_compressor.stream_writer(self.raw, closefd=False)
+        else:
+            self.stream = self.raw
 
-    def check_file_size_and_rotate(self, file_path):
-        if os.path.exists(file_path) and os.path.getsize(file_path) > self.max_file_size:
-            # 기존 파일 이름에 타임스탬프를 붙여 백업
-            base_name, ext = os.path.splitext(file_path)
-            rotated_file = f"{base_name}_{int(time.time())}{ext}"
+    def ends_with_newline(self):
+        with open(self.output_file, 'rb') as f:
+            f.seek(-1, os.SEEK_END)
+            return f.read(1) == b'\n'
+
+    def close(self):
+        try:
+            if self.stream is not self.raw:
+                self.stream.close()  # 압축 멤버/프레임 마무리 (raw는 닫지 않음)
+            self.raw.flush()
+            if self.fsync != 'never' and self.dirty:
+                self.sync()
+        finally:
+            # 오류가 나도 다음 기록에서 파일을 다시 열도록 닫힌 상태로 둠
+            raw, self.raw, self.stream = self.raw, None, None
+            raw.close()
+
+    def sync(self):
+        os.fsync(self.raw.fileno())
+        self.dirty = False
+        self.last_fsync = time.monotonic()
+        self.fsyncs += 1
+
+    def rotated_name(self):
+        """original_data.jsonl.gz -> original_data_<타임스탬프>.jsonl.gz (같은 초에 교체하면 번호를 붙임)"""
+        path = self.output_file
+        compressed_ext = COMPRESSION_EXTENSIONS.get(self.compression, '')
+        if compressed_ext:
+            path = path[:-len(compressed_ext)]
+        base_name, ext = os.path.splitext(path)
+        ext += compressed_ext
+        rotated_file = f"{base_name}_{int(time.time())}{ext}"
+        n = 1
+        while os.path.exists(rotated_file):
+            rotated_file = f"{base_name}_{int(time.time())}_{n}{ext}"
+            n += 1
+        return rotated_file
+
+    def rotate_if_needed(self):
+        """파일이 max_file_size를 넘으면 이름을 바꾸고 새 파일을 엶 (쓰기 스레드에서만 호출)"""
+        is_open = self.raw is not None
+        size = self.raw.tell() if is_open else (os.path.getsize(self.output_file) if os.path.exists(self.output_file) else 0)
+        if size <= self.max_file_size:
+            return
+        if is_open:
+            self.close()
+        rotated_file = self.rotated_name()
+        try:
+            os.replace(self.output_file, rotated_file)
+            self.rotations += 1
+            self.logger.info(f"파일 크기 초과로 새로운 파일 생성: {rotated_file}")
+        except OSError as e:
+            self.logger.error(f"파일 회전 중 오류 발생: {e}")
+        if is_open:
+            self.open()
+
+    def commit(self, lines):
+        """모은 줄을 한 번에 기록하고 fsync 방식에 따라 디스크에 반영. 실패하면 False"""
+        start = time.monotonic()
+        data = ''.join(lines).encode('utf-8')
+        try:
+            if self.raw is None:
+                # 첫 기록이거나 이전 교체/열기/기록이 실패한 경우 (열기 전에 크기 초과 파일을 교체)
+                self.rotate_if_needed()
+                self.open()
+            self.stream.write(data)
+            if self.stream is not self.raw:
+                self.stream.flush()  # 압축 블록을 끝까지 내보내 읽을 수 있는 상태로 유지
+            self.raw.flush()
+            self.dirty = True
+            if self.fsync == 'batch' or (self.fsync == 'interval' and time.monotonic() - self.last_fsync >= self.fsync_interval):
+                self.sync()
+        except Exception as e:
+            self.logger.error(f"원본 데이터 저장 실패 ({len(lines)}개): {e}")
+            if self.raw is not None:
+                # 일부만 기록된 스트림에 이어 쓰지 않도록 닫고 다음 시도에서 다시 엶
+                try:
+                    self.close()
+                except Exception:
+                    pass
+            return False
+        elapsed = time.monotonic() - start
+        with self.stats_lock:
+            self.records += len(lines)
+            self.batches += 1
+            self.bytes_written += len(data)
+            self.write_seconds += elapsed
+        self.stage_seconds.observe(elapsed, ('save',))
+        self.saved_records.inc(len(lines))
+        self.logger.debug(f"원본 데이터 {len(lines)}개 저장 완료")
+        try:
+            self.rotate_if_needed()
+        except OSError as e:
+            self.logger.error(f"파일 교체 중 오류 발생 (다음 기록에서 다시 엶): {e}")
+        return True
+
+    def commit_until_written(self, lines):
+        """기록될 때까지 retry_interval초마다 같은 batch를 다시 기록 (종료 중에는 한 번 더 실패하면 버림)"""
+        while not self.commit(lines):
+            self.write_failing.set()
+            if self.closed:
+                self.lost_records += len(lines)
+                self.logger.error(f"종료 중 기록하지 못한 원본 데이터 {len(lines)}개를 버립니다.")
+                return
+            time.sleep(self.retry_interval)
+        if self.write_failing.is_set():
+            self.logger.info(f"원본 데이터 기록 재개 ({len(lines)}개)")
+            self.write_failing.clear()
+
+    def writer(self):
+        """큐에서 줄을 모아 batch_size개 또는 flush_interval초 단위로 기록하는 스레드"""
+        try:
+            self.write_loop()
+        finally:
+            self.writer_stopped.set()
+
+    def write_loop(self):
+        pending = []
+        deadline = None
+        while True:
+            timeout = max(0.0, deadline - time.monotonic()) if pending else None
+            item = self.queue.get(timeout=timeout)
+            if isinstance(item, str):
+                if not pending:
+                    deadline = time.monotonic() + self.flush_interval
+                pending.append(item)
+                if len(pending) < self.batch_size:
+                    continue
             try:
-                shutil.move(file_path, rotated_file)
-                self.logger.info(f"파일 크기 초과로 새로운 파일 생성: {rotated_file}")
+                if pending:
+                    self.commit_until_written(pending)
+                if isinstance(item, threading.Event):
+                    # flush() 요청: 지금까지 받은 줄을 기록했으므로 fsync 후 알림
+                    if self.fsync != 'never' and self.dirty and self.raw is not None:
+                        self.sync()
+                elif item is _STOP:
+                    if self.raw is not None:
+                        self.close()
+                    return
             except Exception as e:
-                self.logger.error(f"파일 회전 중 오류 발생: {e}")
+                # 오류가 나도 쓰기 스레드는 계속 실행 (종료되면 flush()가 영원히 기다리게 됨)
+                self.logger.error(f"원본 데이터 쓰기 스레드 오류: {e}")
+                if item is _STOP:
+                    return
+            finally:
+                pending = []
+                if isinstance(item, threading.Event):
+                    item.set()
 
     def save_original_data(self, original_data):
-        with self.lock:
-            self.check_file_size_and_rotate(self.original_file)
-            try:
-                with open(self.original_file, 'a', encoding='utf-8') as f_original:
-                    json.dump(original_data, f_original, ensure_ascii=False)
-                    f_original.write('\n')  # JSONL 형식으로 저장
-                self.logger.info(f"원본 데이터 저장 완료: {original_data['url']}")
-            except Exception as e:
-                self.logger.error(f"원본 데이터 저장 실패: {e}")
+        """직렬화한 줄을 쓰기 큐에 넣음 (디스크 I/O를 기다리지 않음)"""
+        if self.closed:
+            self.logger.error(f"원본 데이터 저장 실패 (저장기 종료됨): {original_data['url']}")
+            return
+        try:
+            line = json.dumps(original_data, ensure_ascii=False) + '\n'  # JSONL 형식으로 저장
+        except (TypeError, ValueError) as e:
+            self.logger.error(f"원본 데이터 저장 실패: {e}")
+            return
+        if self.writer_stopped.is_set():
+            self.logger.error(f"원본 데이터 저장 실패 (쓰기 스레드 종료됨): {original_data['url']}")
+            return
+        # 쓰기 큐가 가득 차면 쓰기 스레드가 따라잡을 때까지 대기 (쓰기 스레드가 끝나면 기다리지 않음)
+        self.queue.put(line, self.writer_stopped)
+
+    def flush(self, timeout=None):
+        """
+        지금까지 넣은 데이터가 기록될 때까지 최대 timeout초 대기 (fsync 방식이 'never'가 아니면 fsync까지).
+        기록되었으면 True, 시간이 지나거나 기록 실패로 다시 시도하는 중이면 False. 쓰기 스레드가 종료된 경우 RuntimeError
+        """
+        if self.closed:
+            return True
+        if not self.thread.is_alive():
+            raise RuntimeError("원본 데이터 쓰기 스레드가 종료되었습니다.")
+        done = threading.Event()
+        self.queue.put(done)
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not done.wait(0.5 if deadline is None else max(0.0, min(0.5, deadline - time.monotonic()))):
+            if not self.thread.is_alive():
+                raise RuntimeError("원본 데이터 쓰기 스레드가 종료되었습니다.")
+            if self.write_failing.is_set():
+                return False
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+        return True
+
+    def stats(self):
+        with self.stats_lock:
+            return {
+                "pending": len(self.queue),
+                "pending_bytes": self.queue.nbytes,
+                "records": self.records,
+                "batches": self.batches,
+                "bytes": self.bytes_written,
+                "fsyncs": self.fsyncs,
+                "rotations": self.rotations,
+                "write_seconds": round(self.write_seconds, 3),
+            }
 
     def final_save(self):
-        pass  # 요약 기능 제거로 인해 특별한 동작이 필요 없음
\ No newline at end of file
+        """남은 데이터를 모두 기록하고 쓰기 스레드를 종료. 기록하지 못하고 버린 줄이 있으면 False"""
+        if self.closed:
+            return self.lost_records == 0
+        self.closed = True
+        self.queue.put(_STOP)
+        self.thread.join()
+        atexit.unregister(self.final_save)
+        return self.lost_records == 0
@@ -2,72 +2,329 @@ import os
 import threading
 import json
 import base64
+import time
 from collections import deque
 import logging
 import shutil
 
+class TrackedSet(set):
+    """체크포인트 이후 추가된 원소를 기록하는 set (원소 제거는 사용하지 않음)"""
+
+    def __init__(self, iterable=()):
+        super().__init__(iterable)
+        self.added = []
+        self.added_lock = threading.Lock()
+
+    def add(self, item):
+        with self.added_lock:
+            if item not in self:
+                super().add(item)
+                self.added.append(item)
+
+    def update(self, *iterables):
+        for iterable in iterables:
+            for item in iterable:
+                self.add(item)
+
+    def load_items(self, items):
+        """저장된 상태에서 원소를 불러옴 (저널에 다시 기록하지 않음)"""
+        set.update(self, items)
+
+    def drain_added(self):
+        """마지막 체크포인트 이후 추가된 원소 목록을 반환하고 기록을 비움"""
+        with self.added_lock:
+            added, self.added = self.added, []
+        return added
+
+
+class ChangeTracker:
+    """
+    큐의 추가/제거를 체크포인트 사이에 모아 두는 기록기 (항목은 URL로 구분).
+    같은 구간 안에서 추가되었다가 꺼내진 항목은 저널에 남기지 않습니다.
+    """
+
+    def __init__(self):
+        self.pushed = {}     # url -> 항목
+        self.popped = set()  # 이전 체크포인트에 기록된 뒤 꺼내진 url
+        self.lock = threading.Lock()
+
+    def push(self, key, item):
+        with self.lock:
+            self.pushed[key] = item
+
+    def pop(self, key):
+        with self.lock:
+            if key in self.pushed:
+                del self.pushed[key]
+            else:
+                self.popped.add(key)
+
+    def drain(self):
+        """(추가된 항목 목록, 제거된 url 목록)을 반환하고 기록을 비움"""
+        with self.lock:
+            pushed, self.pushed = self.pushed, {}
+            popped, self.popped = self.popped, set()
+        return list(pushed.values()), list(popped)
+
+
+class TrackedDeque(deque):
+    """append/popleft를 ChangeTracker에 기록하는 deque (항목의 첫 원소가 url)"""
+
+    def __init__(self, iterable=(), tracker=None):
+        super().__init__(iterable)
+        self.tracker = tracker
+
+    def append(self, item):
+        super().append(item)
+        if self.tracker:
+            self.tracker.push(item[0], item)
+
+    def popleft(self):
+        item = super().popleft()
+        if self.tracker:
+            self.tracker.pop(item[0])
+        return item
+
+
 class StateManager:
-    def __init__(self, state_file, logger):
+    """
+    크롤링 상태를 스냅샷 파일과 추가 전용 저널로 저장합니다.
+
+    - 체크포인트마다 마지막 체크포인트 이후의 변경(집합 추가, 큐 추가/제거)만 저널에 한 줄로 추가하므로
+      저장 비용은 전체 상태 크기가 아니라 변경량에 비례합니다.
+    - 저널이 스냅샷보다 커지면 전체 상태를 새 스냅샷으로 압축하고 저널을 비웁니다.
+    - 불러올 때는 스냅샷 위에 저널을 순서대로 재생합니다. 이전 형식(단일 JSON) 상태 파일도 읽을 수 있습니다.
+    - set_factory가 압축 집합(membership.DigestSet, ScalableBloomFilter)을 만들면 스냅샷에는 집합별 바이너리 파일
+      ({state_file}.{key}.bin)을, 저널에는 16진수 다이제스트를 기록합니다.
+    """
+
+    SET_KEYS = ('visited', 'parsed', 'seen_texts', 'visited_identifiers', 'near_duplicates')
+
+    def __init__(self, state_file, logger, compact_ratio=1.0, compact_min_bytes=8 * 1024 * 1024, set_factory=TrackedSet,
+                 near_duplicate_factory=TrackedSet):
         self.state_file = state_file
+        self.journal_file = state_file + '.journal'
         self.logger = logger
+        self.compact_ratio = compact_ratio
+        self.compact_min_bytes = compact_min_bytes
+        self.set_factory = set_factory  # 불러온 집합을 담을 객체 생성 함수
+        self.near_duplicate_factory = near_duplicate_factory  # 근접 중복 검사용 MinHash 색인 생성 함수
+        self.change_stats = None  # 불러온 URL 유형별 변경 비율 (frontier.ChangeStats 형식)
         self.lock = threading.Lock()
 
-    def save_state(self, fetch_queue, parse_queue, visited, parsed_set, seen_texts, visited_identifiers):
+    @staticmethod
+    def encode_parse_entry(entry):
+        url, content, depth, meta = entry
+        return [url, base64.b64encode(content).decode('utf-8'), depth, meta]
+
+    @staticmethod
+    def decode_parse_entry(entry):
+        # 이전 형식([url, content, depth])의 항목은 빈 meta로 불러옴
+        return (entry[0], base64.b64decode(entry[1].encode('utf-8')), entry[2], entry[3] if len(entry) > 3 else {})
+
+    def needs_compaction(self):
+        if not os.path.exists(self.journal_file):
+            return False
+        journal_size = os.path.getsize(self.journal_file)
+        snapshot_size = os.path.getsize(self.state_file) if os.path.exists(self.state_file) else 0
+        return journal_size > max(snapshot_size * self.compact_ratio, self.compact_min_bytes)
+
+    def save_state(self, fetch_queue, parse_queue, visited, parsed_set, seen_texts, visited_identifiers, near_duplicates=None,
+                   change_stats=None):
+        sets = (visited, parsed_set, seen_texts, visited_identifiers)
+        if near_duplicates is not None:
+            sets += (near_duplicates,)
+        tracked = (all(hasattr(s, 'drain_added') for s in sets)
+                   and getattr(fetch_queue, 'tracker', None) is not None
+                   and getattr(parse_queue, 'tracker', None) is not None)
         with self.lock:
-            state = {
-                'fetching_queue': list(fetch_queue),
-                'parsing_queue': [
-                    [url, base64.b64encode(content).decode('utf-8'), depth] 
-                    for (url, content, depth) in parse_queue
-                ],
-                'visited': list(visited),
-                'parsed': list(parsed_set),
-                'seen_texts': list(seen_texts),
-                'visited_identifiers': list(visited_identifiers)  # visited_identifiers 추가
-            }
-            temp_state_file = self.state_file + '.tmp'
+            start_time = time.time()
             try:
-                with open(temp_state_file, 'w', encoding='utf-8') as f:
-                    json.dump(state, f, ensure_ascii=False, indent=4)
-                # 원자적 파일 교체
-                shutil.move(temp_state_file, self.state_file)
-                self.logger.info("상태 저장 완료.")
+                if tracked and os.path.exists(self.state_file) and not self.needs_compaction():
+                    changes = self.append_journal(fetch_queue, parse_queue, sets, change_stats)
+                    self.logger.info(f"상태 저널 기록 완료. ({changes}개 변경, {time.time() - start_time:.3f}초)")
+                else:
+                    self.write_snapshot(fetch_queue, parse_queue, sets, change_stats)
+                    self.logger.info(f"상태 스냅샷 저장 완료. ({time.time() - start_time:.3f}초)")
             except Exception as e:
                 self.logger.error(f"상태 저장 실패: {e}")
-                if os.path.exists(temp_state_file):
-                    os.remove(temp_state_file)
+
+    def append_journal(self, fetch_queue, parse_queue, sets, change_stats=None):
+        fetch_push, fetch_pop = fetch_queue.tracker.drain()
+        parse_push, parse_pop = parse_queue.tracker.drain()
+        record = {
+            'fetch_push': [list(entry) for entry in fetch_push],
+            'fetch_pop': fetch_pop,
+            'parse_push': [self.encode_parse_entry(entry) for entry in parse_push],
+            'parse_pop': parse_pop,
+        }
+        for key, container in zip(self.SET_KEYS, sets):
+            if hasattr(container, 'kind'):
+                record[key + '_digests'] = [format(digest, '016x') for digest in container.drain_added()]
+            else:
+                record[key] = container.drain_added()
+        changes = sum(len(value) for value in record.values())
+        if change_stats is not None and change_stats.dirty:
+            # 유형별 변경 비율은 작으므로 바뀔 때마다 전체를 기록 (마지막 값이 적용됨)
+            record['change_stats'] = change_stats.to_state()
+            changes += 1
+        if changes == 0:
+            return 0
+        with open(self.journal_file, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        return changes
+
+    @staticmethod
+    def checkpoint_items(queue):
+        """
+        큐 항목 목록을 만들고 변경 기록을 비움.
+        큐가 checkpoint_items를 제공하면 두 작업을 큐의 Lock 안에서 한 번에 수행하여,
+        그 사이에 추가되었다가 꺼내진 URL의 제거 기록이 사라지지 않도록 합니다.
+        """
+        if hasattr(queue, 'checkpoint_items'):
+            return queue.checkpoint_items()
+        if getattr(queue, 'tracker', None) is not None:
+            queue.tracker.drain()
+        return list(queue)
+
+    def write_snapshot(self, fetch_queue, parse_queue, sets, change_stats=None):
+        # 스냅샷에 모두 포함되므로 지금까지의 변경 기록은 버림
+        for container in sets:
+            if hasattr(container, 'drain_added'):
+                container.drain_added()
+        fetch_items = self.checkpoint_items(fetch_queue)
+        parse_items = self.checkpoint_items(parse_queue)
+
+        record = {
+            'format': 2,
+            'fetch_push': [list(entry) for entry in fetch_items],
+            'parse_push': [self.encode_parse_entry(entry) for entry in parse_items],
+        }
+        if change_stats is not None:
+            record['change_stats'] = change_stats.to_state()
+        sidecars = []
+        for key, container in zip(self.SET_KEYS, sets):
+            if hasattr(container, 'kind'):
+                sidecar_file = f"{self.state_file}.{key}.bin"
+                sidecars.append((sidecar_file, container.to_bytes()))
+                record[key] = {'kind': container.kind, 'file': os.path.basename(sidecar_file)}
+            else:
+                record[key] = list(container)
+
+        temp_state_file = self.state_file + '.tmp'
+        try:
+            # 압축 집합 파일을 먼저 교체해야 스냅샷이 항상 완전한 집합 파일을 가리킴
+            for sidecar_file, data in sidecars:
+                with open(sidecar_file + '.tmp', 'wb') as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                shutil.move(sidecar_file + '.tmp', sidecar_file)
+            with open(temp_state_file, 'w', encoding='utf-8') as f:
+                json.dump(record, f, ensure_ascii=False)
+                f.flush()
+                os.fsync(f.fileno())
+            # 원자적 파일 교체 후 저널 비우기
+            shutil.move(temp_state_file, self.state_file)
+            with open(self.journal_file, 'w', encoding='utf-8'):
+                pass
+        except Exception:
+            if os.path.exists(temp_state_file):
+                os.remove(temp_state_file)
+            raise
+
+    def load_set_entry(self, container, value):
+        """스냅샷의 집합 항목(원소 목록 또는 바이너리 파일 참조)을 container에 불러옴"""
+        if isinstance(value, dict):
+            sidecar_file = os.path.join(os.path.dirname(self.state_file), value['file'])
+            if not hasattr(container, 'load_snapshot'):
+                raise ValueError(f"{value['kind']} 형식의 압축 집합은 exact 모드로 불러올 수 없습니다.")
+            with open(sidecar_file, 'rb') as f:
+                container.load_snapshot(value['kind'], f.read())
+        else:
+            container.load_items(value)
+
+    def apply_record(self, record, fetch, parse, sets):
+        """스냅샷/저널 레코드 하나를 적용 (제거 먼저, 추가 나중)"""
+        if 'change_stats' in record:
+            self.change_stats = record['change_stats']
+        for url in record.get('fetch_pop', []):
+            fetch.pop(url, None)
+        for entry in record.get('fetch_push', []):
+            fetch[entry[0]] = entry
+        for url in record.get('parse_pop', []):
+            parse.pop(url, None)
+        for entry in record.get('parse_push', []):
+            parse[entry[0]] = entry
+        for key in self.SET_KEYS:
+            self.load_set_entry(sets[key], record.get(key, []))
+            digests = record.get(key + '_digests')
+            if digests:
+                if not hasattr(sets[key], 'load_digests'):
+                    raise ValueError("압축 집합의 저널은 exact 모드로 불러올 수 없습니다.")
+                sets[key].load_digests(int(digest, 16) for digest in digests)
+
+    def new_sets(self):
+        return {key: self.near_duplicate_factory() if key == 'near_duplicates' else self.set_factory() for key in self.SET_KEYS}
 
     def load_state(self, start_url):
+        """
+        저장된 상태를 불러옴. Fetch 큐 항목은 (url, depth) 또는 우선순위 점수를 포함한 (url, depth, 점수)이며,
+        URL 유형별 변경 비율은 self.change_stats에 남깁니다 (ChangeStats.load_state 참고).
+        """
+        self.change_stats = None
+        fetch = {}
+        parse = {}
+        sets = self.new_sets()
         if os.path.exists(self.state_file):
             self.logger.info("기존 상태를 불러오는 중...")
+            start_time = time.time()
             try:
                 with open(self.state_file, 'r', encoding='utf-8') as f:
                     state = json.load(f)
-                    fetch_queue = deque(state.get('fetching_queue', []))
-                    parse_queue = deque([
-                        (url, base64.b64decode(content.encode('utf-8')), depth) 
-                        for (url, content, depth) in state.get('parsing_queue', [])
-                    ])
-                    visited = set(state.get('visited', []))
-                    parsed_set = set(state.get('parsed', []))
-                    seen_texts = set(state.get('seen_texts', []))
-                    visited_identifiers = set(state.get('visited_identifiers', []))  # visited_identifiers 로드
-                    self.logger.info(f"불러온 상태: {len(fetch_queue)}개의 URL이 Fetch 큐에, {len(parse_queue)}개의 페이지가 Parse 큐에 있습니다. 방문한 URL 수: {len(visited)}, 파싱된 URL 수: {len(parsed_set)}, seen_texts 수: {len(seen_texts)}, visited_identifiers 수: {len(visited_identifiers)}.")
+                if 'fetching_queue' in state:
+                    # 이전 형식 (전체 상태를 담은 단일 JSON)
+                    state['fetch_push'] = state.pop('fetching_queue')
+                    state['parse_push'] = state.pop('parsing_queue', [])
+                self.apply_record(state, fetch, parse, sets)
+
+                replayed = 0
+                if os.path.exists(self.journal_file):
+                    with open(self.journal_file, 'r', encoding='utf-8') as f:
+                        for line in f:
+                            if not line.strip():
+                                continue
+                            try:
+                                record = json.loads(line)
+                            except json.JSONDecodeError:
+                                # 기록 도중 중단된 마지막 줄은 무시
+                                self.logger.warning("손상된 저널 레코드를 건너뜁니다.")
+                                continue
+                            self.apply_record(record, fetch, parse, sets)
+                            replayed += 1
+                self.logger.info(f"스냅샷과 저널 {replayed}개 레코드 재생 완료 ({time.time() - start_time:.2f}초)")
             except json.JSONDecodeError:
                 self.logger.error("상태 파일이 손상되었습니다. 초기화합니다.")
-                fetch_queue = deque()
-                parse_queue = deque()
-                visited = set()
-                parsed_set = set()
-                seen_texts = set()
-                visited_identifiers = set()
+                fetch, parse = {}, {}
+                sets = self.new_sets()
+                self.change_stats = None
+            except (OSError, ValueError) as e:
+                # 집합 방식이 다르거나 압축 집합 파일이 없는 경우: 초기화하면 기존 상태를 덮어쓰므로 중단
+                self.logger.error(f"상태를 불러올 수 없습니다: {e}")
+                raise
         else:
-            fetch_queue = deque()
-            parse_queue = deque()
-            visited = set()
-            parsed_set = set()
-            seen_texts = set()
-            visited_identifiers = set()
             self.logger.info("새로운 크롤링 세션을 시작합니다.")
 
-        return fetch_queue, parse_queue, visited, parsed_set, seen_texts, visited_identifiers
+        fetch_queue = [tuple(entry) for entry in fetch.values()]
+        parse_queue = TrackedDeque((self.decode_parse_entry(entry) for entry in parse.values()), tracker=ChangeTracker())
+        visited = sets['visited']
+        parsed_set = sets['parsed']
+        seen_texts = sets['seen_texts']
+        visited_identifiers = sets['visited_identifiers']
+        near_duplicates = sets['near_duplicates']
+        if os.path.exists(self.state_file):
+            self.logger.info(f"불러온 상태: {len(fetch_queue)}개의 URL이 Fetch 큐에, {len(parse_queue)}개의 페이지가 Parse 큐에 있습니다. 방문한 URL 수: {len(visited)}, 파싱된 URL 수: {len(parsed_set)}, seen_texts 수: {len(seen_texts)}, visited_identifiers 수: {len(visited_identifiers)}, 근접 중복 서명 수: {len(near_duplicates)}.")
+
+        return fetch_queue, parse_queue, visited, parsed_set, seen_texts, visited_identifiers, near_duplicates
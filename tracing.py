@@ -0,0 +1,196 @@
+# tracing.py
+
+import contextvars
+import heapq
+import json
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+# 현재 스레드(또는 asyncio 작업)가 처리 중인 페이지의 추적 기록
+_current_trace = contextvars.ContextVar('current_trace', default=None)
+
+def current_trace():
+    return _current_trace.get()
+
+@contextmanager
+def activate(trace):
+    """이 블록 안의 span()이 trace에 기록되도록 설정 (trace가 None이면 기록 안 함)"""
+    token = _current_trace.set(trace)
+    try:
+        yield trace
+    finally:
+        _current_trace.reset(token)
+
+@contextmanager
+def span(name, histogram=None, **attrs):
+    """
+    단계 하나의 소요 시간을 측정하여 histogram(stage 레이블)과 현재 페이지의 추적 기록에 남김.
+    블록 안에서 돌려받은 dict에 값을 넣으면 (테이블 행 수 등) span의 속성으로 함께 기록됩니다.
+    """
+    trace = _current_trace.get()
+    start = time.perf_counter()
+    try:
+        yield attrs
+    finally:
+        elapsed = time.perf_counter() - start
+        if histogram is not None:
+            histogram.observe(elapsed, (name,))
+        if trace is not None:
+            trace.add(name, start, elapsed, attrs)
+
+
+class PageTrace:
+    """한 URL의 단계별 span 목록. 시작 위치는 추적을 시작한 시점부터의 초"""
+    __slots__ = ('url', 'started_at', 'origin', 'spans', 'result', 'mark')
+
+    def __init__(self, url):
+        self.url = url
+        self.started_at = time.time()
+        self.origin = time.perf_counter()
+        self.spans = []  # [(이름, 시작, 소요 시간, 속성), ...]
+        self.result = None
+        self.mark = None  # Parse 큐에 넣은 시각 (대기 시간 측정용)
+
+    def add(self, name, start, duration, attrs=None):
+        self.spans.append((name, start - self.origin, duration, attrs or None))
+
+    def merge(self, spans, offset):
+        """다른 프로세스에서 측정한 span (그쪽 시작 기준)을 offset(초) 뒤로 옮겨 추가"""
+        for name, start, duration, attrs in spans:
+            self.spans.append((name, start + offset, duration, attrs))
+
+    def offset(self):
+        return time.perf_counter() - self.origin
+
+    def to_record(self):
+        total = self.offset()
+        wait = sum(duration for name, _, duration, _ in self.spans if name.endswith('_wait'))
+        fetch = sum(duration for name, _, duration, _ in self.spans if name == 'fetch')
+        spans = []
+        for name, start, duration, attrs in sorted(self.spans, key=lambda s: s[1]):
+            entry = {"name": name, "start_ms": round(start * 1000, 3), "ms": round(duration * 1000, 3)}
+            if attrs:
+                entry.update(attrs)
+            spans.append(entry)
+        return {
+            "url": self.url,
+            "started_at": round(self.started_at, 3),
+            "result": self.result,
+            "total_ms": round(total * 1000, 3),
+            "busy_ms": round((total - wait) * 1000, 3),  # 큐 대기를 뺀 시간
+            "parse_ms": round((total - wait - fetch) * 1000, 3),  # 가져오기도 뺀 파싱 이후 처리 시간 (느린 페이지 순위 기준)
+            "spans": spans,
+        }
+
+
+def slowest_spans(record, n=3):
+    return [{"name": s["name"], "ms": s["ms"]} for s in sorted(record["spans"], key=lambda s: -s["ms"])
+            if not s["name"].endswith('_wait') and s["name"] != 'fetch'][:n]
+
+def top_pages(trace_files, n=20):
+    """추적 파일(여러 개 가능)에서 파싱 이후 처리 시간(parse_ms)이 가장 긴 n개 페이지"""
+    heap = []
+    seq = 0
+    for path in trace_files:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # 기록 도중 중단된 마지막 줄
+                seq += 1
+                item = (record["parse_ms"], seq, record)
+                if len(heap) < n:
+                    heapq.heappush(heap, item)
+                elif item > heap[0]:
+                    heapq.heapreplace(heap, item)
+    return [record for _, _, record in sorted(heap, reverse=True)]
+
+def format_top_pages(records):
+    lines = []
+    for rank, record in enumerate(records, 1):
+        spans = ", ".join(f"{s['name']} {s['ms']:.0f}ms" for s in slowest_spans(record))
+        lines.append(f"{rank:>3}. {record['parse_ms']:>9.1f}ms {record['url']} ({record['result']}; {spans})")
+    return lines
+
+
+class Tracer:
+    """
+    페이지별 단계 추적기. sample_rate 비율의 URL을 골라 가져오기부터 저장까지의 span을 trace_file에 JSONL로 기록하고,
+    큐 대기와 가져오기를 뺀 처리 시간이 가장 긴 top_n개 페이지를 메모리에 유지합니다.
+    Fetch 스레드에서 시작한 기록은 Parse 큐를 거치는 동안 URL별로 보관했다가 파싱 스레드가 이어받습니다.
+    """
+
+    def __init__(self, trace_file, logger, sample_rate=1.0, top_n=20):
+        self.trace_file = trace_file
+        self.logger = logger
+        self.sample_rate = sample_rate
+        self.top_n = top_n
+        self.lock = threading.Lock()
+        self.file = open(trace_file, 'a', encoding='utf-8')
+        self.pending = {}  # URL -> Parse 큐에서 대기 중인 페이지의 PageTrace
+        self.top = []  # (parse_ms, 순번, 기록) 최소 힙
+        self.count = 0
+
+    def start(self, url):
+        """표본으로 뽑히면 새 PageTrace, 아니면 None"""
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return None
+        return PageTrace(url)
+
+    def hand_off(self, trace):
+        """Parse 큐에 넣은 페이지의 기록을 파싱 스레드가 이어받을 때까지 보관"""
+        trace.mark = time.perf_counter()
+        with self.lock:
+            self.pending[trace.url] = trace
+
+    def resume(self, url):
+        """파싱 스레드에서 기록을 이어받음 (이전 실행에서 큐에 남은 페이지는 새로 시작)"""
+        with self.lock:
+            trace = self.pending.pop(url, None)
+        if trace is None:
+            return self.start(url)
+        trace.add('parse_queue_wait', trace.mark, time.perf_counter() - trace.mark)
+        return trace
+
+    def finish(self, trace, result=None):
+        if trace is None:
+            return
+        if result is not None:
+            trace.result = result
+        record = trace.to_record()
+        line = json.dumps(record, ensure_ascii=False) + '\n'
+        with self.lock:
+            self.count += 1
+            try:
+                self.file.write(line)
+            except (OSError, ValueError) as e:
+                self.logger.error(f"추적 기록 실패 ({trace.url}): {e}")
+            item = (record["parse_ms"], self.count, record)
+            if len(self.top) < self.top_n:
+                heapq.heappush(self.top, item)
+            elif item > self.top[0]:
+                heapq.heapreplace(self.top, item)
+
+    def slowest(self):
+        with self.lock:
+            return [record for _, _, record in sorted(self.top, reverse=True)]
+
+    def flush(self):
+        with self.lock:
+            self.file.flush()
+
+    def report(self):
+        """파싱 이후 처리 시간이 가장 긴 페이지 목록을 로그로 남김"""
+        records = self.slowest()
+        if not records:
+            return
+        self.logger.info(f"파싱 이후 처리 시간이 가장 긴 페이지 {len(records)}개 (추적 {self.count}개 중, 전체 기록: {self.trace_file}):\n"
+                         + "\n".join(format_top_pages(records)))
+
+    def close(self):
+        with self.lock:
+            self.pending.clear()
+            self.file.close()
@@ -2,8 +2,10 @@
 
 import os
 import json
+import re
 from urllib.parse import urlparse, urlunparse, parse_qsl
 import logging
+from functools import lru_cache
 
 def load_jsonl(file_path):
     if not os.path.exists(file_path):
@@ -13,9 +15,18 @@ def load_jsonl(file_path):
 
 from urllib.parse import urlparse, urlunparse, parse_qsl
 
-def normalize_url(url):
-    parsed = urlparse(url)
-    
+def normalize_text(text):
+    """본문 중복 판정용 정규화 (크롤러와 재파싱이 같은 규칙을 사용)"""
+    # 모든 공백을 단일 공백으로 변환하고 양쪽 공백 제거
+    text = re.sub(r'\s+', ' ', text).strip()
+    # 소문자 변환
+    text = text.lower()
+    # 불필요한 특수 문자 제거 (필요에 따라 조정)
+    text = re.sub(r'[^\w\s]', '', text)
+    return text
+
+def normalize_parsed(parsed):
+    """urlparse 결과를 정규화된 URL 문자열로 (normalize_url과 normalize_with_identifier가 공유)"""
     # 스킴을 'https'로 통일
     scheme = 'https'
     
@@ -46,13 +57,16 @@ def normalize_url(url):
     fragment = ''
     
     # 정규화된 URL 재구성
-    normalized = urlunparse((scheme, netloc, path, parsed.params, query, fragment))
+    return urlunparse((scheme, netloc, path, parsed.params, query, fragment))
+
+def normalize_url(url):
+    normalized = normalize_parsed(urlparse(url))
     logging.debug(f"normalize_url - 입력: {url}, 출력: {normalized}")
     return normalized
 
 
-def extract_unique_identifier(url):
-    parsed = urlparse(url)
+def identifier_of_parsed(parsed):
+    """urlparse 결과의 고유 식별자 (extract_unique_identifier와 normalize_with_identifier가 공유)"""
     query_params = dict(parse_qsl(parsed.query))
     
     # 우선순위에 따라 고유 식별자를 추출
@@ -61,4 +75,19 @@ def extract_unique_identifier(url):
             return f"{parsed.netloc}{parsed.path}?{key}={query_params[key]}"
     
     # 식별자가 없으면 URL 전체를 사용
-    return normalize_url(url)
\ No newline at end of file
+    return normalize_parsed(parsed)
+
+
+@lru_cache(maxsize=65536)
+def normalize_with_identifier(url):
+    """
+    (normalize_url(url), extract_unique_identifier(normalize_url(url)), 정규화된 URL의 netloc)을 반환.
+    정규화된 URL을 다시 파싱하면 쿼리의 %2B, %26 등이 디코딩되어 달라질 수 있으므로(normalize_url은 멱등이 아님)
+    식별자는 기존과 같이 정규화된 URL을 다시 파싱하여 구하고, 메뉴처럼 여러 페이지에 반복되는 링크는 캐시된 결과를 사용합니다.
+    """
+    normalized = normalize_parsed(urlparse(url))
+    reparsed = urlparse(normalized)
+    return normalized, identifier_of_parsed(reparsed), reparsed.netloc
+
+def extract_unique_identifier(url):
+    return identifier_of_parsed(urlparse(url))